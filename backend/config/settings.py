@@ -61,7 +61,7 @@ DATABASES = {
 }
 if os.environ.get('DATABASE_URL'):
     import dj_database_url
-    DATABASES['default'] = dj_database_url.config(conn_max_age=600)
+    DATABASES['default'] = dj_database_url.config(conn_max_age=int(os.environ.get('CONN_MAX_AGE', '600')))
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -109,6 +109,12 @@ if os.environ.get('REDIS_URL'):
         'LOCATION': os.environ['REDIS_URL'],
     }
 
+# Conditional GET on tests list / item detail / score report: serialized responses
+# are cached under their ETag (0 disables), and public ones may be reused by a CDN
+# or reverse proxy for LISTENING_PUBLIC_MAX_AGE seconds before revalidating
+LISTENING_RESPONSE_CACHE_TIMEOUT = int(os.environ.get('LISTENING_RESPONSE_CACHE_TIMEOUT', '3600'))
+LISTENING_PUBLIC_MAX_AGE = int(os.environ.get('LISTENING_PUBLIC_MAX_AGE', '60'))
+
 # S3-compatible storage for audio (optional)
 if os.environ.get('AWS_STORAGE_BUCKET_NAME'):
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
@@ -116,3 +122,59 @@ if os.environ.get('AWS_STORAGE_BUCKET_NAME'):
     AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME', 'us-east-1')
     AWS_S3_CUSTOM_DOMAIN = os.environ.get('AWS_S3_CUSTOM_DOMAIN', '')
     AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
+
+# Finish sessions asynchronously: POST finish returns 202 and score-report is polled
+LISTENING_ASYNC_FINISH = os.environ.get('LISTENING_ASYNC_FINISH', 'False').lower() == 'true'
+LISTENING_REPORT_WORKERS = int(os.environ.get('LISTENING_REPORT_WORKERS', '2'))
+
+# Anti-cheat events are buffered and written in bulk (set False to write each one).
+# The buffer is per process unless LISTENING_EVENT_BUFFER_SHARED keeps it in the cache
+# (the default with REDIS_URL); a per-process one is turned off under several gunicorn workers
+LISTENING_EVENT_BUFFER = os.environ.get('LISTENING_EVENT_BUFFER', 'True').lower() == 'true'
+LISTENING_EVENT_BUFFER_SHARED = os.environ.get(
+    'LISTENING_EVENT_BUFFER_SHARED', 'True' if os.environ.get('REDIS_URL') else 'False',
+).lower() == 'true'
+LISTENING_EVENT_BUFFER_SIZE = int(os.environ.get('LISTENING_EVENT_BUFFER_SIZE', '200'))
+LISTENING_EVENT_FLUSH_SECONDS = float(os.environ.get('LISTENING_EVENT_FLUSH_SECONDS', '2'))
+LISTENING_EVENT_COALESCE_SECONDS = float(os.environ.get('LISTENING_EVENT_COALESCE_SECONDS', '2'))
+
+# Audio/media delivery: '' serves from Django, or offload to the web server with
+# 'x-sendfile' (Apache/lighttpd) / 'x-accel-redirect' (nginx internal location below)
+LISTENING_MEDIA_OFFLOAD = os.environ.get('LISTENING_MEDIA_OFFLOAD', '')
+LISTENING_MEDIA_ACCEL_PREFIX = os.environ.get('LISTENING_MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Audio pipeline: normalize, transcode (ffmpeg) and segment uploads in a process pool
+LISTENING_AUDIO_PROCESS_ON_SAVE = os.environ.get('LISTENING_AUDIO_PROCESS_ON_SAVE', 'False').lower() == 'true'
+LISTENING_AUDIO_SEGMENT_SECONDS = int(os.environ.get('LISTENING_AUDIO_SEGMENT_SECONDS', '10'))
+LISTENING_AUDIO_BITRATE = os.environ.get('LISTENING_AUDIO_BITRATE', '64k')
+LISTENING_AUDIO_WORKERS = int(os.environ.get('LISTENING_AUDIO_WORKERS', '2'))
+LISTENING_WAVEFORM_BUCKETS = int(os.environ.get('LISTENING_WAVEFORM_BUCKETS', '1000'))
+
+# Widths (px) of the WebP/JPEG thumbnail renditions exposed as thumbnail_srcset
+LISTENING_THUMBNAIL_WIDTHS = [
+    int(w) for w in os.environ.get('LISTENING_THUMBNAIL_WIDTHS', '160,320,640').split(',')
+]
+
+# Opt-in SQLite profile for several workers on one file: WAL, tuned pragmas and
+# BEGIN IMMEDIATE for write transactions (listening/sqlite.py)
+LISTENING_SQLITE_TUNED = os.environ.get('LISTENING_SQLITE_TUNED', 'False').lower() == 'true'
+LISTENING_SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('LISTENING_SQLITE_BUSY_TIMEOUT_MS', '5000'))
+LISTENING_SQLITE_MMAP_SIZE = int(os.environ.get('LISTENING_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+LISTENING_SQLITE_CACHE_SIZE_KB = int(os.environ.get('LISTENING_SQLITE_CACHE_SIZE_KB', '65536'))
+
+# Route session start/answer/events/finish to the async views (for ASGI servers,
+# e.g. SERVER_MODE=asgi with gunicorn.conf.py)
+LISTENING_ASYNC_VIEWS = os.environ.get('LISTENING_ASYNC_VIEWS', 'False').lower() == 'true'
+# Requests per worker doing database work at once in the async views
+LISTENING_ASYNC_DB_CONCURRENCY = int(os.environ.get('LISTENING_ASYNC_DB_CONCURRENCY', '8'))
+
+# Session channel (SSE clock + batched messages) and server-side exam timing
+LISTENING_CHANNEL_TICK_SECONDS = float(os.environ.get('LISTENING_CHANNEL_TICK_SECONDS', '5'))
+LISTENING_TIME_GRACE_SECONDS = int(os.environ.get('LISTENING_TIME_GRACE_SECONDS', '5'))
+
+# Adaptive practice (listening/adaptive.py): stop after this many items or once the
+# ability estimate's standard error is this small; pick among the TOP_K best items
+LISTENING_ADAPTIVE_MAX_ITEMS = int(os.environ.get('LISTENING_ADAPTIVE_MAX_ITEMS', '10'))
+LISTENING_ADAPTIVE_TARGET_SE = float(os.environ.get('LISTENING_ADAPTIVE_TARGET_SE', '0.3'))
+LISTENING_ADAPTIVE_TOP_K = int(os.environ.get('LISTENING_ADAPTIVE_TOP_K', '5'))
+LISTENING_ADAPTIVE_REFRESH_SECONDS = float(os.environ.get('LISTENING_ADAPTIVE_REFRESH_SECONDS', '60'))
@@ -0,0 +1,33 @@
+"""
+gunicorn settings, read automatically from the working directory.
+
+SERVER_MODE=wsgi (default): sync workers serving config.wsgi.
+SERVER_MODE=asgi: uvicorn workers serving config.asgi, with the async session
+views switched on (LISTENING_ASYNC_VIEWS) unless set explicitly. Persistent
+connections are off there: under ASGI each request's queries run in their own
+thread, so a kept-open connection would never be reused.
+
+With more than one worker (however the count is given: GUNICORN_WORKERS,
+--workers, WEB_CONCURRENCY) a per-process anti-cheat event buffer is turned off
+in each worker, since a finish only flushes the buffer of the worker handling
+it; the cache-backed one (LISTENING_EVENT_BUFFER_SHARED) stays on.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '1'))
+
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    os.environ.setdefault('LISTENING_ASYNC_VIEWS', 'True')
+    os.environ.setdefault('CONN_MAX_AGE', '0')
+else:
+    wsgi_app = 'config.wsgi:application'
+
+
+def post_worker_init(worker):
+    # The app is loaded by now; cfg.workers is the count gunicorn actually runs.
+    from listening.events import check_workers
+
+    check_workers(worker.cfg.workers)
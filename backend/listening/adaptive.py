@@ -0,0 +1,183 @@
+"""
+Item selection for adaptive practice sessions (mode 'adaptive').
+
+ItemBank keeps every question of the active tests in NumPy arrays, with what
+selection needs precomputed at GRID ability points under a Rasch model:
+
+    log_p, log_q[question, g]   log P(correct | theta_g), log P(wrong | theta_g)
+    info[item, g]               Fisher information of the item's questions at theta_g
+    order[g]                    item indexes by decreasing information at theta_g
+
+A question's difficulty is its Rasch difficulty from the test's scale conversion
+(equate_scores), else derived from its p-value (item_analysis), else from the
+item's easy/medium/hard label.
+
+next_item() estimates ability (EAP over the grid) from the session's answers and
+draws the next item among the TOP_K most informative unseen items at the grid point
+nearest the estimate, walking the presorted order, so selection takes microseconds
+whatever the bank size. The bank is rebuilt when tests, statistics or conversions
+change, which is checked at most every REFRESH_SECONDS.
+"""
+import random
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+
+from .cache import get_answer_key, get_test_content
+from .models import ItemAnalysisRun, ListeningItem, ListeningTest, QuestionStats, UserAnswer
+
+MAX_ITEMS = getattr(settings, 'LISTENING_ADAPTIVE_MAX_ITEMS', 10)
+# Stop early once the ability estimate is this precise.
+TARGET_SE = getattr(settings, 'LISTENING_ADAPTIVE_TARGET_SE', 0.3)
+# Choose at random among this many best items, so candidates at the same ability
+# do not all get the same sequence.
+TOP_K = getattr(settings, 'LISTENING_ADAPTIVE_TOP_K', 5)
+REFRESH_SECONDS = getattr(settings, 'LISTENING_ADAPTIVE_REFRESH_SECONDS', 60)
+
+GRID = np.linspace(-4, 4, 49)
+LOG_PRIOR = -GRID ** 2 / 2  # standard normal, up to a constant
+LABEL_DIFFICULTY = {'easy': -1.0, 'medium': 0.0, 'hard': 1.0}
+
+
+class ItemBank:
+    def __init__(self, item_ids, item_tests, question_ids, question_items, difficulties, entries=None, tests=None):
+        """
+        item_ids / item_tests: per item; question_ids / question_items (index into
+        item_ids) / difficulties: per question. `entries` (question id -> AnswerKeyEntry)
+        and `tests` (id -> ListeningTest) are used to grade answers and serve content.
+        """
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.item_tests = np.asarray(item_tests, dtype=np.int64)
+        self.question_ids = np.asarray(question_ids, dtype=np.int64)
+        self.question_items = np.asarray(question_items, dtype=np.int64)
+        self.question_index = {q: i for i, q in enumerate(self.question_ids.tolist())}
+        self.entries = entries or {}
+        self.tests = tests or {}
+        self.fingerprint = None
+
+        p = 1 / (1 + np.exp(-(GRID[None, :] - np.asarray(difficulties, dtype=float)[:, None])))
+        self.log_p = np.log(p)
+        self.log_q = np.log1p(-p)
+        self.info = np.zeros((len(self.item_ids), len(GRID)))
+        np.add.at(self.info, self.question_items, p * (1 - p))
+        self.order = [column.tolist() for column in np.argsort(-self.info, axis=0, kind='stable').T]
+
+    @classmethod
+    def from_db(cls) -> 'ItemBank':
+        tests = {
+            t.pk: t for t in ListeningTest.objects.filter(is_active=True, is_archived=False)
+            .select_related('scale_conversion')
+        }
+        items = list(
+            # Assembled forms hold copies of bank items; serve each item once.
+            ListeningItem.objects.filter(test_id__in=tests, source_item__isnull=True)
+            .order_by('id').values_list('id', 'test_id', 'difficulty')
+        )
+        item_index = {item_id: i for i, (item_id, _, _) in enumerate(items)}
+        p_values = dict(
+            QuestionStats.objects.filter(question__item__test_id__in=tests, p_value__isnull=False)
+            .values_list('question_id', 'p_value')
+        )
+        entries = {}
+        difficulties = {}
+        for test in tests.values():
+            rasch = test.scale_conversion.difficulties if test.scale_conversion else {}
+            for question_id, entry in get_answer_key(test).items():
+                if entry.correct_option_id is None or entry.item_id not in item_index:
+                    continue
+                entries[question_id] = entry
+                if str(question_id) in rasch:
+                    difficulties[question_id] = rasch[str(question_id)]
+                elif question_id in p_values:
+                    p = min(max(p_values[question_id], 0.02), 0.98)
+                    difficulties[question_id] = float(np.log((1 - p) / p))
+                else:
+                    label = items[item_index[entry.item_id]][2]
+                    difficulties[question_id] = LABEL_DIFFICULTY.get(label, 0.0)
+        question_ids = sorted(entries)
+        return cls(
+            item_ids=[item_id for item_id, _, _ in items],
+            item_tests=[test_id for _, test_id, _ in items],
+            question_ids=question_ids,
+            question_items=[item_index[entries[q].item_id] for q in question_ids],
+            difficulties=[difficulties[q] for q in question_ids],
+            entries=entries,
+            tests=tests,
+        )
+
+    def estimate(self, answers) -> tuple:
+        """(theta, standard error): posterior mean and sd over the grid given (question_id, is_correct) pairs."""
+        right = [self.question_index[q] for q, ok in answers if ok and q in self.question_index]
+        wrong = [self.question_index[q] for q, ok in answers if not ok and q in self.question_index]
+        log_post = LOG_PRIOR + self.log_p[right].sum(0) + self.log_q[wrong].sum(0)
+        post = np.exp(log_post - log_post.max())
+        post /= post.sum()
+        theta = float((post * GRID).sum())
+        return theta, float(np.sqrt((post * (GRID - theta) ** 2).sum()))
+
+    def seen_items(self, answers) -> set:
+        return {int(self.question_items[self.question_index[q]]) for q, _ in answers if q in self.question_index}
+
+    def select(self, theta: float, seen: set, rng: random.Random, top_k: int = TOP_K):
+        """Index of the next item: one of the top_k unseen items by information at theta, or None."""
+        candidates = []
+        for index in self.order[int(np.abs(GRID - theta).argmin())]:
+            if index not in seen:
+                candidates.append(index)
+                if len(candidates) == top_k:
+                    break
+        return rng.choice(candidates) if candidates else None
+
+
+_bank = None
+_checked = 0.0
+_lock = threading.Lock()
+
+
+def bank_fingerprint() -> tuple:
+    tests = ListeningTest.objects.filter(is_active=True, is_archived=False).aggregate(
+        count=Count('id'), updated=Max('updated_at'), conversions=Sum('scale_conversion_id'),
+    )
+    last_run = ItemAnalysisRun.objects.values_list('id', flat=True).first()
+    return tests['count'], tests['updated'], tests['conversions'], last_run
+
+
+def item_bank() -> ItemBank:
+    """The process-wide bank, rebuilt when its source data has changed."""
+    global _bank, _checked
+    if _bank is not None and time.monotonic() - _checked < REFRESH_SECONDS:
+        return _bank
+    with _lock:
+        if _bank is None or time.monotonic() - _checked >= REFRESH_SECONDS:
+            fingerprint = bank_fingerprint()
+            if _bank is None or _bank.fingerprint != fingerprint:
+                bank = ItemBank.from_db()
+                bank.fingerprint = fingerprint
+                _bank = bank
+            _checked = time.monotonic()
+    return _bank
+
+
+def next_item(session) -> dict:
+    """The next item for an adaptive session (None once done) with the current ability estimate."""
+    answers = list(UserAnswer.objects.filter(session=session).values_list('question_id', 'is_correct'))
+    bank = item_bank()
+    theta, se = bank.estimate(answers)
+    seen = bank.seen_items(answers)
+    item = None
+    if len(seen) < MAX_ITEMS and not (seen and se <= TARGET_SE):
+        # Seeded by progress: asking again before answering returns the same item.
+        index = bank.select(theta, seen, random.Random(f'{session.pk}:{len(answers)}'))
+        if index is not None:
+            item_id = int(bank.item_ids[index])
+            content = get_test_content(bank.tests[int(bank.item_tests[index])], True)
+            item = next((i for i in content if i['id'] == item_id), None)
+    return {
+        'item': item,
+        'done': item is None,
+        'items_answered': len(seen),
+        'ability': {'theta': round(theta, 3), 'se': round(se, 3)},
+    }
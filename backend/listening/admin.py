@@ -8,19 +8,45 @@ from .models import (
     UserAnswer,
     AntiCheatEvent,
     ScoreReport,
+    ScoreReportJob,
+    QuestionStats,
+    ItemAnalysisRun,
+    ScaleConversion,
 )
+from .search import matching_items
+
+
+class ContentSearchMixin:
+    """
+    Adds full-text matches (listening/search.py) over item transcripts, questions,
+    explanations and options to the admin's search_fields results.
+    """
+    search_item_lookup = 'pk'
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        item_ids = matching_items(search_term) if search_term else []
+        if item_ids:
+            results |= queryset.filter(**{f'{self.search_item_lookup}__in': item_ids})
+            may_have_duplicates = True
+        return results, may_have_duplicates
 
 
 class ListeningItemInline(admin.StackedInline):
     model = ListeningItem
     extra = 0
     ordering = ['order']
+    raw_id_fields = ['source_item']
 
 
 @admin.register(ListeningTest)
-class ListeningTestAdmin(admin.ModelAdmin):
-    list_display = ['title', 'version_id', 'total_items', 'is_active', 'is_archived', 'created_at']
+class ListeningTestAdmin(ContentSearchMixin, admin.ModelAdmin):
+    list_display = [
+        'title', 'version_id', 'total_items', 'time_limit_seconds', 'is_active', 'is_archived', 'created_at',
+    ]
     list_filter = ['is_active', 'is_archived']
+    search_fields = ['title', 'version_id']
+    search_item_lookup = 'items'
     inlines = [ListeningItemInline]
 
 
@@ -38,9 +64,11 @@ class QuestionInline(admin.StackedInline):
 
 
 @admin.register(ListeningItem)
-class ListeningItemAdmin(admin.ModelAdmin):
-    list_display = ['id', 'test', 'item_type', 'difficulty', 'order', 'has_thumbnail']
+class ListeningItemAdmin(ContentSearchMixin, admin.ModelAdmin):
+    list_display = ['id', 'test', 'item_type', 'difficulty', 'topic_tag', 'order', 'has_thumbnail']
     list_filter = ['item_type', 'difficulty']
+    search_fields = ['topic_tag', 'test__title']
+    raw_id_fields = ['source_item']
     inlines = [QuestionInline]
 
     def has_thumbnail(self, obj):
@@ -53,6 +81,7 @@ class ListeningItemAdmin(admin.ModelAdmin):
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ['id', 'item', 'question_type', 'order']
     list_filter = ['question_type']
+    search_fields = ['text']
     inlines = [ChoiceOptionInline]
 
 
@@ -65,3 +94,44 @@ class ListeningSessionAdmin(admin.ModelAdmin):
 @admin.register(ScoreReport)
 class ScoreReportAdmin(admin.ModelAdmin):
     list_display = ['id', 'session', 'total_score', 'main_idea', 'detail', 'inference', 'organization', 'pragmatic']
+
+
+@admin.register(ScoreReportJob)
+class ScoreReportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'session', 'status', 'attempts', 'created_at', 'updated_at']
+    list_filter = ['status']
+
+
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(admin.ModelAdmin):
+    """Read-only: rows are written by the item_analysis command."""
+    list_display = [
+        'question', 'responses', 'p_value', 'discrimination', 'point_biserial', 'median_response_ms', 'updated_at',
+    ]
+    list_select_related = ['question']
+    ordering = ['discrimination']
+    exclude = ['state']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ItemAnalysisRun)
+class ItemAnalysisRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'through', 'full', 'sessions', 'answers', 'seconds']
+
+
+@admin.register(ScaleConversion)
+class ScaleConversionAdmin(admin.ModelAdmin):
+    """Rows are written by the equate_scores command and never edited."""
+    list_display = ['id', 'version_id', 'sessions', 'created_at']
+    search_fields = ['version_id']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -8,3 +8,5 @@ class ListeningConfig(AppConfig):
 
     def ready(self):
         import listening.signals  # noqa: F401
+        from listening.sqlite import install
+        install()
@@ -0,0 +1,269 @@
+"""
+Automatic assembly of parallel test forms from the item bank.
+
+CandidatePool holds every bank item (items that are not themselves copies made by
+assembly) as NumPy arrays: item type, difficulty label, topic and the number of
+questions of each question type, with items indexed by (item_type, difficulty) cell.
+
+assemble() fills a FormSpec's stages with a randomized greedy pass followed by
+local search, both scoring a sample of candidates per step in one vectorized
+evaluation of the form's constraint violations:
+
+    difficulty      |count - target| summed over easy/medium/hard
+    topic           items beyond max_per_topic sharing a topic_tag
+    question_types  questions missing from each type's minimum
+    questions       |total questions - target|, when a target is set
+
+The item type of every stage is fixed by the layout. The search restarts a few
+times until the form has no violations. Items used by the `recent` most recently
+created tests, or by a form already assembled in the same run, are not candidates,
+so successive forms do not overlap.
+
+write_form() copies the chosen items, their questions and options into a new
+ListeningTest with bulk inserts; copies point back at the bank item (source_item).
+next_version_number() continues a "<prefix>-<n>" version_id series.
+"""
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.db.models.fields.files import FieldFile
+from django.db.models.functions import Coalesce
+
+from .models import (
+    DIFFICULTY_CHOICES, ITEM_TYPE_CHOICES, QUESTION_TYPE_CHOICES, ChoiceOption, ListeningItem, ListeningTest,
+    Question,
+)
+from .signals import refresh_tests, suspend_content_updates
+from .sqlite import write_transaction
+
+ITEM_TYPES = [t for t, _ in ITEM_TYPE_CHOICES]
+DIFFICULTIES = [d for d, _ in DIFFICULTY_CHOICES]
+QUESTION_TYPES = [t for t, _ in QUESTION_TYPE_CHOICES]
+
+SAMPLE = 64  # candidates scored per cell and step
+ITERATIONS = 200
+RESTARTS = 5
+
+
+class AssemblyError(ValueError):
+    pass
+
+
+@dataclass
+class FormSpec:
+    layout: list = field(default_factory=lambda: ['conversation', 'lecture', 'conversation', 'lecture', 'lecture'])
+    difficulty: dict = field(default_factory=lambda: {'easy': 1, 'medium': 3, 'hard': 1})
+    max_per_topic: int = 1
+    min_question_types: dict = field(default_factory=lambda: {t: 1 for t in QUESTION_TYPES})
+    questions: int = None
+
+    def check(self):
+        unknown = set(self.layout) - set(ITEM_TYPES)
+        if unknown:
+            raise AssemblyError(f'unknown item type(s): {", ".join(sorted(unknown))}')
+        if set(self.difficulty) - set(DIFFICULTIES):
+            raise AssemblyError(f'difficulty must be among {", ".join(DIFFICULTIES)}')
+        if sum(self.difficulty.values()) != len(self.layout):
+            raise AssemblyError(f'difficulty counts must add up to {len(self.layout)} items')
+        if set(self.min_question_types) - set(QUESTION_TYPES):
+            raise AssemblyError(f'question types must be among {", ".join(QUESTION_TYPES)}')
+
+
+class CandidatePool:
+    def __init__(self, item_ids, item_types, difficulties, topics, question_types):
+        """
+        Per item: id, item type / difficulty codes (index into ITEM_TYPES / DIFFICULTIES),
+        topic code (-1 for none) and a row of question counts per QUESTION_TYPES.
+        """
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.item_types = np.asarray(item_types, dtype=np.int64)
+        self.difficulties = np.asarray(difficulties, dtype=np.int64)
+        self.topics = np.asarray(topics, dtype=np.int64)
+        self.question_types = np.asarray(question_types, dtype=np.int64).reshape(-1, len(QUESTION_TYPES))
+        self.question_counts = self.question_types.sum(1)
+        self.available = self.question_counts > 0
+        self.cells = {
+            (t, d): np.flatnonzero((self.item_types == t) & (self.difficulties == d))
+            for t in range(len(ITEM_TYPES)) for d in range(len(DIFFICULTIES))
+        }
+
+    @classmethod
+    def from_db(cls, recent: int = 5) -> 'CandidatePool':
+        """Bank items of non-archived tests, minus those used by the `recent` newest tests."""
+        bank = ListeningItem.objects.filter(source_item__isnull=True, test__is_archived=False)
+        items = list(bank.order_by('id').values_list('id', 'item_type', 'difficulty', 'topic_tag'))
+        item_ids = np.array([i[0] for i in items], dtype=np.int64)
+        question_types = np.zeros((len(items), len(QUESTION_TYPES)), dtype=np.int64)
+        rows = list(
+            Question.objects.filter(item__in=bank).values_list('item_id', 'question_type')
+        )
+        if rows:
+            type_index = {t: i for i, t in enumerate(QUESTION_TYPES)}
+            known = [(item_id, type_index[t]) for item_id, t in rows if t in type_index]
+            np.add.at(
+                question_types,
+                (np.searchsorted(item_ids, [k[0] for k in known]), [k[1] for k in known]),
+                1,
+            )
+        topic_names = sorted({i[3].strip().lower() for i in items} - {''})
+        topic_index = {t: i for i, t in enumerate(topic_names)}
+        pool = cls(
+            item_ids=item_ids,
+            item_types=[ITEM_TYPES.index(i[1]) if i[1] in ITEM_TYPES else -1 for i in items],
+            difficulties=[DIFFICULTIES.index(i[2]) if i[2] in DIFFICULTIES else 1 for i in items],
+            topics=[topic_index.get(i[3].strip().lower(), -1) for i in items],
+            question_types=question_types,
+        )
+        pool.exclude(recently_used(recent))
+        return pool
+
+    def exclude(self, item_ids):
+        self.available &= ~np.isin(self.item_ids, np.fromiter(item_ids, dtype=np.int64))
+
+    def release(self, chosen: list):
+        """Make the items of a form that is not used (indexes into the pool) available again."""
+        self.available[chosen] = True
+
+    def violations(self, chosen: list, spec: FormSpec) -> dict:
+        """Constraint violations of a complete form (indexes into the pool), zero ones omitted."""
+        costs = self._costs(np.asarray(chosen), 0, np.asarray(chosen[:1]), spec, parts=True)
+        return {name: int(value[0]) for name, value in costs.items() if value[0]}
+
+    def _costs(self, chosen: np.ndarray, slot: int, candidates: np.ndarray, spec: FormSpec, parts=False):
+        """Total violations with chosen[slot] replaced by each candidate; -1 marks unfilled slots."""
+        others = np.delete(chosen, slot)
+        others = others[others >= 0]
+        target = np.array([spec.difficulty.get(d, 0) for d in DIFFICULTIES])
+        counts = np.bincount(self.difficulties[others], minlength=len(DIFFICULTIES))
+        counts = counts[None, :] + np.eye(len(DIFFICULTIES), dtype=np.int64)[self.difficulties[candidates]]
+        difficulty = np.abs(counts - target).sum(1)
+
+        other_topics = self.topics[others]
+        other_topics = other_topics[other_topics >= 0]
+        _, topic_counts = np.unique(other_topics, return_counts=True)
+        excess = np.maximum(topic_counts - spec.max_per_topic, 0).sum()
+        same = (self.topics[candidates][:, None] == other_topics[None, :]).sum(1)
+        topic = excess + ((self.topics[candidates] >= 0) & (same >= spec.max_per_topic))
+
+        minimum = np.array([spec.min_question_types.get(t, 0) for t in QUESTION_TYPES])
+        covered = self.question_types[others].sum(0)[None, :] + self.question_types[candidates]
+        question_types = np.maximum(minimum - covered, 0).sum(1)
+
+        questions = np.zeros(len(candidates), dtype=np.int64)
+        if spec.questions and len(others) == len(chosen) - 1:
+            questions = np.abs(self.question_counts[others].sum() + self.question_counts[candidates] - spec.questions)
+        if parts:
+            return {'difficulty': difficulty, 'topic': topic, 'question_types': question_types, 'questions': questions}
+        return difficulty + topic + question_types + questions
+
+    def _candidates(self, item_type: int, chosen: np.ndarray, rng) -> np.ndarray:
+        """Up to SAMPLE available items of each difficulty cell for a stage of `item_type`."""
+        picks = []
+        for d in range(len(DIFFICULTIES)):
+            cell = self.cells[(item_type, d)]
+            cell = cell[self.available[cell]]
+            if len(cell) > SAMPLE:
+                cell = cell[rng.integers(0, len(cell), SAMPLE)]
+            picks.append(cell)
+        candidates = np.unique(np.concatenate(picks))
+        return candidates[~np.isin(candidates, chosen)]
+
+    def assemble(self, spec: FormSpec, rng) -> tuple:
+        """(pool indexes per stage, violations) of the best form found; its items become unavailable."""
+        spec.check()
+        types = [ITEM_TYPES.index(t) for t in spec.layout]
+        for t in set(types):
+            need = types.count(t)
+            have = sum(int(self.available[self.cells[(t, d)]].sum()) for d in range(len(DIFFICULTIES)))
+            if have < need:
+                raise AssemblyError(f'{have} available {ITEM_TYPES[t]} item(s), {need} needed')
+
+        best, best_cost = None, None
+        for _ in range(RESTARTS):
+            chosen = np.full(len(types), -1, dtype=np.int64)
+            for slot, t in enumerate(types):
+                candidates = self._candidates(t, chosen, rng)
+                chosen[slot] = candidates[np.argmin(self._costs(chosen, slot, candidates, spec))]
+            cost = int(self._costs(chosen, 0, chosen[:1], spec)[0])
+            for _ in range(ITERATIONS):
+                if not cost:
+                    break
+                slot = int(rng.integers(len(types)))
+                candidates = self._candidates(types[slot], chosen, rng)
+                if not len(candidates):
+                    continue
+                costs = self._costs(chosen, slot, candidates, spec)
+                pick = int(np.argmin(costs))
+                # Sideways moves let the search cross plateaus.
+                if costs[pick] <= cost:
+                    chosen[slot], cost = candidates[pick], int(costs[pick])
+            if best is None or cost < best_cost:
+                best, best_cost = chosen.copy(), cost
+            if not best_cost:
+                break
+        self.available[best] = False
+        return best.tolist(), self.violations(best.tolist(), spec)
+
+
+def recently_used(recent: int) -> set:
+    """Bank item ids used by the `recent` most recently created tests."""
+    if recent <= 0:
+        return set()
+    tests = ListeningTest.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:recent]
+    return set(
+        ListeningItem.objects.filter(test__in=list(tests))
+        .values_list(Coalesce('source_item_id', 'id'), flat=True)
+    )
+
+
+def next_version_number(prefix: str) -> int:
+    """1 + the highest n of existing "<prefix>-<n>" version_ids (1 when there are none)."""
+    pattern = re.compile(rf'{re.escape(prefix)}-(\d+)')
+    numbers = [
+        int(match.group(1))
+        for match in map(pattern.fullmatch, ListeningTest.objects.filter(
+            version_id__startswith=f'{prefix}-',
+        ).values_list('version_id', flat=True))
+        if match
+    ]
+    return max(numbers, default=0) + 1
+
+
+def _copy(instance, **overrides):
+    values = {}
+    for f in instance._meta.concrete_fields:
+        if not f.primary_key:
+            value = getattr(instance, f.attname)
+            values[f.attname] = value.name if isinstance(value, FieldFile) else value
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+def write_form(item_ids: list, title: str, version_id: str = '', is_active: bool = False,
+               time_limit_seconds: int = None, batch_size: int = 500) -> ListeningTest:
+    """Create a test holding copies of the bank items `item_ids`, in that order, in one transaction."""
+    with write_transaction(), suspend_content_updates():
+        test = ListeningTest.objects.create(
+            title=title, version_id=version_id, is_active=is_active, time_limit_seconds=time_limit_seconds,
+        )
+        sources = ListeningItem.objects.in_bulk(item_ids)
+        items = {
+            item_id: _copy(sources[item_id], test_id=test.pk, order=order, source_item_id=item_id)
+            for order, item_id in enumerate(item_ids, start=1)
+        }
+        ListeningItem.objects.bulk_create(items.values(), batch_size=batch_size)
+
+        sources = list(Question.objects.filter(item_id__in=item_ids).order_by('id'))
+        questions = {q.pk: _copy(q, item_id=items[q.item_id].pk) for q in sources}
+        Question.objects.bulk_create(questions.values(), batch_size=batch_size)
+
+        options = [
+            _copy(o, question_id=questions[o.question_id].pk)
+            for o in ChoiceOption.objects.filter(question__item_id__in=item_ids).order_by('id')
+        ]
+        ChoiceOption.objects.bulk_create(options, batch_size=batch_size)
+        # bulk_create sends no signals, so recount the test explicitly.
+        refresh_tests([test.pk])
+    test.refresh_from_db()
+    return test
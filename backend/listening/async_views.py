@@ -0,0 +1,195 @@
+"""
+Native async versions of the candidate hot-path views (session start, answer,
+events, finish) for ASGI deployments; urls.py routes to them when
+LISTENING_ASYNC_VIEWS is set. Requests and responses match the DRF views in
+views.py, but a candidate waiting on the database no longer holds a worker.
+
+Scoring a finished session runs in one transaction, which the async ORM cannot
+open, so finish hands that part to a thread with sync_to_async.
+
+Django's async ORM still runs each query in a thread with its own connection, so
+a worker caps the requests doing database work at once (LISTENING_ASYNC_DB_CONCURRENCY,
+much like a connection pool); the rest wait on the event loop, holding no thread.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import aget_test_content
+from .clock import SessionTimeUp
+from .models import ListeningSession
+from .serializers import (
+    SessionStartSerializer,
+    SessionSerializer,
+    SubmitAnswerSerializer,
+    EventSerializer,
+    ScoreReportSerializer,
+)
+from .services import ListeningService
+from .utils import aget_guest_user_id, reset_guest_user
+from . import views as sync_views
+
+DB_CONCURRENCY = getattr(settings, 'LISTENING_ASYNC_DB_CONCURRENCY', 8)
+_db_slots = None
+
+
+def db_slots() -> asyncio.Semaphore:
+    global _db_slots
+    if _db_slots is None:
+        _db_slots = asyncio.Semaphore(DB_CONCURRENCY)
+    return _db_slots
+
+
+def _user_id(request) -> int:
+    """views._user_id for a plain Django request, authenticated the way the DRF views are."""
+    authenticators = [cls() for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    return sync_views._user_id(Request(request, authenticators=authenticators))
+
+
+async def auser_id(request) -> int:
+    """
+    Owner of the request's sessions, by the same rule as the sync views: a user
+    only counts when DRF's default authenticators accept it, so a session started
+    here is found again by every sync endpoint.
+    """
+    if not api_settings.DEFAULT_AUTHENTICATION_CLASSES or (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES and 'HTTP_AUTHORIZATION' not in request.META
+    ):
+        # Nothing to authenticate: the cached guest id, without a thread hop.
+        return await aget_guest_user_id()
+    return await sync_to_async(_user_id)(request)
+
+
+class ParseError(Exception):
+    pass
+
+
+def _data(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+    return request.POST
+
+
+def _error(detail: str, status: int) -> JsonResponse:
+    return JsonResponse({'detail': detail}, status=status)
+
+
+class AsyncSessionView(View):
+    """Base for the async views: CSRF-exempt like DRF's APIView, JSON parse errors as 400,
+    and at most DB_CONCURRENCY requests of this worker in the handler at once."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            async with db_slots():
+                return await super().dispatch(request, *args, **kwargs)
+        except ParseError as exc:
+            return _error(str(exc), 400)
+        except SessionTimeUp as exc:
+            return _error(str(exc.detail), exc.status_code)
+
+    async def get_session(self, pk):
+        try:
+            return await ListeningSession.objects.select_related('test').aget(
+                pk=pk, user_id=await auser_id(self.request),
+            )
+        except ListeningSession.DoesNotExist:
+            return None
+
+
+class SessionStartView(AsyncSessionView):
+    async def post(self, request):
+        ser = SessionStartSerializer(data=_data(request))
+        if not ser.is_valid():
+            return JsonResponse(ser.errors, status=400)
+        test_id = ser.validated_data['test_id']
+        mode = ser.validated_data['mode']
+        user_id = await auser_id(request)
+        try:
+            session = await ListeningService.astart_session(user_id, test_id, mode)
+        except IntegrityError:
+            # The cached guest row was deleted by another process; resolve it again.
+            reset_guest_user()
+            session = await ListeningService.astart_session(await auser_id(request), test_id, mode)
+        all_items = []
+        if session.mode != 'adaptive':  # served one item at a time by next-item
+            all_items = await aget_test_content(session.test, session.mode == 'exam')
+        first_item = all_items[0] if all_items else None
+        first_questions = first_item['questions'] if first_item else []
+        return JsonResponse({
+            'session': SessionSerializer(session).data,
+            'current_item': first_item,
+            'current_question': first_questions[0] if first_questions else None,
+            'all_items': all_items,
+        }, status=201)
+
+
+class SessionAnswersView(AsyncSessionView):
+    async def post(self, request, pk):
+        session = await self.get_session(pk)
+        if session is None:
+            return _error('Not found.', 404)
+        if session.status != 'active':
+            return _error('Session is not active.', 400)
+        ser = SubmitAnswerSerializer(data=_data(request))
+        if not ser.is_valid():
+            return JsonResponse(ser.errors, status=400)
+        result = await ListeningService.asubmit_answer(
+            session.id,
+            ser.validated_data['question_id'],
+            ser.validated_data['option_id'],
+            ser.validated_data.get('response_time_ms'),
+        )
+        return JsonResponse(result, status=201)
+
+
+class SessionEventsView(AsyncSessionView):
+    async def post(self, request, pk):
+        session = await self.get_session(pk)
+        if session is None:
+            return _error('Not found.', 404)
+        ser = EventSerializer(data=_data(request))
+        if not ser.is_valid():
+            return JsonResponse(ser.errors, status=400)
+        await ListeningService.alog_event(
+            session.id,
+            ser.validated_data['event_type'],
+            ser.validated_data.get('count', 1),
+            ser.validated_data.get('extra_data'),
+        )
+        return JsonResponse({'status': 'logged'}, status=201)
+
+
+def _finish(session) -> dict:
+    report, answers = ListeningService.finish_session_with_answers(session.id)
+    data = dict(ScoreReportSerializer(report).data)
+    data.update(ListeningService.report_summary(session, answers))
+    return data
+
+
+class SessionFinishView(AsyncSessionView):
+    async def post(self, request, pk):
+        session = await self.get_session(pk)
+        if session is None:
+            return _error('Not found.', 404)
+        if session.status != 'active':
+            return _error('Session already finished.', 400)
+        if sync_views.SessionFinishView.is_async(request.GET):
+            await sync_to_async(ListeningService.finish_session_async)(session.id)
+            return JsonResponse({'status': 'pending', 'session': session.id}, status=202)
+        return JsonResponse(await sync_to_async(_finish)(session))
@@ -0,0 +1,149 @@
+"""
+Audio pipeline orchestration: runs listening.audio_processing in a process pool
+and stores the normalized file, its segments, waveform peaks and a manifest
+alongside the item.
+
+The worker processes only see local temporary files; copying from/to the
+configured storage and all database writes happen in the parent.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connections
+
+from .audio_processing import process_audio
+from .models import ListeningItem
+
+logger = logging.getLogger(__name__)
+
+AUDIO_SEGMENT_SECONDS = getattr(settings, 'LISTENING_AUDIO_SEGMENT_SECONDS', 10)
+AUDIO_BITRATE = getattr(settings, 'LISTENING_AUDIO_BITRATE', '64k')
+AUDIO_WORKERS = getattr(settings, 'LISTENING_AUDIO_WORKERS', 2)
+WAVEFORM_BUCKETS = getattr(settings, 'LISTENING_WAVEFORM_BUCKETS', 1000)
+PROCESSED_PREFIX = 'audio/processed'
+
+
+def new_process_pool(workers: int = AUDIO_WORKERS) -> ProcessPoolExecutor:
+    # spawn: workers never inherit DB connections or threads from the web process.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def needs_processing(item) -> bool:
+    manifest = item.audio_manifest or {}
+    return bool(item.audio) and (manifest.get('source') != item.audio.name or 'waveform' not in manifest)
+
+
+class AudioJob:
+    """Local working copy of one item's audio plus a scratch output directory."""
+
+    def __init__(self, item):
+        self.item = item
+        self.tmp_dir = tempfile.mkdtemp(prefix=f'listening-audio-{item.pk}-')
+        self.out_dir = os.path.join(self.tmp_dir, 'out')
+        storage = item.audio.storage
+        try:
+            self.source = storage.path(item.audio.name)
+        except NotImplementedError:
+            self.source = os.path.join(self.tmp_dir, os.path.basename(item.audio.name))
+            with storage.open(item.audio.name, 'rb') as src, open(self.source, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+
+    def args(self):
+        return (self.source, self.out_dir, AUDIO_SEGMENT_SECONDS, AUDIO_BITRATE, WAVEFORM_BUCKETS)
+
+    def store(self, manifest: dict) -> dict:
+        """Upload outputs next to the item's audio and save the manifest; returns it."""
+        from .signals import refresh_tests
+
+        storage = self.item.audio.storage
+        prefix = f'{PROCESSED_PREFIX}/{self.item.pk}/{uuid.uuid4().hex[:12]}'
+
+        def upload(name):
+            with open(os.path.join(self.out_dir, name), 'rb') as fp:
+                return storage.save(f'{prefix}/{name}', File(fp))
+
+        manifest = dict(manifest)
+        manifest['source'] = self.item.audio.name
+        manifest['segment_seconds'] = AUDIO_SEGMENT_SECONDS
+        manifest['file'] = upload(manifest['file'])
+        manifest['segments'] = [dict(seg, file=upload(seg['file'])) for seg in manifest['segments']]
+        manifest['waveform'] = dict(manifest['waveform'], file=upload(manifest['waveform']['file']))
+        previous = self.item.audio_manifest or {}
+        ListeningItem.objects.filter(pk=self.item.pk).update(
+            audio_duration=manifest['duration'], audio_manifest=manifest,
+        )
+        # Serialized test content includes the manifest, so invalidate it.
+        refresh_tests([self.item.test_id])
+        # Copies of the item in assembled forms (assembly.write_form) share its
+        # outputs; those stay until nothing refers to them.
+        shared = previous.get('file') and ListeningItem.objects.filter(
+            audio_manifest__file=previous['file'],
+        ).exclude(pk=self.item.pk).exists()
+        if not shared:
+            delete_outputs(storage, previous)
+        return manifest
+
+    def cleanup(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def delete_outputs(storage, manifest: dict):
+    names = [manifest.get('file'), manifest.get('waveform', {}).get('file')]
+    names += [seg.get('file') for seg in manifest.get('segments', [])]
+    for name in filter(None, names):
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete processed audio %s', name)
+
+
+def process_items(items, pool: ProcessPoolExecutor):
+    """Process items in `pool`; yields (item, manifest or None, error or None) as each finishes."""
+    jobs = {}
+    for item in items:
+        try:
+            job = AudioJob(item)
+        except OSError as exc:
+            logger.exception('Could not read audio for item %s', item.pk)
+            yield item, None, exc
+            continue
+        jobs[pool.submit(process_audio, *job.args())] = job
+    for future in as_completed(jobs):
+        job = jobs[future]
+        try:
+            yield job.item, job.store(future.result()), None
+        except Exception as exc:
+            logger.exception('Audio processing failed for item %s', job.item.pk)
+            yield job.item, None, exc
+        finally:
+            job.cleanup()
+
+
+# On-save processing: a thread waits on the process pool and does the DB work.
+_pool = None
+_dispatcher = None
+
+
+def schedule_processing(item_id: int):
+    global _pool, _dispatcher
+    if _pool is None:
+        _pool = new_process_pool()
+        _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='audio-pipeline')
+    _dispatcher.submit(_process_saved_item, item_id)
+
+
+def _process_saved_item(item_id: int):
+    try:
+        item = ListeningItem.objects.filter(pk=item_id).first()
+        if item is not None and needs_processing(item):
+            for _ in process_items([item], _pool):
+                pass
+    finally:
+        connections.close_all()
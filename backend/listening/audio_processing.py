@@ -0,0 +1,181 @@
+"""
+Offline audio preparation for listening items, run in worker processes.
+
+This module only uses the standard library and local command-line tools so it
+can run in a spawned process without Django being set up. Given a local source
+file it writes, into an output directory:
+
+- full.<ext>: the whole recording, loudness-normalized (and, with ffmpeg,
+  transcoded to a compact mono MP3)
+- seg_0000.<ext>, seg_0001.<ext>, ...: fixed-length chunks of the same audio
+
+- peaks.bin: waveform peaks, little-endian int16 (min, max) pairs per bucket
+
+and returns a manifest describing them. ffmpeg/ffprobe are used when present;
+otherwise 16-bit PCM WAV input is handled with the `wave` module (normalized and
+segmented, but not transcoded).
+"""
+import os
+import shutil
+import subprocess
+import sys
+import wave
+from array import array
+
+
+class AudioProcessingError(RuntimeError):
+    pass
+
+
+WAVEFORM_SAMPLE_RATE = 8000
+
+
+def _run(args, binary: bool = False):
+    result = subprocess.run(args, capture_output=True, text=not binary)
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors='replace') if binary else result.stderr
+        raise AudioProcessingError(f'{args[0]} failed: {stderr.strip()[:500]}')
+    return result.stdout
+
+
+def compute_peaks(samples: array, buckets: int) -> array:
+    """Min/max pairs of mono int16 `samples` over `buckets` equal spans."""
+    peaks = array('h')
+    buckets = min(buckets, len(samples))
+    if not buckets:
+        return peaks
+    span = len(samples) / buckets
+    for b in range(buckets):
+        chunk = samples[int(b * span):int((b + 1) * span)] or samples[int(b * span):int(b * span) + 1]
+        peaks.append(min(chunk))
+        peaks.append(max(chunk))
+    return peaks
+
+
+def write_peaks(out_dir: str, samples: array, buckets: int, sample_rate: int) -> dict:
+    peaks = compute_peaks(samples, buckets)
+    if sys.byteorder == 'big':
+        peaks.byteswap()
+    with open(os.path.join(out_dir, 'peaks.bin'), 'wb') as fp:
+        fp.write(peaks.tobytes())
+    return {
+        'file': 'peaks.bin',
+        'buckets': len(peaks) // 2,
+        'samples_per_bucket': round(len(samples) / max(len(peaks) // 2, 1), 3),
+        'sample_rate': sample_rate,
+    }
+
+
+def ffprobe_duration(path: str, ffprobe: str = 'ffprobe') -> float:
+    out = _run([ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', path])
+    return float(out.strip() or 0)
+
+
+def process_with_ffmpeg(source: str, out_dir: str, segment_seconds: int, bitrate: str,
+                        buckets: int, ffmpeg: str = 'ffmpeg', ffprobe: str = 'ffprobe') -> dict:
+    full = os.path.join(out_dir, 'full.mp3')
+    _run([
+        ffmpeg, '-v', 'error', '-y', '-i', source, '-vn',
+        '-af', 'loudnorm=I=-16:TP=-1.5:LRA=11',
+        '-ac', '1', '-ar', '44100', '-c:a', 'libmp3lame', '-b:a', bitrate, full,
+    ])
+    _run([
+        ffmpeg, '-v', 'error', '-y', '-i', full, '-c', 'copy',
+        '-f', 'segment', '-segment_time', str(segment_seconds), '-reset_timestamps', '1',
+        os.path.join(out_dir, 'seg_%04d.mp3'),
+    ])
+    segments = []
+    start = 0.0
+    for name in sorted(n for n in os.listdir(out_dir) if n.startswith('seg_')):
+        duration = ffprobe_duration(os.path.join(out_dir, name), ffprobe)
+        segments.append({'file': name, 'start': round(start, 3), 'duration': round(duration, 3)})
+        start += duration
+    # Decode the normalized file once, as low-rate mono PCM, for the waveform.
+    pcm = _run([
+        ffmpeg, '-v', 'error', '-i', full, '-ac', '1', '-ar', str(WAVEFORM_SAMPLE_RATE),
+        '-f', 's16le', '-',
+    ], binary=True)
+    samples = array('h')
+    samples.frombytes(pcm[:len(pcm) // 2 * 2])
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return {
+        'tool': 'ffmpeg',
+        'format': 'mp3',
+        'bitrate': bitrate,
+        'sample_rate': 44100,
+        'channels': 1,
+        'duration': round(ffprobe_duration(full, ffprobe), 3),
+        'file': 'full.mp3',
+        'segments': segments,
+        'waveform': write_peaks(out_dir, samples, buckets, WAVEFORM_SAMPLE_RATE),
+    }
+
+
+def normalize_pcm16(samples: array, target_rms: float = 0.1, peak_limit: float = 0.89) -> array:
+    """Scale 16-bit samples towards `target_rms` (of full scale) without exceeding `peak_limit`."""
+    if not samples:
+        return samples
+    peak = max(max(samples), -min(samples))
+    if peak == 0:
+        return samples
+    rms = (sum(s * s for s in samples) / len(samples)) ** 0.5
+    gain = min(target_rms * 32767 / rms, peak_limit * 32767 / peak)
+    return array('h', (int(s * gain) for s in samples))
+
+
+def process_wav(source: str, out_dir: str, segment_seconds: int, buckets: int) -> dict:
+    with wave.open(source, 'rb') as wav:
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        if wav.getsampwidth() != 2:
+            raise AudioProcessingError('Only 16-bit PCM WAV can be processed without ffmpeg')
+        samples = array('h', wav.readframes(wav.getnframes()))
+    samples = normalize_pcm16(samples)
+    frame_count = len(samples) // channels
+
+    def write(name, chunk):
+        with wave.open(os.path.join(out_dir, name), 'wb') as out:
+            out.setnchannels(channels)
+            out.setsampwidth(2)
+            out.setframerate(sample_rate)
+            out.writeframes(chunk.tobytes())
+
+    write('full.wav', samples)
+    segments = []
+    per_segment = segment_seconds * sample_rate * channels
+    for i, offset in enumerate(range(0, len(samples), per_segment)):
+        chunk = samples[offset:offset + per_segment]
+        name = f'seg_{i:04d}.wav'
+        write(name, chunk)
+        segments.append({
+            'file': name,
+            'start': round(offset / channels / sample_rate, 3),
+            'duration': round(len(chunk) / channels / sample_rate, 3),
+        })
+    return {
+        'tool': 'wave',
+        'format': 'wav',
+        'bitrate': None,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'duration': round(frame_count / sample_rate, 3),
+        'file': 'full.wav',
+        'segments': segments,
+        'waveform': write_peaks(out_dir, samples[::channels], buckets, sample_rate),
+    }
+
+
+def process_audio(source: str, out_dir: str, segment_seconds: int = 10, bitrate: str = '64k',
+                  buckets: int = 1000, ffmpeg: str = 'ffmpeg') -> dict:
+    """Transcode/normalize `source`, segment it and compute peaks into `out_dir`; returns the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    ffmpeg_path = shutil.which(ffmpeg)
+    ffprobe_path = shutil.which('ffprobe')
+    if ffmpeg_path and ffprobe_path:
+        return process_with_ffmpeg(
+            source, out_dir, segment_seconds, bitrate, buckets, ffmpeg_path, ffprobe_path,
+        )
+    if source.lower().endswith('.wav'):
+        return process_wav(source, out_dir, segment_seconds, buckets)
+    raise AudioProcessingError('ffmpeg/ffprobe are required to process non-WAV audio')
@@ -0,0 +1,144 @@
+import hashlib
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+# Serialized test content changes only when authors edit it, so entries are
+# keyed by the test's version_id/updated_at and never need explicit deletes.
+CONTENT_CACHE_TIMEOUT = getattr(settings, 'LISTENING_CONTENT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _test_fingerprint(test):
+    version = hashlib.md5(test.version_id.encode()).hexdigest()[:8]
+    stamp = test.updated_at.timestamp() if test.updated_at else 0
+    return f'{test.pk}:{version}:{stamp}'
+
+
+def content_cache_key(test, hide_correct: bool) -> str:
+    mode = 'exam' if hide_correct else 'practice'
+    return f'listening:test-content:{_test_fingerprint(test)}:{mode}'
+
+
+def answer_key_cache_key(test) -> str:
+    return f'listening:answer-key:{_test_fingerprint(test)}'
+
+
+def get_test_content(test, hide_correct: bool) -> list:
+    """Return the serialized items of a test, building and caching them on a miss."""
+    key = content_cache_key(test, hide_correct)
+    items = cache.get(key)
+    if items is None:
+        items = build_test_content(test, hide_correct)
+        cache.set(key, items, CONTENT_CACHE_TIMEOUT)
+    return items
+
+
+async def aget_test_content(test, hide_correct: bool) -> list:
+    key = content_cache_key(test, hide_correct)
+    items = await cache.aget(key)
+    if items is None:
+        items = await sync_to_async(build_test_content)(test, hide_correct)
+        await cache.aset(key, items, CONTENT_CACHE_TIMEOUT)
+    return items
+
+
+def build_test_content(test, hide_correct: bool) -> list:
+    from .serializers import ListeningItemSerializer
+
+    queryset = test.items.prefetch_related('questions__options').order_by('order')
+    items = ListeningItemSerializer(
+        queryset, many=True, context={'hide_correct': hide_correct}
+    ).data
+    return [dict(item) for item in items]
+
+
+class AnswerKeyEntry(NamedTuple):
+    item_id: int
+    question_type: str
+    score_weight: int
+    correct_option_id: int
+    explanation: str
+    option_ids: frozenset
+
+
+# test_id -> (fingerprint, index); avoids even a cache round-trip per answer.
+_answer_keys = {}
+
+
+def build_answer_key(test) -> dict:
+    from .models import Question, ChoiceOption
+
+    options = {}
+    correct = {}
+    rows = ChoiceOption.objects.filter(question__item__test=test).values_list(
+        'id', 'question_id', 'is_correct'
+    )
+    for option_id, question_id, is_correct in rows:
+        options.setdefault(question_id, set()).add(option_id)
+        if is_correct and question_id not in correct:
+            correct[question_id] = option_id
+    questions = Question.objects.filter(item__test=test).values_list(
+        'id', 'item_id', 'question_type', 'score_weight', 'explanation'
+    )
+    return {
+        question_id: AnswerKeyEntry(
+            item_id=item_id,
+            question_type=question_type,
+            score_weight=score_weight,
+            correct_option_id=correct.get(question_id),
+            explanation=explanation,
+            option_ids=frozenset(options.get(question_id, ())),
+        )
+        for question_id, item_id, question_type, score_weight, explanation in questions
+    }
+
+
+def get_answer_key(test) -> dict:
+    """Return question_id -> AnswerKeyEntry for a test, from process memory when current."""
+    fingerprint = _test_fingerprint(test)
+    memo = _answer_keys.get(test.pk)
+    if memo is not None and memo[0] == fingerprint:
+        return memo[1]
+    key = answer_key_cache_key(test)
+    index = cache.get(key)
+    if index is None:
+        index = build_answer_key(test)
+        cache.set(key, index, CONTENT_CACHE_TIMEOUT)
+    _answer_keys[test.pk] = (fingerprint, index)
+    return index
+
+
+async def aget_answer_key(test) -> dict:
+    fingerprint = _test_fingerprint(test)
+    memo = _answer_keys.get(test.pk)
+    if memo is not None and memo[0] == fingerprint:
+        return memo[1]
+    key = answer_key_cache_key(test)
+    index = await cache.aget(key)
+    if index is None:
+        index = await sync_to_async(build_answer_key)(test)
+        await cache.aset(key, index, CONTENT_CACHE_TIMEOUT)
+    _answer_keys[test.pk] = (fingerprint, index)
+    return index
+
+
+# ScaleConversion rows are never edited (re-equating adds a new row and repoints the
+# tests), so their tables are kept per process by id.
+_conversions = {}
+
+
+def get_conversion_tables(test) -> dict:
+    """{'total': bytes, '<question_type>': bytes} of the test's current scale conversion, or None."""
+    conversion_id = test.scale_conversion_id
+    if conversion_id is None:
+        return None
+    tables = _conversions.get(conversion_id)
+    if tables is None:
+        from .models import ScaleConversion
+
+        row = ScaleConversion.objects.only('tables').get(pk=conversion_id)
+        tables = {name: bytes(values) for name, values in row.tables.items()}
+        _conversions[conversion_id] = tables
+    return tables
@@ -0,0 +1,98 @@
+"""
+Realtime session channel: a server-sent event stream that pushes the session
+clock, plus a POST side channel that takes batches of answers, anti-cheat events
+and heartbeats in a single request.
+
+Stream (GET sessions/<pk>/channel/, text/event-stream):
+
+    event: time       {"elapsed": 75, "remaining": 1725, "deadline": "...", "server_time": "..."}
+    event: finished   {"reason": "time_up"}    the deadline passed; the session has been scored
+
+Side channel (POST sessions/<pk>/channel/):
+
+    {"messages": [{"type": "answer", "question_id": 1, "option_id": 2, "response_time_ms": 900},
+                  {"type": "event", "event_type": "focus_loss", "count": 1},
+                  {"type": "heartbeat"}]}
+    -> {"results": [one entry per message], "time": {...}}
+
+Between ticks the stream does no database work: timing comes from the session's
+start and its test's limit, read once. The stream is served under ASGI only, where
+an open stream costs a sleeping coroutine; a sync worker would be held for as long
+as it is open, so under WSGI the GET answers 204 (EventSource then stops
+reconnecting) and the client keeps its clock with POSTed heartbeats instead.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .clock import TIME_GRACE_SECONDS, SessionTimeUp, deadline, is_expired, time_status
+from .models import ListeningSession
+from .services import ListeningService
+
+CHANNEL_TICK_SECONDS = getattr(settings, 'LISTENING_CHANNEL_TICK_SECONDS', 5)
+# Streams are closed after this long; EventSource reconnects on its own.
+CHANNEL_MAX_SECONDS = getattr(settings, 'LISTENING_CHANNEL_MAX_SECONDS', 15 * 60)
+
+
+def sse(event: str, data: dict) -> str:
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def _next_tick(session, now) -> float:
+    """Seconds to sleep: one tick, or less when the deadline (plus grace) comes sooner."""
+    end = deadline(session)
+    if end is None:
+        return CHANNEL_TICK_SECONDS
+    until_expiry = (end - now).total_seconds() + TIME_GRACE_SECONDS + 0.1
+    return max(0.1, min(CHANNEL_TICK_SECONDS, until_expiry))
+
+
+def _expire(session) -> dict:
+    try:
+        ListeningService.enforce_deadline(session)
+    except SessionTimeUp:
+        pass
+    return {'reason': 'time_up'}
+
+
+async def aclock_events(session):
+    yield 'retry: 3000\n\n'
+    opened = time.monotonic()
+    while time.monotonic() - opened < CHANNEL_MAX_SECONDS:
+        now = timezone.now()
+        if is_expired(session, now):
+            yield sse('finished', await sync_to_async(_expire)(session))
+            return
+        yield sse('time', time_status(session, now))
+        await asyncio.sleep(_next_tick(session, now))
+
+
+def handle_messages(session: ListeningSession, messages: list) -> list:
+    """Apply a batch of channel messages; returns one result per message, in order."""
+    results = [None] * len(messages)
+    answers = []
+    for i, message in enumerate(messages):
+        kind = message['type']
+        if kind == 'event':
+            ListeningService.log_event(
+                session.id, message['event_type'], message.get('count', 1), message.get('extra_data'),
+            )
+            results[i] = {'type': 'event', 'status': 'logged'}
+        elif kind == 'heartbeat':
+            # Without a stream (WSGI) heartbeats are how a client learns its time is up.
+            if session.status == 'active' and is_expired(session):
+                _expire(session)
+                results[i] = {'type': 'heartbeat', 'status': 'time_up'}
+            else:
+                results[i] = {'type': 'heartbeat', 'status': 'ok'}
+        else:
+            answers.append((i, message))
+    if answers:
+        saved = ListeningService.submit_answers(session.id, [message for _, message in answers])
+        for (i, _), result in zip(answers, saved):
+            results[i] = {'type': 'answer', **result}
+    return results
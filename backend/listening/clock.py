@@ -0,0 +1,42 @@
+"""
+Server-side session clock. Exam sessions of a test with time_limit_seconds end at
+start_time + limit; answers arriving later than that (plus a short grace period for
+network latency) are refused, and the session is finished and scored.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+TIME_GRACE_SECONDS = getattr(settings, 'LISTENING_TIME_GRACE_SECONDS', 5)
+
+
+class SessionTimeUp(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Time limit reached; the session has been finished.'
+    default_code = 'time_up'
+
+
+def deadline(session):
+    limit = session.test.time_limit_seconds
+    if session.mode != 'exam' or not limit:
+        return None
+    return session.start_time + timedelta(seconds=limit)
+
+
+def is_expired(session, now=None) -> bool:
+    end = deadline(session)
+    return end is not None and (now or timezone.now()) > end + timedelta(seconds=TIME_GRACE_SECONDS)
+
+
+def time_status(session, now=None) -> dict:
+    now = now or timezone.now()
+    end = deadline(session)
+    return {
+        'server_time': now.isoformat(),
+        'elapsed': max(0, int((now - session.start_time).total_seconds())),
+        'remaining': max(0, int((end - now).total_seconds())) if end else None,
+        'deadline': end.isoformat() if end else None,
+    }
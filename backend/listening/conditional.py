@@ -0,0 +1,63 @@
+"""
+Conditional GET for the read-mostly JSON endpoints (tests list, item detail,
+score report).
+
+Each view computes an ETag from a cheap query (version_id/updated_at of the
+tests involved, or the report id) and calls conditional_response(), which answers
+If-None-Match with 304 before anything is serialized. On a 200 the serialized
+data is looked up in the configured cache under the ETag, so entries never go
+stale and need no deletes; LISTENING_RESPONSE_CACHE_TIMEOUT = 0 turns that off.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotModified
+from rest_framework.response import Response
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'LISTENING_RESPONSE_CACHE_TIMEOUT', 60 * 60)
+# Shared caches (CDN, reverse proxy) may reuse public responses for this long
+# before revalidating; private ones are always revalidated.
+PUBLIC_MAX_AGE = getattr(settings, 'LISTENING_PUBLIC_MAX_AGE', 60)
+PUBLIC_CACHE_CONTROL = f'public, max-age={PUBLIC_MAX_AGE}'
+PRIVATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts) -> str:
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return '"%s"' % hashlib.md5(text.encode()).hexdigest()
+
+
+def etag_matches(request, etag: str) -> bool:
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+def conditional_response(request, key: str, version, build, cache_control: str = PUBLIC_CACHE_CONTROL):
+    """
+    Response for data identified by `key` (e.g. 'item:5') at `version`; `build()`
+    returns the serialized data and runs only when neither the client nor the
+    server cache has it.
+    """
+    # Browsable API and JSON are different representations of the same URL.
+    etag = make_etag(key, version, request.accepted_renderer.format)
+    headers = {'ETag': etag, 'Cache-Control': cache_control, 'Vary': 'Accept'}
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        data = None
+        cache_key = f'listening:response:{key}:{etag.strip(chr(34))}'
+        if RESPONSE_CACHE_TIMEOUT:
+            data = cache.get(cache_key)
+        if data is None:
+            data = build()
+            if RESPONSE_CACHE_TIMEOUT:
+                cache.set(cache_key, data, RESPONSE_CACHE_TIMEOUT)
+        response = Response(data)
+    for name, value in headers.items():
+        response[name] = value
+    return response
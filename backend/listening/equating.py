@@ -0,0 +1,230 @@
+"""
+Raw-to-scaled score conversion per test version (ListeningTest.version_id).
+
+equate() calibrates the form offline from its historical exam sessions:
+
+1. Answers are read into a session x question matrix (1 correct, 0 wrong, masked
+   when unanswered) for all tests sharing the version_id, questions aligned by
+   position (item order, question order).
+2. A Rasch model is fitted by joint maximum likelihood, with mean candidate ability
+   fixed at 0. Forms are taken by comparable candidates, so abilities are on a
+   common scale and a harder form gets higher item difficulties.
+3. For every weighted raw score r (0 .. sum of score_weight) the ability at which
+   the test characteristic curve sum(w_i * P_i(theta)) equals r is found by
+   bisection and mapped linearly to the scale: 0-30 for the total, 0-10 for each
+   question-type subscore (from that type's items alone).
+
+The tables are stored as a new ScaleConversion and the version's tests are pointed
+at it; scoring is then a lookup by points earned (ScoringEngine.score). Existing
+reports are brought up to date with rescore(), outside any request path.
+"""
+import logging
+
+import numpy as np
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .item_analysis import answer_matrix
+from .models import ListeningTest, Question, ScaleConversion, ScoreReport, UserAnswer
+from .services import ScoringEngine
+from .sqlite import write_transaction
+
+logger = logging.getLogger(__name__)
+
+THETA_BOUND = 6.0
+# (mean, sd) of the scale in ability units: +-3 sd spans the range.
+TOTAL_SCALE = (15.0, 5.0)
+SUBSCORE_SCALE = (5.0, 10 / 6)
+SUBSCORE_MAX = 10
+
+
+def form_questions(test) -> list:
+    """(id, question_type, score_weight) of a test's questions in form position order."""
+    return list(
+        Question.objects.filter(item__test=test)
+        .order_by('item__order', 'item_id', 'order', 'id')
+        .values_list('id', 'question_type', 'score_weight')
+    )
+
+
+def response_matrix(tests: list, layout: list, include_practice: bool, max_sessions: int):
+    """
+    (correct, answered) session x position matrices from the most recent finished
+    sessions of `tests`, whose questions are `layout[i]` (lists of ids in position order).
+    """
+    blocks = []
+    remaining = max_sessions
+    for test, question_ids in zip(tests, layout):
+        # Adaptive sessions see items picked by ability, not the form's fixed layout.
+        sessions = test.sessions.filter(status='finished').exclude(mode='adaptive')
+        if not include_practice:
+            sessions = sessions.filter(mode='exam')
+        session_ids = np.array(
+            sorted(sessions.order_by('-id').values_list('id', flat=True)[:remaining]), dtype=np.int64,
+        )
+        if not len(session_ids):
+            continue
+        remaining -= len(session_ids)
+        answers = answer_matrix(UserAnswer.objects.filter(session_id__in=sessions.filter(
+            id__gte=session_ids[0], id__lte=session_ids[-1],
+        )))
+        answers = answers[np.isin(answers[:, 0], session_ids)]
+        order = np.argsort(question_ids)
+        position = order[np.searchsorted(np.asarray(question_ids)[order], answers[:, 1])]
+        rows = np.searchsorted(session_ids, answers[:, 0])
+        correct = np.zeros((len(session_ids), len(question_ids)))
+        answered = np.zeros_like(correct)
+        answered[rows, position] = 1
+        correct[rows, position] = answers[:, 3] == 1
+        blocks.append((correct, answered))
+        if remaining <= 0:
+            break
+    if not blocks:
+        return np.zeros((0, len(layout[0]))), np.zeros((0, len(layout[0])))
+    return np.vstack([b[0] for b in blocks]), np.vstack([b[1] for b in blocks])
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def fit_rasch(correct: np.ndarray, answered: np.ndarray, iterations: int = 100, tol: float = 1e-4) -> np.ndarray:
+    """Item difficulties by joint maximum likelihood, mean person ability fixed at 0."""
+    score = (correct * answered).sum(1)
+    count = answered.sum(1)
+    # Zero and perfect scores carry no information about difficulty.
+    keep = (count > 0) & (score > 0) & (score < count)
+    x, m = correct[keep], answered[keep]
+    n_items = x.shape[1]
+    p_item = (x.sum(0) + 0.5) / (m.sum(0) + 1)
+    b = np.log((1 - p_item) / p_item)
+    theta = np.log(score[keep] / (count[keep] - score[keep]))
+    for _ in range(iterations):
+        p = sigmoid(theta[:, None] - b[None, :]) * m
+        info = p * (1 - p) * m
+        theta += np.clip((x * m - p).sum(1) / np.maximum(info.sum(1), 1e-9), -1, 1)
+        theta -= theta.mean()
+        p = sigmoid(theta[:, None] - b[None, :]) * m
+        info = p * (1 - p) * m
+        step = np.clip((p - x * m).sum(0) / np.maximum(info.sum(0), 1e-9), -1, 1)
+        b = np.clip(b + step, -THETA_BOUND, THETA_BOUND)
+        if np.abs(step).max() < tol:
+            break
+    # Standard JMLE bias correction.
+    return b * (n_items - 1) / n_items if n_items > 1 else b
+
+
+def conversion_table(b: np.ndarray, weights: np.ndarray, scale: tuple, top: int) -> list:
+    """Scaled score for each weighted raw score 0..sum(weights), by inverting the test characteristic curve."""
+    raw = np.arange(int(weights.sum()) + 1, dtype=float)
+    lo = np.full(len(raw), -THETA_BOUND)
+    hi = np.full(len(raw), THETA_BOUND)
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        below = (weights * sigmoid(mid[:, None] - b[None, :])).sum(1) < raw
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    theta = (lo + hi) / 2
+    mean, sd = scale
+    return np.clip(np.rint(mean + sd * theta), 0, top).astype(int).tolist()
+
+
+def equate(version_id: str, min_sessions: int = 200, include_practice: bool = False,
+           max_sessions: int = 20000):
+    """Calibrate a version and point its tests at the new ScaleConversion; None when there is too little data."""
+    tests = list(ListeningTest.objects.filter(version_id=version_id).order_by('id'))
+    if not version_id or not tests:
+        return None
+    forms = [form_questions(test) for test in tests]
+    reference = [(t, w) for _, t, w in forms[0]]
+    matching = [(test, form) for test, form in zip(tests, forms) if [(t, w) for _, t, w in form] == reference]
+    if len(matching) < len(tests):
+        logger.warning('Version %s: %d test(s) with a different layout skipped', version_id, len(tests) - len(matching))
+    if not reference:
+        return None
+    correct, answered = response_matrix(
+        [t for t, _ in matching], [[q for q, _, _ in form] for _, form in matching],
+        include_practice, max_sessions,
+    )
+    if len(correct) < min_sessions:
+        return None
+    b = fit_rasch(correct, answered)
+    types = np.array([t for t, _ in reference])
+    weights = np.array([w for _, w in reference], dtype=float)
+    tables = {'total': conversion_table(b, weights, TOTAL_SCALE, ScoringEngine.MAX_SCORE)}
+    for question_type in sorted(set(types)):
+        mine = types == question_type
+        tables[question_type] = conversion_table(b[mine], weights[mine], SUBSCORE_SCALE, SUBSCORE_MAX)
+    difficulties = {
+        str(question_id): round(float(b[position]), 4)
+        for _, form in matching for position, (question_id, _, _) in enumerate(form)
+    }
+    with write_transaction():
+        conversion = ScaleConversion.objects.create(
+            version_id=version_id, tables=tables, difficulties=difficulties, sessions=len(correct),
+        )
+        ListeningTest.objects.filter(pk__in=[t.pk for t, _ in matching]).update(scale_conversion=conversion)
+    return conversion
+
+
+def rescore(version_id: str = None, chunk_size: int = 2000) -> int:
+    """
+    Recompute reports not scored with their test's current conversion, a chunk of
+    sessions per aggregate query; returns how many reports changed.
+    """
+    tests = ListeningTest.objects.filter(scale_conversion__isnull=False)
+    if version_id:
+        tests = tests.filter(version_id=version_id)
+    correct = Q(is_correct=True)
+    updated = 0
+    for test in tests:
+        tables = {name: bytes(values) for name, values in test.scale_conversion.tables.items()}
+        stale = (
+            ScoreReport.objects.filter(session__test=test)
+            .exclude(scale_conversion_id=test.scale_conversion_id)
+            # Adaptive reports are ability estimates, not conversions of a raw score.
+            .exclude(session__mode='adaptive')
+            .select_related('session__test').order_by('id')
+        )
+        after = 0
+        while True:
+            reports = list(stale.filter(id__gt=after)[:chunk_size])
+            if not reports:
+                break
+            after = reports[-1].id
+            by_session = {r.session_id: {} for r in reports}
+            rows = (
+                UserAnswer.objects.filter(session_id__in=stale.filter(id__gte=reports[0].id, id__lte=after).values('session_id'))
+                .values('session_id', 'question__question_type')
+                .annotate(
+                    total=Count('id'),
+                    correct=Count('id', filter=correct),
+                    weighted_total=Sum('question__score_weight'),
+                    weighted_correct=Sum('question__score_weight', filter=correct),
+                )
+                .order_by()
+            )
+            for row in rows:
+                if row['session_id'] in by_session:
+                    by_session[row['session_id']][row['question__question_type']] = {
+                        'correct': row['correct'],
+                        'total': row['total'],
+                        'weighted_correct': row['weighted_correct'] or 0,
+                        'weighted_total': row['weighted_total'] or 0,
+                    }
+            for report in reports:
+                by_type = by_session[report.session_id]
+                if ScoringEngine.COUNT_UNANSWERED:
+                    ScoringEngine.add_unanswered(report.session, by_type)
+                for field, value in ScoringEngine.score(by_type, tables).items():
+                    setattr(report, field, value)
+                report.scale_conversion_id = test.scale_conversion_id
+            with write_transaction():
+                ScoreReport.objects.bulk_update(reports, [
+                    'total_score', 'main_idea', 'detail', 'inference', 'organization', 'pragmatic',
+                    'scale_conversion',
+                ])
+                # Item analysis has counted these reports under their old totals.
+                ListeningTest.objects.filter(pk=test.pk).update(scores_rescored_at=timezone.now())
+            updated += len(reports)
+    return updated
@@ -0,0 +1,294 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import AntiCheatEvent
+
+logger = logging.getLogger(__name__)
+
+
+def write_events(events: list) -> int:
+    """bulk_create `events`; if that fails, row by row, so one bad row does not lose the batch."""
+    if not events:
+        return 0
+    try:
+        # A savepoint, so a failure inside an outer transaction leaves it usable for the retries.
+        with transaction.atomic():
+            AntiCheatEvent.objects.bulk_create(events)
+    except Exception:
+        logger.exception('Bulk write of %d anti-cheat events failed; writing them one by one', len(events))
+    else:
+        return len(events)
+    written = 0
+    for event in events:
+        event.pk = None
+        try:
+            with transaction.atomic():
+                event.save(force_insert=True)
+        except Exception:
+            logger.exception('Dropped anti-cheat event %s of session %s', event.event_type, event.session_id)
+        else:
+            written += 1
+    return written
+
+
+def coalesce(events, coalesce_seconds: float) -> list:
+    """
+    AntiCheatEvent rows for (session_id, event_type, count, extra_data, occurred_at)
+    tuples in arrival order, merged as EventBuffer.add merges them.
+    """
+    rows = []
+    open_rows = {}
+    for session_id, event_type, count, extra_data, occurred_at in events:
+        row = open_rows.get((session_id, event_type))
+        if (row is not None and row.extra_data == extra_data
+                and (occurred_at - row.occurred_at).total_seconds() <= coalesce_seconds):
+            row.count += count
+            continue
+        row = open_rows[(session_id, event_type)] = AntiCheatEvent(
+            session_id=session_id,
+            event_type=event_type,
+            count=count,
+            extra_data=extra_data,
+            occurred_at=occurred_at,
+        )
+        rows.append(row)
+    return rows
+
+
+class EventBuffer:
+    """
+    Write-behind buffer for AntiCheatEvent rows.
+
+    Events of the same type and extra_data for the same session that arrive within
+    `coalesce_seconds` of the first one are merged into a single row by adding up
+    `count`. Rows are written with one bulk_create once `max_size` rows are
+    pending or `flush_seconds` after the first buffered event (see write_events).
+
+    The buffer lives in this process, so finishing a session flushes that session
+    explicitly. That only sees every event of the session when one process serves
+    the app; with several gunicorn workers use SharedEventBuffer, or the buffer is
+    turned off (check_workers).
+    """
+    shared = False
+
+    def __init__(self, max_size: int = 200, flush_seconds: float = 2.0, coalesce_seconds: float = 2.0,
+                 enabled: bool = True):
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._open = {}
+        self._closed = []
+        self._timer = None
+
+    def add(self, session_id: int, event_type: str, count: int = 1, extra_data: dict = None,
+            flush: bool = True) -> bool:
+        """Buffer an event; returns True when the buffer is full (and, unless `flush` is False, writes it)."""
+        now = timezone.now()
+        with self._lock:
+            key = (session_id, event_type)
+            event = self._open.get(key)
+            if (event is not None and event.extra_data == (extra_data or {})
+                    and (now - event.occurred_at).total_seconds() <= self.coalesce_seconds):
+                event.count += count
+            else:
+                if event is not None:
+                    self._closed.append(event)
+                self._open[key] = AntiCheatEvent(
+                    session_id=session_id,
+                    event_type=event_type,
+                    count=count,
+                    extra_data=extra_data or {},
+                    occurred_at=now,
+                )
+            full = len(self._open) + len(self._closed) >= self.max_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full and flush:
+            self.flush()
+        return full
+
+    def flush(self, session_id: int = None) -> int:
+        """Write pending rows (only those of `session_id` when given); returns rows written."""
+        with self._lock:
+            if session_id is None:
+                events = self._closed + list(self._open.values())
+                self._closed = []
+                self._open = {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            else:
+                events = [e for e in self._closed if e.session_id == session_id]
+                events += [e for key, e in self._open.items() if key[0] == session_id]
+                self._closed = [e for e in self._closed if e.session_id != session_id]
+                self._open = {key: e for key, e in self._open.items() if key[0] != session_id}
+        return write_events(events)
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+class SharedEventBuffer:
+    """
+    Write-behind buffer kept in a cache every worker shares (Redis), so whichever
+    worker finishes a session writes all of its events.
+
+    Each event takes the next slot of its session (cache.incr on
+    "<session>:last"); a drain reads the slots after "<session>:done", writes them
+    coalesced as EventBuffer does, and moves "done" on. A session is drained when
+    it finishes, when `max_size` of its events are pending, and `flush_seconds`
+    after this worker buffered its first event. Drains of one session take turns
+    through a lock key (cache.add).
+    """
+    shared = True
+    LOCK_SECONDS = 10
+    PREFIX = 'listening:events'
+
+    def __init__(self, alias: str = 'default', max_size: int = 200, flush_seconds: float = 2.0,
+                 coalesce_seconds: float = 2.0, enabled: bool = True, timeout: int = 24 * 3600):
+        self.alias = alias
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self.enabled = enabled
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # Sessions this worker buffered events for, drained by its timer.
+        self._sessions = set()
+        self._timer = None
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, session_id: int, name) -> str:
+        return f'{self.PREFIX}:{session_id}:{name}'
+
+    def add(self, session_id: int, event_type: str, count: int = 1, extra_data: dict = None,
+            flush: bool = True) -> bool:
+        """Buffer an event; returns True when its session has `max_size` pending (and, unless `flush` is False, drains it)."""
+        cache = self.cache
+        counter = self._key(session_id, 'last')
+        cache.add(counter, 0, self.timeout)
+        slot = cache.incr(counter)
+        cache.set(
+            self._key(session_id, slot), (event_type, count, extra_data or {}, timezone.now()), self.timeout,
+        )
+        full = slot - (cache.get(self._key(session_id, 'done')) or 0) >= self.max_size
+        with self._lock:
+            self._sessions.add(session_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full and flush:
+            self.flush(session_id)
+        return full
+
+    def flush(self, session_id: int = None) -> int:
+        """
+        Drain `session_id` (waiting for a drain in progress elsewhere), or every
+        session this worker buffered for; returns rows written.
+        """
+        if session_id is not None:
+            with self._lock:
+                self._sessions.discard(session_id)
+            return self._drain(session_id, final=True)
+        with self._lock:
+            sessions, self._sessions = self._sessions, set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return sum(self._drain(s) for s in sessions)
+
+    def _drain(self, session_id: int, final: bool = False) -> int:
+        cache = self.cache
+        lock = self._key(session_id, 'lock')
+        deadline = time.monotonic() + (self.LOCK_SECONDS if final else 0)
+        while not cache.add(lock, 1, self.LOCK_SECONDS):
+            if time.monotonic() >= deadline:
+                if not final:
+                    # Another worker is draining it; look again on the next flush.
+                    with self._lock:
+                        self._sessions.add(session_id)
+                return 0
+            time.sleep(0.05)
+        try:
+            done = cache.get(self._key(session_id, 'done')) or 0
+            last = cache.get(self._key(session_id, 'last')) or 0
+            slots = list(range(done + 1, last + 1))
+            if not slots:
+                return 0
+            values = cache.get_many([self._key(session_id, s) for s in slots])
+            if final and len(values) < len(slots):
+                # An add between its incr and set; give it a moment, then skip what is still missing.
+                time.sleep(0.05)
+                values = cache.get_many([self._key(session_id, s) for s in slots])
+            events = []
+            for slot in slots:
+                value = values.get(self._key(session_id, slot))
+                if value is None and not final:
+                    # Left for the next drain, in order.
+                    slots = slots[:slots.index(slot)]
+                    break
+                if value is not None:
+                    events.append((session_id, *value))
+            if not slots:
+                return 0
+            written = write_events(coalesce(events, self.coalesce_seconds))
+            cache.set(self._key(session_id, 'done'), slots[-1], self.timeout)
+            cache.delete_many([self._key(session_id, s) for s in slots])
+            return written
+        finally:
+            cache.delete(lock)
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+def check_workers(workers: int):
+    """
+    Called in each gunicorn worker (gunicorn.conf.py): with several workers a
+    per-process buffer would hide events from finishes handled elsewhere, so it
+    is turned off; a shared one stays on.
+    """
+    if workers > 1 and event_buffer.enabled and not event_buffer.shared:
+        event_buffer.flush()
+        event_buffer.enabled = False
+        logger.warning(
+            '%d workers without LISTENING_EVENT_BUFFER_SHARED: anti-cheat events are written unbuffered', workers,
+        )
+
+
+_options = {
+    'max_size': getattr(settings, 'LISTENING_EVENT_BUFFER_SIZE', 200),
+    'flush_seconds': getattr(settings, 'LISTENING_EVENT_FLUSH_SECONDS', 2.0),
+    'coalesce_seconds': getattr(settings, 'LISTENING_EVENT_COALESCE_SECONDS', 2.0),
+    'enabled': getattr(settings, 'LISTENING_EVENT_BUFFER', True),
+}
+if getattr(settings, 'LISTENING_EVENT_BUFFER_SHARED', False):
+    event_buffer = SharedEventBuffer(**_options)
+else:
+    event_buffer = EventBuffer(**_options)
+atexit.register(event_buffer.flush)
@@ -0,0 +1,111 @@
+"""
+Constant-memory export of session results.
+
+Rows are read in keyset pages (`id > last_id ORDER BY id LIMIT chunk_size`) as
+plain tuples and rendered incrementally, so exports of any size stream without
+holding a queryset in memory. Formats:
+
+- csv: header line, then one line per row
+- ndjson: one JSON object per row
+- columnar: one JSON object per chunk, {"columns": [...], "rows": n, "data": {column: [values]}},
+  which loads directly into column-oriented tools (e.g. pandas.DataFrame(chunk["data"]))
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ListeningSession, UserAnswer, AntiCheatEvent, ScoreReport
+
+DATASETS = {
+    'sessions': (
+        ListeningSession, 'start_time',
+        ['id', 'user_id', 'test_id', 'mode', 'status', 'start_time', 'end_time'],
+    ),
+    'answers': (
+        UserAnswer, 'created_at',
+        ['id', 'session_id', 'question_id', 'selected_option_id', 'is_correct',
+         'response_time_ms', 'created_at'],
+    ),
+    'events': (
+        AntiCheatEvent, 'occurred_at',
+        ['id', 'session_id', 'event_type', 'count', 'occurred_at', 'extra_data'],
+    ),
+    'reports': (
+        ScoreReport, 'created_at',
+        ['id', 'session_id', 'total_score', 'main_idea', 'detail', 'inference',
+         'organization', 'pragmatic', 'created_at'],
+    ),
+}
+FORMATS = ['csv', 'ndjson', 'columnar']
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'columnar': 'application/x-ndjson',
+}
+
+
+def parse_since(value: str):
+    """Parse an ISO date or datetime as an aware datetime; None if invalid."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def iter_chunks(dataset: str, since=None, after_id: int = 0, chunk_size: int = 5000):
+    """Yield lists of row tuples in id order, one keyset page at a time."""
+    model, since_field, columns = DATASETS[dataset]
+    queryset = model.objects.order_by('id')
+    if since is not None:
+        queryset = queryset.filter(**{f'{since_field}__gte': since})
+    last_id = after_id
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list(*columns)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def render(dataset: str, fmt: str, chunks):
+    """Yield text fragments of `chunks` in the requested format."""
+    columns = DATASETS[dataset][2]
+    if fmt == 'csv':
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        yield buf.getvalue()
+        for rows in chunks:
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(
+                [json.dumps(v) if isinstance(v, (dict, list)) else _plain(v) for v in row]
+                for row in rows
+            )
+            yield buf.getvalue()
+    elif fmt == 'ndjson':
+        for rows in chunks:
+            yield ''.join(
+                json.dumps({c: _plain(v) for c, v in zip(columns, row)}) + '\n' for row in rows
+            )
+    elif fmt == 'columnar':
+        for rows in chunks:
+            data = {c: [_plain(v) for v in col] for c, col in zip(columns, zip(*rows))}
+            yield json.dumps({'columns': columns, 'rows': len(rows), 'data': data}) + '\n'
+    else:
+        raise ValueError(f'Unknown export format: {fmt}')
@@ -0,0 +1,204 @@
+"""
+Bulk loader for listening tests.
+
+Each test is one JSON object; a file holds either one object per line (NDJSON)
+or a single top-level array of objects. Both are read incrementally, so the
+file is never held in memory as a whole.
+
+    {
+      "title": "REAL 2",
+      "version_id": "real-2-v1",
+      "is_active": true,
+      "time_limit_seconds": 2100,
+      "items": [
+        {
+          "item_type": "lecture", "difficulty": "medium", "topic_tag": "Biology",
+          "transcript": "...", "audio_url": "", "thumbnail_url": "", "order": 1,
+          "questions": [
+            {
+              "text": "...", "question_type": "detail", "score_weight": 1,
+              "order": 1, "explanation": "",
+              "options": [{"label": "A", "text": "...", "is_correct": true}, ...]
+            }
+          ]
+        }
+      ]
+    }
+
+Only "title", question "text" and option "label"/"text" are required; everything else falls back to the model defaults.
+"item_type", "difficulty" and "question_type" must be one of the model's choices.
+"""
+import json
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from .models import (
+    DIFFICULTY_CHOICES,
+    ITEM_TYPE_CHOICES,
+    QUESTION_TYPE_CHOICES,
+    ListeningTest,
+    ListeningItem,
+    Question,
+    ChoiceOption,
+)
+from .signals import refresh_tests, suspend_content_updates
+
+
+class ContentImportError(ValueError):
+    pass
+
+
+def choice(data: dict, field: str, choices: list, default: str, where: str) -> str:
+    value = data.get(field, default)
+    allowed = [v for v, _ in choices]
+    if value not in allowed:
+        raise ContentImportError(f'{where}: {field} {value!r} is not one of {", ".join(allowed)}')
+    return value
+
+
+@dataclass
+class ImportResult:
+    action: str
+    test: ListeningTest = None
+    rows: int = 0
+    detail: str = ''
+
+
+def iter_ndjson(fp):
+    for line_no, line in enumerate(fp, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ContentImportError(f'line {line_no}: {exc}') from exc
+
+
+def iter_json_array(fp, chunk_size: int = 1 << 16):
+    """Yield the elements of a top-level JSON array, decoding one element at a time."""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        # Skip whitespace and separators between elements.
+        while pos < len(buf) and buf[pos] in ' \t\r\n,' + ('' if started else '['):
+            if buf[pos] == '[':
+                started = True
+            pos += 1
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        if pos < len(buf) and not started:
+            raise ContentImportError('expected a JSON array of tests')
+        if pos < len(buf):
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ContentImportError('truncated or invalid JSON array')
+            else:
+                yield obj
+                pos = end
+                continue
+        elif eof:
+            raise ContentImportError('unterminated JSON array')
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def detect_format(fp) -> str:
+    """Peek at the first non-blank character of a seekable file: '[' means a JSON array."""
+    start = fp.tell()
+    ch = fp.read(1)
+    while ch and ch.isspace():
+        ch = fp.read(1)
+    fp.seek(start)
+    return 'json' if ch == '[' else 'ndjson'
+
+
+def iter_tests(fp, fmt: str = 'auto'):
+    if fmt == 'auto':
+        fmt = detect_format(fp)
+    return iter_json_array(fp) if fmt == 'json' else iter_ndjson(fp)
+
+
+def import_test(data: dict, upsert: bool = True, batch_size: int = 500) -> ImportResult:
+    """Create (or replace, by version_id) one test with bulk inserts inside one transaction."""
+    if not data.get('title'):
+        raise ContentImportError('test is missing "title"')
+    version_id = data.get('version_id', '')
+    with transaction.atomic(), suspend_content_updates():
+        test = None
+        action = 'created'
+        if upsert and version_id:
+            test = ListeningTest.objects.filter(version_id=version_id).first()
+        if test is not None:
+            if test.sessions.exists():
+                return ImportResult('skipped', test, 0, 'test already has sessions; use a new version_id')
+            test.items.all().delete()
+            action = 'updated'
+        else:
+            test = ListeningTest(version_id=version_id)
+        test.title = data['title']
+        test.is_active = data.get('is_active', True)
+        test.is_archived = data.get('is_archived', False)
+        test.time_limit_seconds = data.get('time_limit_seconds')
+        test.save()
+
+        items = []
+        item_questions = []
+        for i, item_data in enumerate(data.get('items', []), start=1):
+            where = f'{test.title}: item {i}'
+            items.append(ListeningItem(
+                test=test,
+                item_type=choice(item_data, 'item_type', ITEM_TYPE_CHOICES, 'lecture', where),
+                difficulty=choice(item_data, 'difficulty', DIFFICULTY_CHOICES, 'medium', where),
+                topic_tag=item_data.get('topic_tag', ''),
+                transcript=item_data.get('transcript', ''),
+                audio_url=item_data.get('audio_url', ''),
+                thumbnail_url=item_data.get('thumbnail_url', ''),
+                order=item_data.get('order', i),
+            ))
+            item_questions.append(item_data.get('questions', []))
+        ListeningItem.objects.bulk_create(items, batch_size=batch_size)
+
+        questions = []
+        question_options = []
+        for i, (item, questions_data) in enumerate(zip(items, item_questions), start=1):
+            for j, q in enumerate(questions_data, start=1):
+                if not q.get('text'):
+                    raise ContentImportError(f'{test.title}: question without "text"')
+                questions.append(Question(
+                    item=item,
+                    text=q['text'],
+                    question_type=choice(
+                        q, 'question_type', QUESTION_TYPE_CHOICES, 'detail', f'{test.title}: item {i} question {j}',
+                    ),
+                    score_weight=q.get('score_weight', 1),
+                    order=q.get('order', j),
+                    explanation=q.get('explanation', ''),
+                ))
+                question_options.append(q.get('options', []))
+        Question.objects.bulk_create(questions, batch_size=batch_size)
+
+        options = []
+        for question, options_data in zip(questions, question_options):
+            for k, o in enumerate(options_data, start=1):
+                if not o.get('label') or 'text' not in o:
+                    raise ContentImportError(f'{test.title}: option needs "label" and "text"')
+                options.append(ChoiceOption(
+                    question=question,
+                    label=o['label'],
+                    text=o['text'],
+                    is_correct=bool(o.get('is_correct', False)),
+                    order=o.get('order', k),
+                ))
+        ChoiceOption.objects.bulk_create(options, batch_size=batch_size)
+        # bulk_create sends no signals, so recount the test explicitly.
+        refresh_tests([test.pk])
+    return ImportResult(action, test, 1 + len(items) + len(questions) + len(options))
@@ -0,0 +1,283 @@
+"""
+Classical item analysis over finished sessions, vectorized with NumPy.
+
+Per test, answers are read in chunks of sessions into session x question matrices
+(answered, correct, chosen option, response time) and reduced to count arrays:
+
+    score_n[s, q], score_correct[s, q]   responders / correct responders with total score s
+    option_counts[o]                      times each option was chosen
+    rt_hist[b, q]                         response times in RT_BIN_MS bins
+
+Every statistic is derived from these counts, and counts add up, so an incremental
+run reads only sessions whose score report is newer than the previous run's and
+adds them to the counts kept in QuestionStats.state. Tests whose reports equating
+rescored since then (ListeningTest.scores_rescored_at) are counted again from scratch,
+since their sessions were counted under the old totals:
+
+    p_value             share of responders answering correctly
+    discrimination      p(correct) in the top 27% by total score minus the bottom 27%
+    point_biserial      correlation of correctness with ScoreReport.total_score
+    option_rates        share of responders choosing each option
+    median_response_ms  from the histogram, to within RT_BIN_MS / 2
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .models import (
+    ChoiceOption, ItemAnalysisRun, ListeningSession, ListeningTest, Question, QuestionStats, UserAnswer,
+)
+from .sqlite import write_transaction
+
+RT_BIN_MS = 100
+RT_BINS = 1200  # two minutes; slower responses go in the last bin
+GROUP_FRACTION = 0.27
+# Reports created in the last minute are left for the next run, so one committed
+# just after the cutoff was taken is not skipped.
+SETTLE_SECONDS = 60
+
+
+class TestCounts:
+    """Count arrays for the questions of one test, one column per question."""
+
+    def __init__(self, test_id: int):
+        self.question_ids = np.array(
+            Question.objects.filter(item__test_id=test_id).order_by('id').values_list('id', flat=True),
+            dtype=np.int64,
+        )
+        options = list(
+            ChoiceOption.objects.filter(question__item__test_id=test_id)
+            .order_by('id').values_list('id', 'question_id')
+        )
+        self.option_ids = np.array([o for o, _ in options], dtype=np.int64)
+        self.option_column = np.searchsorted(self.question_ids, [q for _, q in options]).astype(np.int64)
+        n_q = len(self.question_ids)
+        self.score_n = np.zeros((1, n_q), dtype=np.int64)
+        self.score_correct = np.zeros((1, n_q), dtype=np.int64)
+        self.option_counts = np.zeros(len(self.option_ids), dtype=np.int64)
+        self.rt_hist = np.zeros((RT_BINS, n_q), dtype=np.int64)
+
+    def _grow(self, scores: int):
+        if scores > len(self.score_n):
+            pad = ((0, scores - len(self.score_n)), (0, 0))
+            self.score_n = np.pad(self.score_n, pad)
+            self.score_correct = np.pad(self.score_correct, pad)
+
+    def load(self, stats):
+        """Start from the counts stored by earlier runs."""
+        option_index = {int(o): i for i, o in enumerate(self.option_ids)}
+        for row in stats:
+            col = int(np.searchsorted(self.question_ids, row.question_id))
+            state = row.state or {}
+            score_n = state.get('score_n', [])
+            self._grow(len(score_n))
+            self.score_n[:len(score_n), col] = score_n
+            self.score_correct[:len(score_n), col] = state.get('score_correct', [])
+            rt_hist = state.get('rt_hist', [])
+            self.rt_hist[:len(rt_hist), col] = rt_hist
+            for option_id, count in state.get('options', {}).items():
+                if int(option_id) in option_index:
+                    self.option_counts[option_index[int(option_id)]] = count
+
+    def add(self, session_ids: np.ndarray, totals: np.ndarray, answers: np.ndarray):
+        """
+        Add a chunk: session_ids sorted, totals their total scores, answers rows of
+        (session_id, question_id, selected_option_id, is_correct, response_time_ms), NaN for NULL.
+        """
+        n_s, n_q = len(session_ids), len(self.question_ids)
+        cols = np.searchsorted(self.question_ids, answers[:, 1])
+        known = (cols < n_q) & (self.question_ids[np.minimum(cols, n_q - 1)] == answers[:, 1])
+        answers, cols = answers[known], cols[known]
+        rows = np.searchsorted(session_ids, answers[:, 0])
+
+        answered = np.zeros((n_s, n_q), dtype=np.int64)
+        answered[rows, cols] = 1
+        correct = np.zeros((n_s, n_q), dtype=np.int64)
+        correct[rows, cols] = answers[:, 3] == 1
+        option = np.full((n_s, n_q), -1, dtype=np.int64)
+        chosen = ~np.isnan(answers[:, 2])
+        option[rows[chosen], cols[chosen]] = np.searchsorted(self.option_ids, answers[chosen, 2])
+        rt = np.full((n_s, n_q), np.nan)
+        rt[rows, cols] = answers[:, 4]
+
+        # One-hot of each session's total score: (score x session) @ (session x question).
+        self._grow(int(totals.max()) + 1)
+        onehot = np.zeros((len(self.score_n), n_s), dtype=np.int64)
+        onehot[totals, np.arange(n_s)] = 1
+        self.score_n += onehot @ answered
+        self.score_correct += onehot @ correct
+
+        self.option_counts += np.bincount(option[option >= 0], minlength=len(self.option_ids))
+
+        timed = ~np.isnan(rt)
+        bins = np.minimum(rt[timed] // RT_BIN_MS, RT_BINS - 1).astype(np.int64)
+        flat = bins * n_q + np.nonzero(timed)[1]
+        self.rt_hist += np.bincount(flat, minlength=RT_BINS * n_q).reshape(RT_BINS, n_q)
+
+    def statistics(self) -> dict:
+        """All statistics as arrays over questions (NaN where undefined)."""
+        n_q = len(self.question_ids)
+        cols = np.arange(n_q)
+        score = np.arange(len(self.score_n))[:, None]
+        n = self.score_n.sum(0)
+        nc = self.score_correct.sum(0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = nc / n
+
+            sum_x = (self.score_n * score).sum(0)
+            sum_x2 = (self.score_n * score ** 2).sum(0)
+            sum_xc = (self.score_correct * score).sum(0)
+            mean = sum_x / n
+            sd = np.sqrt(np.maximum(sum_x2 / n - mean ** 2, 0))
+            mean_correct = sum_xc / nc
+            mean_wrong = (sum_x - sum_xc) / (n - nc)
+            point_biserial = (mean_correct - mean_wrong) / sd * np.sqrt(p * (1 - p))
+
+            # Lower group: scores up to the first one with >= 27% of responders at or below it;
+            # upper group: scores from the last one with >= 27% at or above it.
+            group = GROUP_FRACTION * n
+            below_n, below_c = np.cumsum(self.score_n, 0), np.cumsum(self.score_correct, 0)
+            above_n = np.cumsum(self.score_n[::-1], 0)[::-1]
+            above_c = np.cumsum(self.score_correct[::-1], 0)[::-1]
+            lower = np.argmax(below_n >= group, axis=0)
+            upper = len(self.score_n) - 1 - np.argmax((above_n >= group)[::-1], axis=0)
+            discrimination = (
+                above_c[upper, cols] / above_n[upper, cols] - below_c[lower, cols] / below_n[lower, cols]
+            )
+
+            timed = self.rt_hist.sum(0)
+            cum = np.cumsum(self.rt_hist, 0)
+            middle = np.argmax(cum >= timed / 2, axis=0)
+            in_bin = self.rt_hist[middle, cols]
+            median_rt = (middle + (timed / 2 - (cum[middle, cols] - in_bin)) / in_bin) * RT_BIN_MS
+            median_rt[timed == 0] = np.nan
+
+            option_rates = self.option_counts / n[self.option_column]
+
+        def clean(values):
+            values = values.astype(float)
+            values[~np.isfinite(values) | (n == 0)] = np.nan
+            return values
+
+        return {
+            'responses': n,
+            'p_value': clean(p),
+            'discrimination': clean(discrimination),
+            'point_biserial': clean(point_biserial),
+            'median_response_ms': clean(median_rt),
+            'option_rates': option_rates,
+        }
+
+    def to_stats(self, existing: dict) -> list:
+        """QuestionStats rows for every question with responses, reusing `existing` (question_id -> row)."""
+        stats = self.statistics()
+        last_score = len(self.score_n)
+        now = timezone.now()
+        rows = []
+        for col, question_id in enumerate(self.question_ids.tolist()):
+            if not stats['responses'][col]:
+                continue
+            mine = self.option_column == col
+            timed = np.nonzero(self.rt_hist[:, col])[0]
+            row = existing.get(question_id) or QuestionStats(question_id=question_id)
+            row.responses = int(stats['responses'][col])
+            row.updated_at = now  # bulk_update skips auto_now
+            for name in ('p_value', 'discrimination', 'point_biserial', 'median_response_ms'):
+                value = stats[name][col]
+                setattr(row, name, None if np.isnan(value) else round(float(value), 4))
+            row.option_rates = {
+                str(o): round(float(r), 4) for o, r in zip(self.option_ids[mine], stats['option_rates'][mine])
+            }
+            row.state = {
+                'score_n': self.score_n[:last_score, col].tolist(),
+                'score_correct': self.score_correct[:last_score, col].tolist(),
+                'options': {str(o): int(c) for o, c in zip(self.option_ids[mine], self.option_counts[mine])},
+                'rt_hist': self.rt_hist[:timed[-1] + 1 if len(timed) else 0, col].tolist(),
+            }
+            rows.append(row)
+        return rows
+
+
+def answer_matrix(queryset) -> np.ndarray:
+    rows = queryset.values_list(
+        'session_id', 'question_id', 'selected_option_id', 'is_correct', 'response_time_ms',
+    )
+    return np.array(list(rows), dtype=float).reshape(-1, 5)
+
+
+def run(full: bool = False, chunk_size: int = 2000, log=None) -> ItemAnalysisRun:
+    """
+    Update QuestionStats with sessions scored since the last run (all of them when
+    `full`, replacing stored counts, or for tests rescored since the last run).
+    Results and the run record are written in one transaction, so an interrupted
+    run leaves nothing half counted.
+    """
+    started = time.perf_counter()
+    through = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    last = None if full else ItemAnalysisRun.objects.first()
+    # Adaptive sessions answer items chosen by ability; they would bias p-values and
+    # discrimination, and their totals are not comparable across candidates.
+    sessions = ListeningSession.objects.filter(
+        status='finished', score_report__created_at__lte=through,
+    ).exclude(mode='adaptive')
+    new_sessions = sessions
+    recount = set()
+    if last is not None:
+        new_sessions = sessions.filter(score_report__created_at__gt=last.through)
+        recount = set(
+            ListeningTest.objects.filter(scores_rescored_at__gt=last.through).values_list('id', flat=True)
+        )
+
+    results = []
+    session_count = answer_count = 0
+    test_ids = sorted(set(new_sessions.values_list('test_id', flat=True)) | recount)
+    for test_id in test_ids:
+        counts = TestCounts(test_id)
+        if not len(counts.question_ids):
+            continue
+        existing = {} if full else {
+            s.question_id: s
+            for s in QuestionStats.objects.filter(question_id__in=counts.question_ids.tolist())
+        }
+        if test_id in recount:
+            test_sessions = sessions.filter(test_id=test_id).order_by('id')
+        else:
+            counts.load(existing.values())
+            test_sessions = new_sessions.filter(test_id=test_id).order_by('id')
+        after = 0
+        while True:
+            chunk = list(
+                test_sessions.filter(id__gt=after).values_list('id', 'score_report__total_score')[:chunk_size]
+            )
+            if not chunk:
+                break
+            after = chunk[-1][0]
+            session_ids = np.array([c[0] for c in chunk], dtype=np.int64)
+            totals = np.array([c[1] for c in chunk], dtype=np.int64)
+            answers = answer_matrix(UserAnswer.objects.filter(
+                session__in=test_sessions.filter(id__gte=chunk[0][0], id__lte=after)
+            ))
+            counts.add(session_ids, totals, answers)
+            session_count += len(chunk)
+            answer_count += len(answers)
+        results.append(counts.to_stats(existing))
+        if log:
+            log(f'test {test_id}: {len(counts.question_ids)} questions')
+
+    with write_transaction():
+        if full:
+            QuestionStats.objects.all().delete()
+        for rows in results:
+            QuestionStats.objects.bulk_create([r for r in rows if r.pk is None], batch_size=500)
+            QuestionStats.objects.bulk_update(
+                [r for r in rows if r.pk is not None],
+                ['responses', 'p_value', 'discrimination', 'point_biserial',
+                 'median_response_ms', 'option_rates', 'state', 'updated_at'],
+                batch_size=500,
+            )
+        return ItemAnalysisRun.objects.create(
+            through=through, full=full, sessions=session_count, answers=answer_count,
+            seconds=round(time.perf_counter() - started, 3),
+        )
@@ -0,0 +1,76 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ScoreReportJob
+
+logger = logging.getLogger(__name__)
+
+REPORT_WORKERS = getattr(settings, 'LISTENING_REPORT_WORKERS', 2)
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='score-report')
+    return _executor
+
+
+def enqueue_report(job_id: int):
+    """Hand a committed job to the in-process pool; process_report_jobs picks up anything left behind."""
+    _get_executor().submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id: int):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def claim_job(job_id: int) -> bool:
+    return ScoreReportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', attempts=F('attempts') + 1, updated_at=timezone.now(),
+    ) == 1
+
+
+def run_job(job_id: int) -> bool:
+    from .services import ScoringEngine
+
+    if not claim_job(job_id):
+        return False
+    try:
+        job = ScoreReportJob.objects.select_related('session__test').get(pk=job_id)
+        ScoringEngine.calculate(job.session)
+    except Exception as exc:
+        logger.exception('Score report job %s failed', job_id)
+        ScoreReportJob.objects.filter(pk=job_id).update(
+            status='failed', error=str(exc), updated_at=timezone.now(),
+        )
+        return False
+    ScoreReportJob.objects.filter(pk=job_id).update(
+        status='done', error='', updated_at=timezone.now(),
+    )
+    return True
+
+
+def requeue_stale(older_than, include_failed: bool = False) -> int:
+    """Return jobs stuck in running (e.g. worker restarted) and optionally failed ones to pending."""
+    statuses = ['running', 'failed'] if include_failed else ['running']
+    return ScoreReportJob.objects.filter(status__in=statuses, updated_at__lt=older_than).update(
+        status='pending', updated_at=timezone.now(),
+    )
+
+
+def run_pending(limit: int = None) -> int:
+    """Run queued jobs in the calling thread; returns how many produced a report."""
+    job_ids = ScoreReportJob.objects.filter(status='pending').values_list('id', flat=True)
+    if limit:
+        job_ids = job_ids[:limit]
+    return sum(run_job(job_id) for job_id in list(job_ids))
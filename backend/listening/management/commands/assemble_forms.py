@@ -0,0 +1,105 @@
+"""
+Assemble new test forms from the item bank under content constraints.
+Run: python manage.py assemble_forms --forms 3 --title "Practice Set" --version-prefix practice-set
+     [--layout conversation,lecture,conversation,lecture,lecture] [--difficulty easy=1,medium=3,hard=1]
+     [--max-per-topic 1] [--min-question-types main_idea=1,detail=3] [--questions 25]
+     [--recent 5] [--seed 1] [--active] [--dry-run]
+See listening/assembly.py for the method. Forms are created inactive unless --active;
+a form that violates a constraint is not written unless --allow-violations, and its
+items stay available to later forms. Written forms are numbered on from the highest
+existing "<prefix>-<n>" version_id, so a second run does not repeat version ids.
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from listening.assembly import (
+    QUESTION_TYPES, AssemblyError, CandidatePool, FormSpec, next_version_number, write_form,
+)
+
+
+def parse_counts(value: str) -> dict:
+    try:
+        return {name.strip(): int(count) for name, count in (part.split('=') for part in value.split(','))}
+    except ValueError as exc:
+        raise CommandError(f'expected name=count,...: {value}') from exc
+
+
+class Command(BaseCommand):
+    help = 'Assemble non-overlapping test forms from bank items and write them as new tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forms', type=int, default=1)
+        parser.add_argument('--title', default='Assembled form', help='Forms are titled "<title> <n>"')
+        parser.add_argument(
+            '--version-prefix', default='',
+            help='version_id "<prefix>-<n>", continuing existing ones (blank when omitted)',
+        )
+        parser.add_argument('--layout', help='Comma-separated item_type per stage')
+        parser.add_argument('--difficulty', help='Items per difficulty, e.g. easy=1,medium=3,hard=1')
+        parser.add_argument('--max-per-topic', type=int, default=1, help='Items sharing a topic_tag')
+        parser.add_argument('--min-question-types', help='Minimum questions per type (default 1 of each)')
+        parser.add_argument('--questions', type=int, help='Total questions per form')
+        parser.add_argument('--recent', type=int, default=5, help='Exclude items used by this many newest tests')
+        parser.add_argument('--time-limit', type=int, help='time_limit_seconds of the new tests')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--active', action='store_true', help='Create the tests active')
+        parser.add_argument('--allow-violations', action='store_true', help='Write forms missing a constraint')
+        parser.add_argument('--dry-run', action='store_true', help='Report the forms without writing them')
+
+    def handle(self, *args, **options):
+        spec = FormSpec(max_per_topic=options['max_per_topic'], questions=options['questions'])
+        if options['layout']:
+            spec.layout = [t.strip() for t in options['layout'].split(',')]
+        if options['difficulty']:
+            spec.difficulty = parse_counts(options['difficulty'])
+        if options['min_question_types']:
+            spec.min_question_types = {t: 0 for t in QUESTION_TYPES}
+            spec.min_question_types.update(parse_counts(options['min_question_types']))
+        try:
+            spec.check()
+        except AssemblyError as exc:
+            raise CommandError(str(exc)) from exc
+
+        started = time.perf_counter()
+        pool = CandidatePool.from_db(options['recent'])
+        self.stdout.write(
+            f'{int(pool.available.sum())} of {len(pool.item_ids)} bank items available '
+            f'({time.perf_counter() - started:.2f}s)'
+        )
+        rng = np.random.default_rng(options['seed'])
+        prefix = options['version_prefix']
+        first = next_version_number(prefix) if prefix else 1
+        written = 0
+        for n in range(1, options['forms'] + 1):
+            try:
+                chosen, violations = pool.assemble(spec, rng)
+            except AssemblyError as exc:
+                raise CommandError(f'Form {n}: {exc}') from exc
+            item_ids = [int(pool.item_ids[i]) for i in chosen]
+            summary = f'Form {n}: items {", ".join(map(str, item_ids))}'
+            if violations:
+                details = ', '.join(f'{name} {value}' for name, value in violations.items())
+                self.stdout.write(self.style.WARNING(f'{summary}; violations: {details}'))
+                if not options['allow_violations']:
+                    pool.release(chosen)
+                    continue
+            else:
+                self.stdout.write(summary)
+            if options['dry_run']:
+                continue
+            number = first + written
+            test = write_form(
+                item_ids,
+                title=f'{options["title"]} {number}',
+                version_id=f'{prefix}-{number}' if prefix else '',
+                is_active=options['active'],
+                time_limit_seconds=options['time_limit'],
+            )
+            written += 1
+            self.stdout.write(f'  -> test {test.pk} "{test.title}" ({test.total_items} items)')
+        note = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{note}{written} of {options["forms"]} forms written in {time.perf_counter() - started:.2f}s'
+        ))
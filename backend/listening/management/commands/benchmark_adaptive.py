@@ -0,0 +1,75 @@
+"""
+Time adaptive item selection on a synthetic bank.
+Run: python manage.py benchmark_adaptive --items 50000 --candidates 200
+Builds an in-memory ItemBank (no database) and simulates candidates of known
+ability answering with Rasch probabilities until the session stops. Reports the
+bank build time, the time per next-item decision (ability estimate + selection)
+and how close the final estimate is to the true ability.
+"""
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from listening.adaptive import MAX_ITEMS, TARGET_SE, ItemBank
+
+
+class Command(BaseCommand):
+    help = 'Benchmark in-memory adaptive item selection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000)
+        parser.add_argument('--questions-per-item', type=int, default=5)
+        parser.add_argument('--candidates', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n_items, per_item = options['items'], options['questions_per_item']
+        item_difficulty = rng.normal(0, 1.2, n_items)
+        difficulties = (item_difficulty[:, None] + rng.normal(0, 0.5, (n_items, per_item))).ravel()
+        start = time.perf_counter()
+        bank = ItemBank(
+            item_ids=np.arange(1, n_items + 1),
+            item_tests=np.zeros(n_items),
+            question_ids=np.arange(1, n_items * per_item + 1),
+            question_items=np.repeat(np.arange(n_items), per_item),
+            difficulties=difficulties,
+        )
+        build = time.perf_counter() - start
+        self.stdout.write(f'Bank of {n_items} items / {len(difficulties)} questions built in {build:.2f}s')
+
+        step_times = []
+        errors = []
+        lengths = []
+        for c in range(options['candidates']):
+            true_theta = rng.normal()
+            answers = []
+            select_rng = random.Random(c)
+            while True:
+                t0 = time.perf_counter()
+                theta, se = bank.estimate(answers)
+                seen = bank.seen_items(answers)
+                index = None
+                if len(seen) < MAX_ITEMS and not (seen and se <= TARGET_SE):
+                    index = bank.select(theta, seen, select_rng)
+                step_times.append(time.perf_counter() - t0)
+                if index is None:
+                    break
+                for q in range(index * per_item, (index + 1) * per_item):
+                    p = 1 / (1 + np.exp(-(true_theta - difficulties[q])))
+                    answers.append((q + 1, bool(rng.random() < p)))
+            errors.append(theta - true_theta)
+            lengths.append(len(seen))
+
+        step_ms = np.array(step_times) * 1000
+        self.stdout.write(
+            f'{len(step_ms)} decisions: mean {step_ms.mean():.3f} ms, p50 {np.percentile(step_ms, 50):.3f} ms, '
+            f'p99 {np.percentile(step_ms, 99):.3f} ms'
+        )
+        errors = np.array(errors)
+        self.stdout.write(
+            f'{options["candidates"]} candidates: {np.mean(lengths):.1f} items on average, '
+            f'ability RMSE {np.sqrt((errors ** 2).mean()):.3f}'
+        )
@@ -0,0 +1,64 @@
+"""
+Time form assembly on a synthetic item bank.
+Run: python manage.py benchmark_assembly --items 50000 --forms 200
+Builds an in-memory CandidatePool (no database) of conversations and lectures with
+random difficulty labels, topics and question types, then assembles non-overlapping
+forms with the default FormSpec. Reports the pool build time, the time per form and
+how many forms met every constraint.
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from listening.assembly import DIFFICULTIES, ITEM_TYPES, QUESTION_TYPES, CandidatePool, FormSpec
+
+
+class Command(BaseCommand):
+    help = 'Benchmark constraint-based form assembly'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000)
+        parser.add_argument('--topics', type=int, default=500)
+        parser.add_argument('--forms', type=int, default=200)
+        parser.add_argument('--questions', type=int, default=25, help='Total questions target (0 for none)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n = options['items']
+        item_types = rng.choice(len(ITEM_TYPES), n, p=[0.6, 0.4])
+        difficulties = rng.choice(len(DIFFICULTIES), n, p=[0.25, 0.5, 0.25])
+        topics = rng.integers(0, options['topics'], n)
+        # 4-6 questions per item, mostly detail and inference.
+        question_types = np.zeros((n, len(QUESTION_TYPES)), dtype=np.int64)
+        per_item = rng.integers(4, 7, n)
+        for k in range(per_item.max()):
+            has = per_item > k
+            kinds = rng.choice(len(QUESTION_TYPES), n, p=[0.15, 0.35, 0.25, 0.1, 0.15])
+            np.add.at(question_types, (np.flatnonzero(has), kinds[has]), 1)
+
+        start = time.perf_counter()
+        pool = CandidatePool(np.arange(1, n + 1), item_types, difficulties, topics, question_types)
+        self.stdout.write(f'Pool of {n} items built in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+        spec = FormSpec(questions=options['questions'] or None)
+        times = []
+        clean = 0
+        used = []
+        for _ in range(options['forms']):
+            t0 = time.perf_counter()
+            chosen, violations = pool.assemble(spec, rng)
+            times.append(time.perf_counter() - t0)
+            clean += not violations
+            used.extend(chosen)
+
+        ms = np.array(times) * 1000
+        self.stdout.write(
+            f'{len(ms)} forms: mean {ms.mean():.2f} ms, p50 {np.percentile(ms, 50):.2f} ms, '
+            f'p99 {np.percentile(ms, 99):.2f} ms'
+        )
+        self.stdout.write(
+            f'{clean} of {len(ms)} forms meet every constraint; '
+            f'{len(set(used))} distinct items in {len(used)} slots'
+        )
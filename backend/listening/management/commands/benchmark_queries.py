@@ -0,0 +1,191 @@
+"""
+Seed synthetic data and report the plan and timing of each hot API query.
+Run: python manage.py benchmark_queries --tests 50 --users 500 --sessions 10
+Everything happens inside a transaction that is rolled back (unless --keep).
+The seeded tables are ANALYZEd first; plans come from EXPLAIN (ANALYZE, BUFFERS)
+on PostgreSQL and EXPLAIN QUERY PLAN on SQLite.
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from listening.cache import build_answer_key
+from listening.models import (
+    QUESTION_TYPE_CHOICES,
+    ListeningTest,
+    ListeningItem,
+    Question,
+    ChoiceOption,
+    ListeningSession,
+    UserAnswer,
+    ScoreReportJob,
+)
+from listening.services import ListeningService, ScoringEngine
+
+EXPLAIN_PREFIX = {
+    'postgresql': 'EXPLAIN (ANALYZE, BUFFERS) ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'mysql': 'EXPLAIN ',
+}
+
+
+def seed(options, rng: random.Random) -> dict:
+    User = get_user_model()
+    tests = ListeningTest.objects.bulk_create([
+        ListeningTest(
+            title=f'Benchmark test {i}', version_id=f'bench-{i}',
+            is_active=rng.random() < 0.8, is_archived=rng.random() < 0.2,
+        )
+        for i in range(options['tests'])
+    ])
+    items = ListeningItem.objects.bulk_create([
+        ListeningItem(test=test, order=i) for test in tests for i in range(options['items'])
+    ])
+    question_types = [value for value, _ in QUESTION_TYPE_CHOICES]
+    questions = Question.objects.bulk_create([
+        Question(item=item, text='Q', question_type=rng.choice(question_types), order=i)
+        for item in items for i in range(options['questions'])
+    ])
+    options_by_question = {}
+    for option in ChoiceOption.objects.bulk_create(
+        [
+            ChoiceOption(question=q, label=label, text=label, is_correct=(j == 0), order=j)
+            for q in questions for j, label in enumerate('ABCD')
+        ],
+        batch_size=5000,
+    ):
+        options_by_question.setdefault(option.question_id, []).append(option)
+    questions_by_test = {}
+    for q in questions:
+        questions_by_test.setdefault(q.item.test_id, []).append(q)
+
+    users = User.objects.bulk_create([
+        User(username=f'bench-{i}', password='!') for i in range(options['users'])
+    ])
+    sessions = ListeningSession.objects.bulk_create(
+        [
+            ListeningSession(
+                user=user, test=rng.choice(tests), mode=rng.choice(['practice', 'exam']),
+                status=rng.choices(['finished', 'active', 'abandoned'], [8, 1, 1])[0],
+            )
+            for user in users for _ in range(options['sessions'])
+        ],
+        batch_size=5000,
+    )
+    answers = []
+    for session in sessions:
+        if session.status == 'abandoned':
+            continue
+        for q in questions_by_test[session.test_id]:
+            chosen = rng.choice(options_by_question[q.id])
+            answers.append(UserAnswer(
+                session=session, question=q, selected_option=chosen, is_correct=chosen.is_correct,
+            ))
+    UserAnswer.objects.bulk_create(answers, batch_size=5000)
+    ScoreReportJob.objects.bulk_create(
+        [
+            ScoreReportJob(session=s, status='done' if rng.random() < 0.99 else 'pending')
+            for s in sessions if s.status == 'finished'
+        ],
+        batch_size=5000,
+    )
+    if connection.vendor in ('postgresql', 'sqlite'):
+        # Give the planner statistics for the freshly seeded tables.
+        with connection.cursor() as cursor:
+            for model in (ListeningTest, ListeningItem, Question, ChoiceOption,
+                          ListeningSession, UserAnswer, ScoreReportJob):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    active = next(s for s in sessions if s.status == 'active')
+    finished = next(s for s in sessions if s.status == 'finished')
+    return {
+        'tests': len(tests), 'questions': len(questions), 'sessions': len(sessions),
+        'answers': len(answers), 'active': active, 'finished': finished,
+    }
+
+
+def api_queries(data) -> dict:
+    """The queries behind each endpoint, as callables that evaluate them."""
+    active, finished = data['active'], data['finished']
+    return {
+        'tests list': lambda: list(ListeningTest.objects.filter(is_active=True, is_archived=False)),
+        'session lookup (answer)': lambda: ListeningSession.objects.select_related('test').get(
+            pk=active.pk, status='active',
+        ),
+        'user sessions by status': lambda: list(
+            ListeningSession.objects.filter(user_id=finished.user_id, status='finished')[:20]
+        ),
+        'active session for test': lambda: list(ListeningSession.objects.filter(
+            user_id=active.user_id, test_id=active.test_id, status='active',
+        )),
+        'test content': lambda: list(
+            active.test.items.prefetch_related('questions__options').order_by('order')
+        ),
+        'answer key': lambda: build_answer_key(active.test),
+        'session answers (report)': lambda: ListeningService.session_answers(finished),
+        'score tally': lambda: ScoringEngine.tally_aggregate(finished),
+        'pending report jobs': lambda: list(
+            ScoreReportJob.objects.filter(status='pending').values_list('id', flat=True)[:100]
+        ),
+    }
+
+
+def explain(sql: str):
+    prefix = EXPLAIN_PREFIX.get(connection.vendor)
+    if prefix is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic data and report EXPLAIN plans and timings for the API queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tests', type=int, default=50)
+        parser.add_argument('--items', type=int, default=4, help='Items per test')
+        parser.add_argument('--questions', type=int, default=5, help='Questions per item')
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--sessions', type=int, default=10, help='Sessions per user')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--no-plans', action='store_true', help='Only report timings')
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded data')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            start = time.perf_counter()
+            data = seed(options, rng)
+            self.stdout.write(
+                f"Seeded {data['tests']} tests, {data['questions']} questions, "
+                f"{data['sessions']} sessions, {data['answers']} answers "
+                f"in {time.perf_counter() - start:.1f}s ({connection.vendor})"
+            )
+            for name, run in api_queries(data).items():
+                self.report(name, run, options)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def report(self, name, run, options):
+        with CaptureQueriesContext(connection) as ctx:
+            run()
+        repeat = options['repeat']
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{name}: {elapsed:.2f} ms, {len(ctx.captured_queries)} queries'
+        ))
+        if options['no_plans']:
+            return
+        for query in ctx.captured_queries:
+            self.stdout.write(f"  {query['sql'][:200]}")
+            for line in explain(query['sql']):
+                self.stdout.write(f'    {line}')
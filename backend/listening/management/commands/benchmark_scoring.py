@@ -0,0 +1,150 @@
+"""
+Compare the Python and aggregation scoring paths of ScoringEngine with the engine
+they replaced (baseline_path, a copy of the old ScoringEngine.calculate loop).
+Run: python manage.py benchmark_scoring --sizes 25 100 1000 [--weighted]
+Seeds a synthetic test per size inside a transaction that is rolled back. Every
+score_weight is 1 unless --weighted; the baseline ignores weights, so it is only
+expected to match without it.
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from listening.models import (
+    QUESTION_TYPE_CHOICES,
+    ListeningTest,
+    ListeningItem,
+    Question,
+    ChoiceOption,
+    ListeningSession,
+    UserAnswer,
+)
+from listening.services import ScoringEngine
+from listening.utils import get_guest_user
+
+QUESTIONS_PER_ITEM = 5
+
+
+def seed_session(num_questions: int, rng: random.Random, weighted: bool = False) -> ListeningSession:
+    test = ListeningTest.objects.create(title=f'Benchmark {num_questions}', version_id='bench')
+    items = ListeningItem.objects.bulk_create([
+        ListeningItem(test=test, order=i)
+        for i in range((num_questions + QUESTIONS_PER_ITEM - 1) // QUESTIONS_PER_ITEM)
+    ])
+    question_types = [value for value, _ in QUESTION_TYPE_CHOICES]
+    questions = Question.objects.bulk_create([
+        Question(
+            item=items[i // QUESTIONS_PER_ITEM],
+            text=f'Question {i}',
+            question_type=rng.choice(question_types),
+            score_weight=rng.choice([1, 1, 2]) if weighted else 1,
+            order=i % QUESTIONS_PER_ITEM,
+        )
+        for i in range(num_questions)
+    ])
+    options = ChoiceOption.objects.bulk_create([
+        ChoiceOption(question=q, label=label, text=label, is_correct=(label == 'A'), order=j)
+        for q in questions
+        for j, label in enumerate('ABCD')
+    ])
+    session = ListeningSession.objects.create(user=get_guest_user(), test=test, mode='exam')
+    answers = []
+    for q, q_options in zip(questions, zip(*[iter(options)] * 4)):
+        if rng.random() < 0.1:
+            continue
+        chosen = rng.choice(q_options)
+        answers.append(UserAnswer(
+            session=session, question=q, selected_option=chosen, is_correct=chosen.is_correct,
+        ))
+    UserAnswer.objects.bulk_create(answers)
+    return session
+
+
+def baseline_path(session):
+    """The scoring loop of ScoringEngine.calculate before the aggregation path, minus the report write."""
+    answers = list(
+        UserAnswer.objects.filter(session=session).select_related(
+            'question', 'selected_option'
+        )
+    )
+    total_questions = len(answers)
+    if total_questions == 0:
+        raw = 0
+        subscores = {}
+    else:
+        correct = sum(1 for a in answers if a.is_correct)
+        by_type = {}
+        for a in answers:
+            qt = a.question.question_type
+            if qt not in by_type:
+                by_type[qt] = {'correct': 0, 'total': 0}
+            by_type[qt]['total'] += 1
+            if a.is_correct:
+                by_type[qt]['correct'] += 1
+        raw = (correct / total_questions) * 100 if total_questions else 0
+        subscores = {
+            k: int((v['correct'] / v['total']) * 10) if v['total'] else 0
+            for k, v in by_type.items()
+        }
+    total_score = min(30, int((raw / 100) * 30))
+    return {
+        'total_score': total_score,
+        'main_idea': subscores.get('main_idea', 0),
+        'detail': subscores.get('detail', 0),
+        'inference': subscores.get('inference', 0),
+        'organization': subscores.get('organization', 0),
+        'pragmatic': subscores.get('pragmatic', 0),
+    }
+
+
+def python_path(session):
+    answers = list(UserAnswer.objects.filter(session=session).select_related('question'))
+    return ScoringEngine.score(ScoringEngine.tally_answers(answers))
+
+
+def aggregate_path(session):
+    return ScoringEngine.score(ScoringEngine.tally_aggregate(session))
+
+
+def timed(fn, session, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(session)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+class Command(BaseCommand):
+    help = 'Benchmark baseline vs Python vs GROUP BY scoring at several test sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[25, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--weighted', action='store_true', help='Seed score weights of 1 and 2')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{"questions":>10} {"baseline ms":>12} {"python ms":>10} {"aggregate ms":>13} '
+            f'{"speedup":>8} {"match":>6} {"baseline":>9}'
+        )
+        with transaction.atomic():
+            for size in options['sizes']:
+                session = seed_session(size, rng, options['weighted'])
+                baseline_ms, baseline_scores = timed(baseline_path, session, repeat)
+                python_ms, python_scores = timed(python_path, session, repeat)
+                aggregate_ms, aggregate_scores = timed(aggregate_path, session, repeat)
+                match = python_scores == aggregate_scores
+                baseline_match = baseline_scores == aggregate_scores
+                self.stdout.write(
+                    f'{size:>10} {baseline_ms:>12.2f} {python_ms:>10.2f} {aggregate_ms:>13.2f} '
+                    f'{baseline_ms / aggregate_ms:>7.1f}x {str(match):>6} {str(baseline_match):>9}'
+                )
+                if not match:
+                    self.stdout.write(self.style.ERROR(f'  {python_scores} != {aggregate_scores}'))
+                if not baseline_match and not options['weighted']:
+                    self.stdout.write(self.style.ERROR(f'  baseline {baseline_scores} != {aggregate_scores}'))
+            transaction.set_rollback(True)
@@ -0,0 +1,149 @@
+"""
+Simulate N candidates answering in parallel against SQLite, with and without the
+tuned profile (LISTENING_SQLITE_TUNED), and report throughput and lock errors.
+Run: python manage.py benchmark_sqlite --candidates 8 --sessions 5 --answers 20
+Each candidate is a separate process (like a gunicorn worker) that repeatedly starts
+a session, submits answers one by one and finishes it. Each mode runs on its own scratch copy of
+the configured SQLite database, so the real file is never modified.
+"""
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+MODES = {'default': False, 'tuned': True}
+
+
+def candidate(db_path: str, tuned: bool, test_id: int, sessions: int, answers: list, barrier, results):
+    """Body of one candidate process: puts (saved, lock_errors, other_errors, finished) on `results`."""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['LISTENING_SQLITE_TUNED'] = 'True' if tuned else 'False'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+    from django.db import OperationalError
+    from listening.services import ListeningService
+    from listening.utils import get_guest_user
+
+    user = get_guest_user()
+    saved = lock_errors = other_errors = 0
+    finished = 0
+
+    def attempt(fn, *args):
+        nonlocal lock_errors, other_errors
+        try:
+            return fn(*args), True
+        except OperationalError as exc:
+            if 'locked' in str(exc) or 'busy' in str(exc):
+                lock_errors += 1
+            else:
+                other_errors += 1
+        except Exception:
+            other_errors += 1
+        return None, False
+
+    barrier.wait()
+    for _ in range(sessions):
+        session, ok = attempt(ListeningService.start_session, user, test_id, 'exam')
+        if not ok:
+            continue
+        for question_id, option_id in answers:
+            _, ok = attempt(ListeningService.submit_answer, session.id, question_id, option_id)
+            saved += ok
+        _, ok = attempt(ListeningService.finish_session, session.id)
+        finished += ok
+    results.put((saved, lock_errors, other_errors, finished))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent answer submission on SQLite with and without the tuned profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=8)
+        parser.add_argument('--sessions', type=int, default=5, help='Sessions per candidate')
+        parser.add_argument('--answers', type=int, default=20, help='Answers submitted per session')
+        parser.add_argument('--test', type=int, help='Test id (default: first active test)')
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+
+    def handle(self, *args, **options):
+        # Imported here: candidate processes import this module before Django is set up.
+        from listening.models import ChoiceOption, ListeningTest
+
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_sqlite needs the default database to be SQLite')
+        tests = ListeningTest.objects.filter(is_active=True)
+        test = tests.filter(pk=options['test']).first() if options['test'] else tests.first()
+        if test is None:
+            raise CommandError('No active test found (run load_sample_data first)')
+        pairs = list(
+            ChoiceOption.objects.filter(question__item__test=test)
+            .order_by('question_id', 'order')
+            .values_list('question_id', 'id')
+        )
+        if not pairs:
+            raise CommandError(f'Test {test.pk} has no questions')
+        answers = [pairs[i % len(pairs)] for i in range(options['answers'])]
+
+        self.stdout.write(
+            f'{options["candidates"]} candidates x {options["sessions"]} sessions x {len(answers)} answers '
+            f'on test {test.pk}\n'
+            f'{"mode":>8} {"saved":>7} {"locked":>7} {"errors":>7} {"finished":>9} {"seconds":>8} {"answers/s":>10}'
+        )
+        scratch = tempfile.mkdtemp(prefix='listening-sqlite-bench-')
+        try:
+            for mode in options['modes']:
+                db_path = os.path.join(scratch, f'{mode}.sqlite3')
+                self.copy_database(db_path)
+                self.report(mode, self.run(
+                    db_path, MODES[mode], test.pk, options['sessions'], answers, options['candidates'],
+                ))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    @staticmethod
+    def copy_database(db_path: str):
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        target = sqlite3.connect(db_path)
+        try:
+            source.backup(target)
+            # Start each mode from the stock rollback journal; the tuned profile switches to WAL itself.
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+            source.close()
+
+    @staticmethod
+    def run(db_path: str, tuned: bool, test_id: int, sessions: int, answers: list, candidates: int):
+        ctx = multiprocessing.get_context('spawn')
+        barrier = ctx.Barrier(candidates + 1)
+        results = ctx.Queue()
+        processes = [
+            ctx.Process(target=candidate, args=(db_path, tuned, test_id, sessions, answers, barrier, results))
+            for _ in range(candidates)
+        ]
+        for process in processes:
+            process.start()
+        # Every candidate has set Django up; time only the submissions.
+        barrier.wait()
+        start = time.perf_counter()
+        outcomes = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+        return outcomes, elapsed
+
+    def report(self, mode: str, run):
+        outcomes, elapsed = run
+        saved = sum(o[0] for o in outcomes)
+        locked = sum(o[1] for o in outcomes)
+        errors = sum(o[2] for o in outcomes)
+        finished = sum(o[3] for o in outcomes)
+        self.stdout.write(
+            f'{mode:>8} {saved:>7} {locked:>7} {errors:>7} {finished:>9} {elapsed:>8.2f} {saved / elapsed:>10.1f}'
+        )
@@ -0,0 +1,52 @@
+"""
+Build raw-to-scaled conversion tables per test version and rescore affected reports.
+Run: python manage.py equate_scores                      (every version_id, then rescore)
+     python manage.py equate_scores --test-version toefl-a1   (one version)
+     python manage.py equate_scores --rescore-only       (bring reports up to date)
+See listening/equating.py for the method.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from listening.equating import equate, rescore
+from listening.models import ListeningTest
+
+
+class Command(BaseCommand):
+    help = 'Equate test versions from historical answers and rescore reports with the new tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-version', action='append', dest='versions', help='version_id (repeatable)')
+        parser.add_argument('--min-sessions', type=int, default=200, help='Skip versions with fewer sessions')
+        parser.add_argument('--max-sessions', type=int, default=20000, help='Most recent sessions to calibrate on')
+        parser.add_argument('--include-practice', action='store_true', help='Also calibrate on practice sessions')
+        parser.add_argument('--no-rescore', action='store_true', help='Only build tables')
+        parser.add_argument('--rescore-only', action='store_true', help='Only rescore with the current tables')
+
+    def handle(self, *args, **options):
+        if options['no_rescore'] and options['rescore_only']:
+            raise CommandError('--no-rescore and --rescore-only are mutually exclusive')
+        versions = options['versions'] or sorted(set(
+            ListeningTest.objects.exclude(version_id='').values_list('version_id', flat=True)
+        ))
+        if not options['rescore_only']:
+            for version_id in versions:
+                conversion = equate(
+                    version_id,
+                    min_sessions=options['min_sessions'],
+                    include_practice=options['include_practice'],
+                    max_sessions=options['max_sessions'],
+                )
+                if conversion is None:
+                    self.stdout.write(f'{version_id}: not enough sessions, tables unchanged')
+                    continue
+                self.stdout.write(
+                    f'{version_id}: conversion {conversion.pk} from {conversion.sessions} sessions, '
+                    f'raw 0-{len(conversion.tables["total"]) - 1} -> {conversion.tables["total"][0]}'
+                    f'-{conversion.tables["total"][-1]}'
+                )
+        if options['no_rescore']:
+            return
+        count = 0
+        for version_id in (versions if options['versions'] else [None]):
+            count += rescore(version_id)
+        self.stdout.write(self.style.SUCCESS(f'Rescored {count} reports'))
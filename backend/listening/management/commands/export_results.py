@@ -0,0 +1,50 @@
+"""
+Stream sessions, answers, anti-cheat events or score reports to CSV/NDJSON/columnar chunks.
+Run: python manage.py export_results answers --format csv --since 2026-01-01 -o answers.csv
+Memory use is constant: rows are paged by id and written as they arrive. Pass the
+printed last id back as --after-id to continue an export incrementally.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from listening.exporter import DATASETS, FORMATS, iter_chunks, parse_since, render
+
+
+class Command(BaseCommand):
+    help = 'Export listening results with constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--since', help='Only rows created at/after this date or datetime (ISO 8601)')
+        parser.add_argument('--after-id', type=int, default=0, help='Only rows with a larger id')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('-o', '--output', default='-', help="Output file, '-' for stdout")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_since(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since value: {options['since']}")
+        state = {'rows': 0, 'last_id': options['after_id']}
+
+        def tracked(chunks):
+            for rows in chunks:
+                state['rows'] += len(rows)
+                state['last_id'] = rows[-1][0]
+                yield rows
+
+        chunks = tracked(iter_chunks(
+            options['dataset'], since=since, after_id=options['after_id'],
+            chunk_size=options['chunk_size'],
+        ))
+        fragments = render(options['dataset'], options['format'], chunks)
+        if options['output'] == '-':
+            for fragment in fragments:
+                # Fragments end their own lines; no extra newline from OutputWrapper.
+                self.stdout.write(fragment, ending='')
+        else:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as out:
+                for fragment in fragments:
+                    out.write(fragment)
+        self.stderr.write(f"Exported {state['rows']} {options['dataset']} rows; last id {state['last_id']}.")
@@ -0,0 +1,66 @@
+"""
+Bulk-import listening tests from NDJSON (one test per line) or a JSON array.
+Run: python manage.py import_tests tests.ndjson [--dry-run] [--batch-size 500] [--no-upsert]
+See listening/importer.py for the file format. Tests are read and written one at a
+time, each in its own transaction; a test whose version_id already exists is replaced.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from listening.importer import ContentImportError, import_test, iter_tests
+
+
+class DryRunRollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Stream tests from an NDJSON/JSON file and insert them with bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or JSON file to import')
+        parser.add_argument('--format', choices=['auto', 'ndjson', 'json'], default='auto')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk_create statement')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and insert, then roll back')
+        parser.add_argument(
+            '--no-upsert', action='store_true',
+            help='Always create new tests instead of replacing by version_id',
+        )
+
+    def handle(self, *args, **options):
+        counts = {'created': 0, 'updated': 0, 'skipped': 0}
+        rows = 0
+        started = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8') as fp:
+                for n, data in enumerate(iter_tests(fp, options['format']), start=1):
+                    try:
+                        result = self.import_one(data, options)
+                    except ContentImportError as exc:
+                        raise CommandError(f'Test #{n}: {exc}') from exc
+                    counts[result.action] += 1
+                    rows += result.rows
+                    if result.detail:
+                        self.stdout.write(self.style.WARNING(f'Test #{n} {result.action}: {result.detail}'))
+        except (OSError, ContentImportError) as exc:
+            raise CommandError(str(exc)) from exc
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed else 0
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{counts['created']} created, {counts['updated']} updated, "
+            f"{counts['skipped']} skipped; {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)"
+        ))
+
+    def import_one(self, data, options):
+        upsert = not options['no_upsert']
+        if not options['dry_run']:
+            return import_test(data, upsert=upsert, batch_size=options['batch_size'])
+        try:
+            with transaction.atomic():
+                result = import_test(data, upsert=upsert, batch_size=options['batch_size'])
+                raise DryRunRollback
+        except DryRunRollback:
+            return result
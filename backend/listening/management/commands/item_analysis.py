@@ -0,0 +1,28 @@
+"""
+Update classical item statistics (QuestionStats) from finished sessions.
+Run: python manage.py item_analysis            (sessions scored since the last run)
+     python manage.py item_analysis --full     (recompute from all sessions)
+See listening/item_analysis.py for the statistics and how incremental runs work.
+"""
+from django.core.management.base import BaseCommand
+
+from listening.item_analysis import run
+
+
+class Command(BaseCommand):
+    help = 'Compute p-value, discrimination, point-biserial, distractor rates and median response time per question'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute from all sessions, replacing stored counts')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Sessions per matrix chunk')
+
+    def handle(self, *args, **options):
+        result = run(
+            full=options['full'],
+            chunk_size=options['chunk_size'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Full" if result.full else "Incremental"} item analysis: {result.sessions} sessions, '
+            f'{result.answers} answers through {result.through:%Y-%m-%d %H:%M:%S} in {result.seconds:.2f}s'
+        ))
@@ -4,7 +4,9 @@ Run: python manage.py load_sample_data
 Creates 1 test with 5 items (stages), each with 5 questions (25 questions total).
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from listening.models import ListeningTest, ListeningItem, Question, ChoiceOption
+from listening.signals import suspend_content_updates
 
 
 def add_options(question, correct_label, options_texts):
@@ -261,43 +263,42 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('Tests already exist. Use --clear to replace.'))
             return
 
-        test = ListeningTest.objects.create(
-            title='REAL 1',
-            version_id='v1',
-            total_items=0,
-            is_active=True,
-        )
-
-        # 5 stages: Conversation, Lecture, Conversation, Lecture, Lecture (25 questions total, 5 per stage)
-        stage_specs = [
-            (CONVERSATIONS[0], 'conversation'),
-            (LECTURES[0], 'lecture'),
-            (CONVERSATIONS[1], 'conversation'),
-            (LECTURES[1], 'lecture'),
-            (LECTURES[2], 'lecture'),
-        ]
-        for order, (content, item_type) in enumerate(stage_specs, start=1):
-            item = ListeningItem.objects.create(
-                test=test,
-                difficulty='medium',
-                topic_tag=content['topic'],
-                transcript=content['transcript'],
-                item_type=item_type,
-                order=order,
+        # total_items is recounted once when the block exits, not per created item.
+        with transaction.atomic(), suspend_content_updates():
+            test = ListeningTest.objects.create(
+                title='REAL 1',
+                version_id='v1',
+                total_items=0,
+                is_active=True,
             )
-            for q_order, (q_text, q_type, correct, options) in enumerate(content['questions'], start=1):
-                q = Question.objects.create(
-                    item=item,
-                    text=q_text,
-                    question_type=q_type,
-                    score_weight=1,
-                    order=q_order,
-                    explanation='',
-                )
-                add_options(q, correct, options)
 
-        test.total_items = test.items.count()
-        test.save(update_fields=['total_items'])
+            # 5 stages: Conversation, Lecture, Conversation, Lecture, Lecture (25 questions total, 5 per stage)
+            stage_specs = [
+                (CONVERSATIONS[0], 'conversation'),
+                (LECTURES[0], 'lecture'),
+                (CONVERSATIONS[1], 'conversation'),
+                (LECTURES[1], 'lecture'),
+                (LECTURES[2], 'lecture'),
+            ]
+            for order, (content, item_type) in enumerate(stage_specs, start=1):
+                item = ListeningItem.objects.create(
+                    test=test,
+                    difficulty='medium',
+                    topic_tag=content['topic'],
+                    transcript=content['transcript'],
+                    item_type=item_type,
+                    order=order,
+                )
+                for q_order, (q_text, q_type, correct, options) in enumerate(content['questions'], start=1):
+                    q = Question.objects.create(
+                        item=item,
+                        text=q_text,
+                        question_type=q_type,
+                        score_weight=1,
+                        order=q_order,
+                        explanation='',
+                    )
+                    add_options(q, correct, options)
 
         self.stdout.write(self.style.SUCCESS(
             f'Created 1 test with 5 stages (2 conversations, 3 lectures), '
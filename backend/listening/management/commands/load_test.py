@@ -0,0 +1,193 @@
+"""
+HTTP load test of the candidate hot path against a running server.
+Run: python manage.py load_test --url http://127.0.0.1:8000/api --candidates 500
+Each simulated candidate starts a session, answers questions, logs events and
+finishes, all candidates concurrently. Reports requests/s and p50/p99 latency per
+endpoint. To compare sync and async serving, run it against both modes:
+  gunicorn                     (sync workers, DRF views)
+  SERVER_MODE=asgi gunicorn    (uvicorn workers, listening/async_views.py)
+The client is a minimal asyncio HTTP/1.1 client (keep-alive when the server allows).
+"""
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class HTTPClient:
+    """One connection per candidate; reconnects when the server closes it."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.writer.write((
+            f'{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n'
+            f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n'
+        ).encode() + payload)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding') == 'chunked':
+            data = b''
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                data += chunk[:-2]
+        else:
+            data = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        if not data or not headers.get('content-type', '').startswith('application/json'):
+            return status, None
+        return status, json.loads(data)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class LoadTest:
+    def __init__(self, url: str, test_id: int, options):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.test_id = test_id
+        self.answers = options['answers']
+        self.events = options['events']
+        self.ramp = options['ramp']
+        self.timeout = options['timeout']
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.failures = Counter()
+
+    async def call(self, client, name: str, method: str, path: str, body=None):
+        start = time.perf_counter()
+        try:
+            status, data = await asyncio.wait_for(
+                client.request(method, self.prefix + path, body), self.timeout,
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as exc:
+            client.close()
+            self.errors[name] += 1
+            self.failures[f'{name}: {type(exc).__name__}'] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if status >= 400:
+            self.errors[name] += 1
+            self.failures[f'{name}: HTTP {status}'] += 1
+            return None
+        return data
+
+    async def candidate(self, rng: random.Random):
+        await asyncio.sleep(rng.uniform(0, self.ramp))
+        client = HTTPClient(self.host, self.port)
+        try:
+            start = await self.call(client, 'start', 'POST', '/sessions/start/', {
+                'test_id': self.test_id, 'mode': 'exam',
+            })
+            if start is None:
+                return
+            session_id = start['session']['id']
+            questions = [q for item in start['all_items'] for q in item['questions']]
+            for i in range(self.answers):
+                question = questions[i % len(questions)]
+                await self.call(client, 'answer', 'POST', f'/sessions/{session_id}/answers/', {
+                    'question_id': question['id'],
+                    'option_id': rng.choice(question['options'])['id'],
+                    'response_time_ms': rng.randint(2000, 20000),
+                })
+                if i < self.events:
+                    await self.call(client, 'event', 'POST', f'/sessions/{session_id}/events/', {
+                        'event_type': 'focus_loss',
+                    })
+            await self.call(client, 'finish', 'POST', f'/sessions/{session_id}/finish/')
+        finally:
+            client.close()
+
+    async def run(self, candidates: int, seed: int):
+        rng = random.Random(seed)
+        await asyncio.gather(*(
+            self.candidate(random.Random(rng.random())) for _ in range(candidates)
+        ))
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Load test session start/answer/events/finish with concurrent simulated candidates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api')
+        parser.add_argument('--test', type=int, help='Test id (default: first listed test)')
+        parser.add_argument('--candidates', type=int, default=500)
+        parser.add_argument('--answers', type=int, default=10, help='Answers per candidate')
+        parser.add_argument('--events', type=int, default=2, help='Anti-cheat events per candidate')
+        parser.add_argument('--ramp', type=float, default=1.0, help='Spread candidate starts over N seconds')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout (s)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        test_id = options['test'] or self.first_test(options['url'])
+        load = LoadTest(options['url'], test_id, options)
+        start = time.perf_counter()
+        asyncio.run(load.run(options['candidates'], options['seed']))
+        elapsed = time.perf_counter() - start
+
+        total = sum(len(v) for v in load.latencies.values())
+        self.stdout.write(
+            f'{options["candidates"]} candidates on test {test_id}: {total} requests in {elapsed:.2f}s, '
+            f'{total / elapsed:.1f} req/s, {sum(load.errors.values())} errors'
+        )
+        self.stdout.write(f'{"endpoint":>8} {"requests":>9} {"errors":>7} {"p50 ms":>8} {"p99 ms":>8}')
+        for name in ('start', 'answer', 'event', 'finish'):
+            values = load.latencies.get(name)
+            if not values:
+                continue
+            self.stdout.write(
+                f'{name:>8} {len(values):>9} {load.errors[name]:>7} '
+                f'{percentile(values, 50) * 1000:>8.1f} {percentile(values, 99) * 1000:>8.1f}'
+            )
+        for failure, count in load.failures.most_common():
+            self.stdout.write(self.style.WARNING(f'  {count} x {failure}'))
+
+    @staticmethod
+    def first_test(url: str) -> int:
+        parts = urlsplit(url)
+
+        async def fetch():
+            client = HTTPClient(parts.hostname, parts.port or 80)
+            try:
+                return await client.request('GET', parts.path.rstrip('/') + '/tests/')
+            finally:
+                client.close()
+
+        try:
+            status, tests = asyncio.run(fetch())
+        except OSError as exc:
+            raise CommandError(f'Cannot reach {url}: {exc}')
+        if status != 200 or not tests:
+            raise CommandError('No tests available (run load_sample_data first)')
+        return tests[0]['id']
@@ -0,0 +1,42 @@
+"""
+Normalize, transcode and segment item audio in a process pool.
+Run: python manage.py process_audio [--item 3 --item 7] [--force] [--workers 4]
+By default only items whose uploaded audio has not been processed yet are handled.
+Uses ffmpeg/ffprobe when installed; otherwise 16-bit WAV uploads are normalized and
+segmented with the standard library.
+"""
+from django.core.management.base import BaseCommand
+
+from listening.audio import AUDIO_WORKERS, needs_processing, new_process_pool, process_items
+from listening.models import ListeningItem
+
+
+class Command(BaseCommand):
+    help = 'Run the audio preprocessing pipeline for listening items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--item', type=int, action='append', dest='items', help='Item id (repeatable)')
+        parser.add_argument('--force', action='store_true', help='Reprocess items that are up to date')
+        parser.add_argument('--workers', type=int, default=AUDIO_WORKERS)
+
+    def handle(self, *args, **options):
+        items = ListeningItem.objects.exclude(audio='').exclude(audio__isnull=True)
+        if options['items']:
+            items = items.filter(pk__in=options['items'])
+        items = [item for item in items if options['force'] or needs_processing(item)]
+        if not items:
+            self.stdout.write('No items need audio processing.')
+            return
+        done = failed = 0
+        with new_process_pool(options['workers']) as pool:
+            for item, manifest, error in process_items(items, pool):
+                if error is not None:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'Item {item.pk}: {error}'))
+                    continue
+                done += 1
+                self.stdout.write(
+                    f"Item {item.pk}: {manifest['duration']:.1f}s, "
+                    f"{len(manifest['segments'])} segment(s) via {manifest['tool']}"
+                )
+        self.stdout.write(self.style.SUCCESS(f'Processed {done} item(s), {failed} failed.'))
@@ -0,0 +1,38 @@
+"""
+Generate score reports queued by asynchronous session finishes.
+Run: python manage.py process_report_jobs [--loop] [--interval 2]
+The in-process pool normally handles jobs right after commit; this command drains
+whatever it missed (e.g. after a restart) or runs as a standalone worker.
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from listening.jobs import requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Process pending score-report jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new jobs')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --loop')
+        parser.add_argument('--limit', type=int, default=None, help='Max jobs per poll')
+        parser.add_argument(
+            '--stale-after', type=int, default=300,
+            help='Requeue jobs left running for this many seconds',
+        )
+        parser.add_argument('--retry-failed', action='store_true', help='Also requeue failed jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            older_than = timezone.now() - timedelta(seconds=options['stale_after'])
+            requeued = requeue_stale(older_than, include_failed=options['retry_failed'])
+            done = run_pending(options['limit'])
+            if requeued or done or not options['loop']:
+                self.stdout.write(f'Requeued {requeued} job(s), generated {done} report(s).')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
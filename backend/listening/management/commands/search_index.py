@@ -0,0 +1,53 @@
+"""
+Rebuild or query the full-text search index over item content.
+Run: python manage.py search_index --rebuild
+     python manage.py search_index "photosynthesis" [--difficulty hard] [--item-type lecture] [--topic-tag Biology]
+The index is kept in sync on content changes (listening/search.py); a rebuild is
+only needed after writes that bypass refresh_tests(), e.g. raw SQL.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listening.search import SearchUnavailable, rebuild, search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the content search index or run a search against it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('query', nargs='?')
+        parser.add_argument('--rebuild', action='store_true')
+        parser.add_argument('--difficulty')
+        parser.add_argument('--item-type')
+        parser.add_argument('--topic-tag')
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not options['rebuild'] and not options['query']:
+            raise CommandError('Give a query or --rebuild')
+        if options['rebuild']:
+            started = time.perf_counter()
+            rows = rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Indexed {rows} items in {time.perf_counter() - started:.2f}s'
+            ))
+        if not options['query']:
+            return
+        started = time.perf_counter()
+        try:
+            results = search(
+                options['query'], limit=options['limit'], difficulty=options['difficulty'],
+                item_type=options['item_type'], topic_tag=options['topic_tag'],
+            )
+        except SearchUnavailable as exc:
+            raise CommandError(str(exc)) from exc
+        elapsed = (time.perf_counter() - started) * 1000
+        for result in results:
+            self.stdout.write(
+                f'{result["rank"]:8.3f}  item {result["item_id"]} ({result["test_title"]}, '
+                f'{result["item_type"]}, {result["difficulty"]})'
+            )
+            for column, fragment in result['highlights'].items():
+                self.stdout.write(f'          {column}: {fragment}')
+        self.stdout.write(f'{len(results)} results in {elapsed:.1f} ms')
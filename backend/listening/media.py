@@ -0,0 +1,138 @@
+"""
+Efficient delivery of uploaded media files.
+
+serve_file() answers conditional requests (ETag / Last-Modified -> 304) and single
+byte ranges (206) itself, and otherwise hands the file to the front web server
+(X-Sendfile or X-Accel-Redirect, see LISTENING_MEDIA_OFFLOAD) or to FileResponse,
+which uses the WSGI server's file wrapper (sendfile) for whole-file responses.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.http import http_date, parse_http_date_safe
+
+# '' (serve from Python), 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx)
+MEDIA_OFFLOAD = getattr(settings, 'LISTENING_MEDIA_OFFLOAD', '')
+# nginx `internal` location that maps onto MEDIA_ROOT, used with x-accel-redirect
+MEDIA_ACCEL_PREFIX = getattr(settings, 'LISTENING_MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_MAX_AGE = getattr(settings, 'LISTENING_MEDIA_MAX_AGE', 60 * 60 * 24 * 365)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Read-only view of `length` bytes of an open file starting at `start`."""
+
+    def __init__(self, fp, start: int, length: int, block_size: int = 64 * 1024):
+        self.fp = fp
+        self.remaining = length
+        self.block_size = block_size
+        fp.seek(start)
+
+    def __iter__(self):
+        while self.remaining > 0:
+            data = self.fp.read(min(self.block_size, self.remaining))
+            if not data:
+                break
+            self.remaining -= len(data)
+            yield data
+
+    def close(self):
+        self.fp.close()
+
+
+def file_etag(stat) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header: str, size: int):
+    """Return (start, end) inclusive for a single satisfiable range, None to ignore, or 'invalid'."""
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match:
+        # Multiple or malformed ranges: serving the whole file is always allowed.
+        return None
+    first, last = match.groups()
+    if first == '' and last == '':
+        return None
+    if first == '':
+        length = int(last)
+        # A suffix of an empty file has no bytes to serve.
+        if length == 0 or size == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return 'invalid'
+    return start, min(end, size - 1)
+
+
+def not_modified(request, etag: str, mtime: float) -> bool:
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def serve_file(request, storage, name: str, max_age: int = MEDIA_MAX_AGE, immutable: bool = False):
+    """Serve a stored file with caching, range and offload support."""
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Remote storage (e.g. S3) serves ranges and caching itself.
+        return HttpResponseRedirect(storage.url(name))
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': f'public, max-age={max_age}' + (', immutable' if immutable else ''),
+        'Accept-Ranges': 'bytes',
+    }
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if MEDIA_OFFLOAD:
+        response = HttpResponse(content_type=content_type)
+        if MEDIA_OFFLOAD == 'x-accel-redirect':
+            relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + relative
+        else:
+            response['X-Sendfile'] = path
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = parse_range(range_header, size)
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(open(path, 'rb'), start, length), status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    for key, value in headers.items():
+        response[key] = value
+    return response
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0002_add_listening_item_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='report_job', to='listening.listeningsession')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
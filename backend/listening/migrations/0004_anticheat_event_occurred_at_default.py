@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0003_score_report_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='anticheatevent',
+            name='occurred_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0004_anticheat_event_occurred_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listeningitem',
+            name='audio_duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listeningitem',
+            name='audio_manifest',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
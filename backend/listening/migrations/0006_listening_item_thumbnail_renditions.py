@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0005_listening_item_audio_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listeningitem',
+            name='thumbnail_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0006_listening_item_thumbnail_renditions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='choiceoption',
+            index=models.Index(condition=models.Q(('is_correct', True)), fields=['question'], name='listening_option_correct_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listeningsession',
+            index=models.Index(fields=['user', 'status', '-start_time'], name='listening_session_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listeningsession',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['user', 'test'], name='listening_session_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listeningtest',
+            index=models.Index(fields=['is_active', 'is_archived', '-created_at'], name='listening_test_listed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scorereportjob',
+            index=models.Index(fields=['status', 'created_at'], name='listening_job_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listeningtest',
+            name='time_limit_seconds',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0009_item_analysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScaleConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version_id', models.CharField(db_index=True, max_length=64)),
+                ('tables', models.JSONField()),
+                ('difficulties', models.JSONField(blank=True, default=dict)),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='listeningtest',
+            name='scale_conversion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='listening.scaleconversion'),
+        ),
+        migrations.AddField(
+            model_name='scorereport',
+            name='scale_conversion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='listening.scaleconversion'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0010_scale_conversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='listeningsession',
+            name='mode',
+            field=models.CharField(choices=[('practice', 'Practice'), ('exam', 'Exam'), ('adaptive', 'Adaptive practice')], max_length=20),
+        ),
+    ]
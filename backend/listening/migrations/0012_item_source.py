@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0011_adaptive_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listeningitem',
+            name='source_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='copies', to='listening.listeningitem'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# The DDL is spelled out here rather than imported from listening.search, so the
+# migration keeps creating the table it was written for when that module changes.
+FILL = (
+    "INSERT INTO listening_search ({id}, transcript, questions, explanations, options) "
+    "SELECT i.id, i.transcript, "
+    "COALESCE((SELECT {agg}(q.text, {nl}) FROM listening_question q WHERE q.item_id = i.id), ''), "
+    "COALESCE((SELECT {agg}(q.explanation, {nl}) FROM listening_question q WHERE q.item_id = i.id), ''), "
+    "COALESCE((SELECT {agg}(o.text, {nl}) FROM listening_choiceoption o "
+    "JOIN listening_question q ON q.id = o.question_id WHERE q.item_id = i.id), '') "
+    "FROM listening_listeningitem i"
+)
+
+
+def create(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+            cursor.execute(
+                "CREATE VIRTUAL TABLE listening_search USING fts5("
+                "transcript, questions, explanations, options, "
+                "tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(FILL.format(id='rowid', agg='group_concat', nl='char(10)'))
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                "CREATE TABLE listening_search ("
+                "item_id bigint PRIMARY KEY REFERENCES listening_listeningitem (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "transcript text NOT NULL, questions text NOT NULL, "
+                "explanations text NOT NULL, options text NOT NULL, "
+                "document tsvector GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('english', transcript), 'B') || "
+                "setweight(to_tsvector('english', questions), 'A') || "
+                "setweight(to_tsvector('english', explanations), 'C') || "
+                "setweight(to_tsvector('english', options), 'C')) STORED)"
+            )
+            cursor.execute('CREATE INDEX listening_search_document_idx ON listening_search USING GIN (document)')
+            cursor.execute(FILL.format(id='item_id', agg='string_agg', nl='chr(10)'))
+
+
+def drop(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS listening_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0012_item_source'),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
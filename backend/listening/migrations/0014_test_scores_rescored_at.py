@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listening', '0013_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listeningtest',
+            name='scores_rescored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 # Test can be used in both practice and exam mode
 MODE_CHOICES = [(1, 'Practice'), (2, 'Exam')]
@@ -18,6 +19,12 @@ SESSION_STATUS_CHOICES = [
     ('abandoned', 'Abandoned'),
 ]
 EVENT_TYPE_CHOICES = [('focus_loss', 'Focus Loss'), ('replay', 'Replay')]
+JOB_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+]
 
 
 class ListeningTest(models.Model):
@@ -26,11 +33,23 @@ class ListeningTest(models.Model):
     total_items = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_archived = models.BooleanField(default=False)
+    # Exam-mode time limit, enforced by the server (listening/clock.py); empty means untimed.
+    time_limit_seconds = models.PositiveIntegerField(null=True, blank=True)
+    # Current raw-to-scaled tables for this version_id; empty scores linearly.
+    scale_conversion = models.ForeignKey(
+        'ScaleConversion', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    # Last time equating rewrote existing score reports; item analysis recounts the test after it.
+    scores_rescored_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Tests list: is_active AND NOT is_archived ORDER BY created_at DESC
+            models.Index(fields=['is_active', 'is_archived', '-created_at'], name='listening_test_listed_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -47,6 +66,15 @@ class ListeningItem(models.Model):
     transcript = models.TextField(blank=True)
     item_type = models.CharField(max_length=20, choices=ITEM_TYPE_CHOICES, default='lecture')
     order = models.PositiveIntegerField(default=0)
+    # Filled in by the audio pipeline (listening/audio.py); empty until processed.
+    audio_duration = models.FloatField(null=True, blank=True)
+    audio_manifest = models.JSONField(default=dict, blank=True)
+    # Content-addressed resized copies of `thumbnail` (listening/thumbnails.py).
+    thumbnail_renditions = models.JSONField(default=dict, blank=True)
+    # Bank item this one was copied from by form assembly (listening/assembly.py).
+    source_item = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='copies',
+    )
 
     class Meta:
         ordering = ['test', 'order']
@@ -92,6 +120,12 @@ class ChoiceOption(models.Model):
     class Meta:
         ordering = ['question', 'order']
         unique_together = [['question', 'label']]
+        indexes = [
+            # Correct-option prefetch and answer key: only the few is_correct rows are indexed.
+            models.Index(
+                fields=['question'], condition=models.Q(is_correct=True), name='listening_option_correct_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.label}: {self.text[:40]}..."
@@ -102,13 +136,23 @@ class ListeningSession(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='listening_sessions'
     )
     test = models.ForeignKey(ListeningTest, on_delete=models.CASCADE, related_name='sessions')
-    mode = models.CharField(max_length=20, choices=[('practice', 'Practice'), ('exam', 'Exam')])
+    mode = models.CharField(max_length=20, choices=[
+        ('practice', 'Practice'), ('exam', 'Exam'), ('adaptive', 'Adaptive practice'),
+    ])
     status = models.CharField(max_length=20, choices=SESSION_STATUS_CHOICES, default='active')
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            # A user's sessions by status, newest first
+            models.Index(fields=['user', 'status', '-start_time'], name='listening_session_user_idx'),
+            # In-progress sessions are a small, hot subset of the table.
+            models.Index(
+                fields=['user', 'test'], condition=models.Q(status='active'), name='listening_session_active_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Session {self.id} - {self.test.title} ({self.mode})"
@@ -131,7 +175,8 @@ class UserAnswer(models.Model):
 class AntiCheatEvent(models.Model):
     session = models.ForeignKey(ListeningSession, on_delete=models.CASCADE, related_name='events')
     event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
-    occurred_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: buffered events keep the time they were received, not when flushed.
+    occurred_at = models.DateTimeField(default=timezone.now)
     count = models.PositiveIntegerField(default=1)
     extra_data = models.JSONField(default=dict, blank=True)
 
@@ -149,7 +194,84 @@ class ScoreReport(models.Model):
     inference = models.PositiveIntegerField(default=0)
     organization = models.PositiveIntegerField(default=0)
     pragmatic = models.PositiveIntegerField(default=0)
+    # Tables the scores were read from (empty: linear scoring); rescoring targets stale ones.
+    scale_conversion = models.ForeignKey(
+        'ScaleConversion', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class ScoreReportJob(models.Model):
+    """Queued score-report generation for sessions finished in async mode."""
+    session = models.OneToOneField(
+        ListeningSession, on_delete=models.CASCADE, related_name='report_job'
+    )
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Worker polling: status = 'pending' in queue (created_at) order
+            models.Index(fields=['status', 'created_at'], name='listening_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Report job for session {self.session_id} ({self.status})"
+
+
+class QuestionStats(models.Model):
+    """Classical item statistics, maintained by the item_analysis command (listening/item_analysis.py)."""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='stats')
+    responses = models.PositiveIntegerField(default=0)
+    p_value = models.FloatField(null=True, blank=True)
+    discrimination = models.FloatField(null=True, blank=True)
+    point_biserial = models.FloatField(null=True, blank=True)
+    median_response_ms = models.FloatField(null=True, blank=True)
+    # option id -> share of responses that selected it
+    option_rates = models.JSONField(default=dict, blank=True)
+    # Count arrays the statistics are derived from; new sessions are added to them.
+    state = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'question stats'
+
+    def __str__(self):
+        return f"Stats for question {self.question_id}"
+
+
+class ItemAnalysisRun(models.Model):
+    """One item_analysis pass; `through` is the score-report time up to which sessions are counted."""
+    through = models.DateTimeField()
+    full = models.BooleanField(default=False)
+    sessions = models.PositiveIntegerField(default=0)
+    answers = models.PositiveIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-through']
+
+
+class ScaleConversion(models.Model):
+    """Raw-to-scaled score tables for a test version, produced by equate_scores (listening/equating.py)."""
+    version_id = models.CharField(max_length=64, db_index=True)
+    # {'total': [scaled score per weighted raw point], '<question_type>': [subscore per point], ...}
+    tables = models.JSONField()
+    # question id -> Rasch difficulty the tables were derived from
+    difficulties = models.JSONField(default=dict, blank=True)
+    sessions = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Conversion {self.pk} for {self.version_id}"
@@ -0,0 +1,278 @@
+"""
+Full-text search over item content: ListeningItem.transcript, Question.text,
+Question.explanation and ChoiceOption.text.
+
+Each item has one row in the listening_search table holding its transcript and
+the concatenated text of its questions, explanations and options:
+
+- SQLite: an FTS5 table (porter stemming) with the item id as rowid, ranked by
+  bm25 with per-column WEIGHTS, highlighted with snippet().
+- PostgreSQL: a table with a generated, weighted tsvector column and a GIN index,
+  ranked by ts_rank_cd, highlighted with ts_headline().
+
+The table is created by migration 0013. Rows are rebuilt from the content
+tables with one INSERT ... SELECT. Content
+changes reach the index through refresh_tests(), which every edit (signals, for
+the items touched) and bulk write (importer, form assembly, for whole tests)
+already calls, and item deletions through the item post_delete signal, so the
+index is kept in sync incrementally.
+rebuild() refills it from scratch (manage.py search_index --rebuild).
+
+search() filters on the item's difficulty / topic_tag / item_type and returns
+highlights as HTML-escaped text with matches wrapped in <mark>.
+"""
+import html
+import re
+
+from django.db import DatabaseError, connection as default_connection
+from django.db.backends.signals import connection_created
+
+from .models import ListeningItem
+
+TABLE = 'listening_search'
+COLUMNS = ['transcript', 'questions', 'explanations', 'options']
+# bm25 / ts_rank weight of a match in each column.
+WEIGHTS = {'transcript': 1.0, 'questions': 2.0, 'explanations': 0.5, 'options': 0.5}
+PG_CONFIG = 'english'
+# tsvector weight label of each column; ts_rank_cd takes one weight per label.
+PG_LABELS = {'questions': 'A', 'transcript': 'B', 'explanations': 'C', 'options': 'C'}
+SNIPPET_TOKENS = 16
+# Private-use characters delimit matches in the database output; the text is
+# escaped before they become <mark> tags.
+START, STOP = '', ''
+
+_aggregate = {
+    'sqlite': "group_concat({}, char(10))",
+    'postgresql': "string_agg({}, chr(10))",
+}
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+# available() per connection alias, checked once per opened connection rather than
+# on every reindex.
+_available = {}
+
+
+def _forget(sender, connection, **kwargs):
+    _available.pop(connection.alias, None)
+
+
+connection_created.connect(_forget, dispatch_uid='listening-search-available')
+
+
+def available(connection=default_connection) -> bool:
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE])
+            _available[connection.alias] = cursor.fetchone() is not None
+    return _available[connection.alias]
+
+
+def _id_column(connection) -> str:
+    return 'rowid' if connection.vendor == 'sqlite' else 'item_id'
+
+
+def _insert_sql(connection, where: str) -> str:
+    agg = _aggregate[connection.vendor]
+    return (
+        f"INSERT INTO {TABLE} ({_id_column(connection)}, {', '.join(COLUMNS)}) "
+        f"SELECT i.id, i.transcript, "
+        f"COALESCE((SELECT {agg.format('q.text')} FROM listening_question q WHERE q.item_id = i.id), ''), "
+        f"COALESCE((SELECT {agg.format('q.explanation')} FROM listening_question q WHERE q.item_id = i.id), ''), "
+        f"COALESCE((SELECT {agg.format('o.text')} FROM listening_choiceoption o "
+        f"JOIN listening_question q ON q.id = o.question_id WHERE q.item_id = i.id), '') "
+        f"FROM listening_listeningitem i {where}"
+    )
+
+
+def rebuild(connection=default_connection) -> int:
+    if not available(connection):
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(_insert_sql(connection, ''))
+        return cursor.rowcount
+
+
+def remove_items(item_ids, connection=default_connection):
+    item_ids = list(item_ids)
+    if not item_ids or not available(connection):
+        return
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {_id_column(connection)} IN ({placeholders})', item_ids)
+
+
+def _reindex(items: str, params: list, connection):
+    """Replace the rows of the items selected by the `items` subquery."""
+    if not params or not available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {_id_column(connection)} IN ({items})', params)
+        cursor.execute(_insert_sql(connection, f'WHERE i.id IN ({items})'), params)
+
+
+def index_items(item_ids, connection=default_connection):
+    item_ids = list(item_ids)
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    _reindex(f'SELECT id FROM listening_listeningitem WHERE id IN ({placeholders})', item_ids, connection)
+
+
+def index_tests(test_ids, connection=default_connection):
+    """Rebuild the rows of every item of `test_ids`."""
+    test_ids = list(test_ids)
+    placeholders = ', '.join(['%s'] * len(test_ids))
+    _reindex(f'SELECT id FROM listening_listeningitem WHERE test_id IN ({placeholders})', test_ids, connection)
+
+
+TERM_RE = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+def fts5_query(text: str) -> str:
+    """
+    FTS5 MATCH expression for a search box string: words and "quoted phrases" are
+    ANDed, OR between terms is kept, -term excludes, a trailing * matches a prefix.
+    Every term is quoted, so no input is a syntax error.
+    """
+    parts = []
+    for negate, phrase, word in TERM_RE.findall(text):
+        if word == 'OR':
+            if parts and parts[-1] != 'OR':
+                parts.append('OR')
+            continue
+        if word.startswith('-') and len(word) > 1:
+            negate, word = '-', word[1:]
+        prefix = word.endswith('*') and len(word) > 1
+        term = (phrase if not word else word.rstrip('*')).replace('"', '""')
+        if not term.strip():
+            continue
+        term = f'"{term}"' + ('*' if prefix else '')
+        if negate:
+            # NOT is binary in FTS5; a leading exclusion has nothing to apply to.
+            if parts and parts[-1] != 'OR':
+                parts.append(f'NOT {term}')
+        else:
+            parts.append(term)
+    while parts and parts[-1] == 'OR':
+        parts.pop()
+    return ' '.join(parts)
+
+
+def _highlight(text: str) -> str:
+    return html.escape(text or '').replace(START, '<mark>').replace(STOP, '</mark>')
+
+
+def _filters(filters: dict) -> tuple:
+    sql, params = [], []
+    for name in ('difficulty', 'topic_tag', 'item_type'):
+        if filters.get(name):
+            sql.append(f'AND i.{name} = %s')
+            params.append(filters[name])
+    if filters.get('test_id'):
+        sql.append('AND i.test_id = %s')
+        params.append(filters['test_id'])
+    return ' '.join(sql), params
+
+
+def _sqlite_search(cursor, query: str, where: str, params: list, limit: int, offset: int):
+    match = fts5_query(query)
+    if not match:
+        return []
+    weights = ', '.join(str(WEIGHTS[c]) for c in COLUMNS)
+    snippets = ', '.join(
+        f"snippet({TABLE}, {n}, '{START}', '{STOP}', '...', {SNIPPET_TOKENS})" for n in range(len(COLUMNS))
+    )
+    cursor.execute(
+        f"SELECT s.rowid, -bm25({TABLE}, {weights}) AS rank, {snippets} "
+        f"FROM {TABLE} s JOIN listening_listeningitem i ON i.id = s.rowid "
+        f"WHERE {TABLE} MATCH %s {where} ORDER BY bm25({TABLE}, {weights}) LIMIT %s OFFSET %s",
+        [match, *params, limit, offset],
+    )
+    return cursor.fetchall()
+
+
+def _postgres_search(cursor, query: str, where: str, params: list, limit: int, offset: int):
+    options = f'StartSel={START}, StopSel={STOP}, MaxWords=35, MinWords=10, MaxFragments=2'
+    # Ordered D, C, B, A; ts_rank_cd takes weights in [0, 1], so scaled by the largest.
+    top = max(WEIGHTS.values())
+    weights = ', '.join(
+        str(max((WEIGHTS[c] for c in COLUMNS if PG_LABELS[c] == label), default=0.1) / top) for label in 'DCBA'
+    )
+    # Headlines are computed in the outer query, only for the page of results.
+    headlines = ', '.join(f"ts_headline('{PG_CONFIG}', s.{c}, r.q, %s)" for c in COLUMNS)
+    cursor.execute(
+        f"SELECT r.item_id, r.rank, {headlines} FROM ("
+        f"  SELECT s.item_id, q, ts_rank_cd('{{{weights}}}', s.document, q) AS rank "
+        f"  FROM {TABLE} s JOIN listening_listeningitem i ON i.id = s.item_id, "
+        f"  websearch_to_tsquery('{PG_CONFIG}', %s) q "
+        f"  WHERE s.document @@ q {where} ORDER BY rank DESC LIMIT %s OFFSET %s"
+        f") r JOIN {TABLE} s ON s.item_id = r.item_id ORDER BY r.rank DESC",
+        [*[options] * len(COLUMNS), query, *params, limit, offset],
+    )
+    return cursor.fetchall()
+
+
+def search(query: str, limit: int = 20, offset: int = 0, connection=default_connection, **filters) -> list:
+    """
+    Items matching `query`, best first: item fields, `rank` (higher is better) and
+    `highlights` (column -> HTML fragment) for the columns that matched.
+    """
+    if not available(connection):
+        raise SearchUnavailable('full-text search needs SQLite with FTS5 or PostgreSQL')
+    where, params = _filters(filters)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            rows = _sqlite_search(cursor, query, where, params, limit, offset)
+        else:
+            rows = _postgres_search(cursor, query, where, params, limit, offset)
+    items = ListeningItem.objects.select_related('test').in_bulk([r[0] for r in rows])
+    results = []
+    for item_id, rank, *fragments in rows:
+        item = items.get(item_id)
+        if item is None:
+            continue
+        results.append({
+            'item_id': item.pk,
+            'test_id': item.test_id,
+            'test_title': item.test.title,
+            'item_type': item.item_type,
+            'difficulty': item.difficulty,
+            'topic_tag': item.topic_tag,
+            'rank': round(float(rank), 4),
+            'highlights': {
+                column: _highlight(fragment)
+                for column, fragment in zip(COLUMNS, fragments) if fragment and START in fragment
+            },
+        })
+    return results
+
+
+def matching_items(query: str, limit: int = 1000, connection=default_connection) -> list:
+    """Ids of the best matching items, for admin search; [] when search is unavailable."""
+    if not available(connection):
+        return []
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                match = fts5_query(query)
+                if not match:
+                    return []
+                cursor.execute(
+                    f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY rank LIMIT %s', [match, limit],
+                )
+            else:
+                cursor.execute(
+                    f"SELECT item_id FROM {TABLE}, websearch_to_tsquery('{PG_CONFIG}', %s) q "
+                    f"WHERE document @@ q ORDER BY ts_rank_cd(document, q) DESC LIMIT %s",
+                    [query, limit],
+                )
+            return [row[0] for row in cursor.fetchall()]
+    except DatabaseError:
+        return []
@@ -1,3 +1,4 @@
+from django.urls import reverse
 from rest_framework import serializers
 from .models import (
     ListeningTest,
@@ -9,6 +10,8 @@ from .models import (
     ScoreReport,
     AntiCheatEvent,
 )
+from .clock import deadline
+from .thumbnails import srcset
 
 
 class ChoiceOptionSerializer(serializers.ModelSerializer):
@@ -33,22 +36,58 @@ class QuestionSerializer(serializers.ModelSerializer):
 
 class ListeningItemSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
-    audio_source = serializers.ReadOnlyField()
+    audio_source = serializers.SerializerMethodField()
+    audio_segments = serializers.SerializerMethodField()
+    audio_waveform = serializers.SerializerMethodField()
     thumbnail_source = serializers.ReadOnlyField()
+    thumbnail_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ListeningItem
         fields = [
-            'id', 'audio', 'audio_url', 'audio_source',
-            'thumbnail', 'thumbnail_url', 'thumbnail_source',
+            'id', 'audio', 'audio_url', 'audio_source', 'audio_duration', 'audio_segments',
+            'audio_waveform',
+            'thumbnail', 'thumbnail_url', 'thumbnail_source', 'thumbnail_srcset',
             'difficulty', 'topic_tag', 'transcript', 'item_type', 'order', 'questions',
         ]
 
+    def get_audio_source(self, obj):
+        # Uploaded audio goes through the range-aware streaming endpoint.
+        if obj.audio_url:
+            return obj.audio_url
+        return reverse('item-audio', args=[obj.pk]) if obj.audio else ''
+
+    def get_audio_segments(self, obj):
+        if not obj.audio:
+            return []
+        return [
+            {
+                'url': reverse('item-audio-segment', args=[obj.pk, i]),
+                'start': seg['start'],
+                'duration': seg['duration'],
+            }
+            for i, seg in enumerate(obj.audio_manifest.get('segments', []))
+        ]
+
+    def get_thumbnail_srcset(self, obj):
+        return srcset(obj)
+
+    def get_audio_waveform(self, obj):
+        waveform = obj.audio_manifest.get('waveform')
+        if not obj.audio or not waveform:
+            return None
+        return {
+            'url': reverse('item-waveform', args=[obj.pk]),
+            'buckets': waveform['buckets'],
+            'sample_rate': obj.audio_manifest.get('sample_rate'),
+            'duration': obj.audio_duration,
+        }
+
 
 class ListeningTestListSerializer(serializers.ModelSerializer):
     class Meta:
         model = ListeningTest
-        fields = ['id', 'title', 'version_id', 'total_items', 'is_active']
+        fields = ['id', 'title', 'version_id', 'total_items', 'time_limit_seconds', 'is_active']
 
 
 class ListeningTestDetailSerializer(serializers.ModelSerializer):
@@ -61,15 +100,22 @@ class ListeningTestDetailSerializer(serializers.ModelSerializer):
 
 class SessionStartSerializer(serializers.Serializer):
     test_id = serializers.IntegerField()
-    mode = serializers.ChoiceField(choices=[('practice', 'Practice'), ('exam', 'Exam')])
+    mode = serializers.ChoiceField(choices=[
+        ('practice', 'Practice'), ('exam', 'Exam'), ('adaptive', 'Adaptive practice'),
+    ])
 
 
 class SessionSerializer(serializers.ModelSerializer):
     test = ListeningTestListSerializer(read_only=True)
+    deadline = serializers.SerializerMethodField()
 
     class Meta:
         model = ListeningSession
-        fields = ['id', 'test', 'mode', 'status', 'start_time', 'end_time']
+        fields = ['id', 'test', 'mode', 'status', 'start_time', 'end_time', 'deadline']
+
+    def get_deadline(self, obj):
+        end = deadline(obj)
+        return end.isoformat() if end else None
 
 
 class SubmitAnswerSerializer(serializers.Serializer):
@@ -78,12 +124,39 @@ class SubmitAnswerSerializer(serializers.Serializer):
     response_time_ms = serializers.IntegerField(required=False, allow_null=True)
 
 
+class SubmitAnswersBatchSerializer(serializers.Serializer):
+    answers = SubmitAnswerSerializer(many=True, allow_empty=False, max_length=500)
+
+
 class EventSerializer(serializers.Serializer):
     event_type = serializers.ChoiceField(choices=[('focus_loss', 'Focus Loss'), ('replay', 'Replay')])
     count = serializers.IntegerField(default=1, min_value=1)
     extra_data = serializers.JSONField(required=False, default=dict)
 
 
+class ChannelMessageSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=['answer', 'event', 'heartbeat'])
+    question_id = serializers.IntegerField(required=False)
+    option_id = serializers.IntegerField(required=False)
+    response_time_ms = serializers.IntegerField(required=False, allow_null=True)
+    event_type = serializers.ChoiceField(
+        choices=[('focus_loss', 'Focus Loss'), ('replay', 'Replay')], required=False
+    )
+    count = serializers.IntegerField(default=1, min_value=1)
+    extra_data = serializers.JSONField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['type'] == 'answer' and ('question_id' not in attrs or 'option_id' not in attrs):
+            raise serializers.ValidationError('answer messages need question_id and option_id.')
+        if attrs['type'] == 'event' and 'event_type' not in attrs:
+            raise serializers.ValidationError('event messages need event_type.')
+        return attrs
+
+
+class ChannelSerializer(serializers.Serializer):
+    messages = ChannelMessageSerializer(many=True, max_length=500)
+
+
 class ScoreReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = ScoreReport
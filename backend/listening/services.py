@@ -1,4 +1,7 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Count, Prefetch, Q, Sum
 from django.utils import timezone
 from .models import (
     ListeningTest,
@@ -6,57 +9,241 @@ from .models import (
     UserAnswer,
     AntiCheatEvent,
     ScoreReport,
+    ScoreReportJob,
     Question,
     ChoiceOption,
 )
+from .cache import aget_answer_key, get_answer_key, get_conversion_tables
+from .clock import SessionTimeUp, is_expired
+from .events import event_buffer
+from .jobs import enqueue_report
+from .sqlite import write_transaction
 
 
 class ListeningService:
     @staticmethod
     def start_session(user, test_id: int, mode: str) -> ListeningSession:
         test = ListeningTest.objects.get(pk=test_id, is_active=True)
-        with transaction.atomic():
+        with write_transaction():
             session = ListeningSession.objects.create(user=user, test=test, mode=mode)
         return session
 
+    @staticmethod
+    async def astart_session(user_id: int, test_id: int, mode: str) -> ListeningSession:
+        test = await ListeningTest.objects.aget(pk=test_id, is_active=True)
+        return await ListeningSession.objects.acreate(user_id=user_id, test=test, mode=mode)
+
     @staticmethod
     def submit_answer(session_id: int, question_id: int, option_id: int, response_time_ms: int = None):
-        session = ListeningSession.objects.get(pk=session_id, status='active')
-        question = Question.objects.get(pk=question_id)
-        option = ChoiceOption.objects.get(pk=option_id, question=question)
-        is_correct = option.is_correct
-        UserAnswer.objects.update_or_create(
-            session=session,
-            question=question,
-            defaults={
-                'selected_option': option,
-                'is_correct': is_correct,
-                'response_time_ms': response_time_ms,
-            },
-        )
-        correct_option = question.options.filter(is_correct=True).first()
-        explanation = question.explanation if session.mode == 'practice' else ''
+        session = ListeningSession.objects.select_related('test').get(pk=session_id, status='active')
+        ListeningService.enforce_deadline(session)
+        entry = ListeningService.answer_entry(session, question_id)
+        if entry is None:
+            raise Question.DoesNotExist('Question does not belong to this test.')
+        if option_id not in entry.option_ids:
+            raise ChoiceOption.DoesNotExist('Option does not belong to this question.')
+        is_correct = option_id == entry.correct_option_id
+        ListeningService.save_answers([UserAnswer(
+            session_id=session.id,
+            question_id=question_id,
+            selected_option_id=option_id,
+            is_correct=is_correct,
+            response_time_ms=response_time_ms,
+        )])
+        return ListeningService.answer_feedback(session, entry, is_correct)
+
+    @staticmethod
+    async def asubmit_answer(session_id: int, question_id: int, option_id: int, response_time_ms: int = None):
+        session = await ListeningSession.objects.select_related('test').aget(pk=session_id, status='active')
+        if is_expired(session):
+            await sync_to_async(ListeningService.enforce_deadline)(session)
+        entry = (await aget_answer_key(session.test)).get(question_id)
+        if entry is None and session.mode == 'adaptive':
+            entry = await sync_to_async(ListeningService.answer_entry)(session, question_id)
+        if entry is None:
+            raise Question.DoesNotExist('Question does not belong to this test.')
+        if option_id not in entry.option_ids:
+            raise ChoiceOption.DoesNotExist('Option does not belong to this question.')
+        is_correct = option_id == entry.correct_option_id
+        await sync_to_async(ListeningService.save_answers)([UserAnswer(
+            session_id=session.id,
+            question_id=question_id,
+            selected_option_id=option_id,
+            is_correct=is_correct,
+            response_time_ms=response_time_ms,
+        )])
+        return ListeningService.answer_feedback(session, entry, is_correct)
+
+    @staticmethod
+    def submit_answers(session_id: int, answers: list) -> list:
+        """Grade and store many answers with one upsert; invalid entries are rejected individually."""
+        session = ListeningSession.objects.select_related('test').get(pk=session_id, status='active')
+        ListeningService.enforce_deadline(session)
+        answer_key = get_answer_key(session.test)
+        rows = {}
+        results = []
+        for answer in answers:
+            question_id = answer['question_id']
+            option_id = answer['option_id']
+            entry = answer_key.get(question_id)
+            if entry is None and session.mode == 'adaptive':
+                entry = ListeningService.answer_entry(session, question_id)
+            if entry is None or option_id not in entry.option_ids:
+                results.append({
+                    'question_id': question_id,
+                    'option_id': option_id,
+                    'status': 'rejected',
+                    'detail': 'Option does not belong to a question of this test.',
+                })
+                continue
+            is_correct = option_id == entry.correct_option_id
+            # Later answers to the same question win, as with repeated single submissions.
+            rows[question_id] = UserAnswer(
+                session_id=session.id,
+                question_id=question_id,
+                selected_option_id=option_id,
+                is_correct=is_correct,
+                response_time_ms=answer.get('response_time_ms'),
+            )
+            results.append({
+                'question_id': question_id,
+                'option_id': option_id,
+                'status': 'saved',
+                **ListeningService.answer_feedback(session, entry, is_correct),
+            })
+        ListeningService.save_answers(list(rows.values()))
+        return results
+
+    @staticmethod
+    def answer_entry(session, question_id: int):
+        """Answer-key entry for a question of the session's test; adaptive sessions draw on the whole bank."""
+        entry = get_answer_key(session.test).get(question_id)
+        if entry is None and session.mode == 'adaptive':
+            from .adaptive import item_bank
+
+            entry = item_bank().entries.get(question_id)
+        return entry
+
+    @staticmethod
+    def enforce_deadline(session):
+        """Finish and score a timed session whose deadline has passed, then refuse the request."""
+        if not is_expired(session):
+            return
+        try:
+            ListeningService.finish_session(session.id)
+        except ListeningSession.DoesNotExist:
+            pass  # finished by a concurrent request
+        raise SessionTimeUp()
+
+    @staticmethod
+    def save_answers(answers: list):
+        if not answers:
+            return
+        with write_transaction():
+            UserAnswer.objects.bulk_create(
+                answers,
+                update_conflicts=True,
+                unique_fields=['session', 'question'],
+                update_fields=['selected_option', 'is_correct', 'response_time_ms'],
+            )
+
+    @staticmethod
+    def answer_feedback(session, entry, is_correct: bool) -> dict:
+        explanation = entry.explanation if session.mode != 'exam' else ''
         return {
             'is_correct': is_correct,
-            'correct_option_id': correct_option.id if correct_option else None,
+            'correct_option_id': entry.correct_option_id,
             'explanation': explanation,
         }
 
     @staticmethod
     def finish_session(session_id: int) -> ScoreReport:
-        session = ListeningSession.objects.get(pk=session_id, status='active')
-        with transaction.atomic():
+        report, _ = ListeningService.finish_session_with_answers(session_id)
+        return report
+
+    @staticmethod
+    def finish_session_with_answers(session_id: int):
+        """Finish a session and return (report, answers) from a single fetch of its answers."""
+        session = ListeningSession.objects.select_related('test').get(pk=session_id, status='active')
+        event_buffer.flush(session.id)
+        with write_transaction():
             session.status = 'finished'
             session.end_time = timezone.now()
             session.save()
-            report = ScoringEngine.calculate(session)
-        return report
+            answers = ListeningService.session_answers(session)
+            report = ScoringEngine.calculate(session, answers)
+        return report, answers
+
+    @staticmethod
+    def finish_session_async(session_id: int) -> ScoreReportJob:
+        """Finish a session and queue its report; the job runs once the transaction commits."""
+        session = ListeningSession.objects.get(pk=session_id, status='active')
+        event_buffer.flush(session.id)
+        with write_transaction():
+            session.status = 'finished'
+            session.end_time = timezone.now()
+            session.save(update_fields=['status', 'end_time'])
+            job = ScoreReportJob.objects.create(session=session)
+            transaction.on_commit(lambda: enqueue_report(job.pk))
+        return job
+
+    @staticmethod
+    def report_summary(session, answers: list) -> dict:
+        """Answer counts and per-question detail shown next to a score report."""
+        detailed = []
+        for i, ua in enumerate(answers, start=1):
+            correct_option = ua.question.correct_options[0] if ua.question.correct_options else None
+            detailed.append({
+                'id': i,
+                'question_text': ua.question.text,
+                'correct_answer': correct_option.text if correct_option else '—',
+                'your_answer': ua.selected_option.text if ua.selected_option else '—',
+            })
+        return {
+            'answered_count': len(answers),
+            'correct_count': sum(1 for a in answers if a.is_correct),
+            # Adaptive sessions have no fixed form; they are as long as what was answered.
+            'total_questions': len(answers) if session.mode == 'adaptive' else len(get_answer_key(session.test)),
+            'detailed_answers': detailed,
+        }
+
+    @staticmethod
+    def session_answers(session) -> list:
+        """Answers with question, selected option and `question.correct_options` loaded up front."""
+        return list(
+            UserAnswer.objects.filter(session=session)
+            .select_related('question', 'selected_option')
+            .prefetch_related(Prefetch(
+                'question__options',
+                queryset=ChoiceOption.objects.filter(is_correct=True),
+                to_attr='correct_options',
+            ))
+            .order_by('question__order')
+        )
 
     @staticmethod
     def log_event(session_id: int, event_type: str, count: int = 1, extra_data: dict = None):
-        session = ListeningSession.objects.get(pk=session_id)
+        if event_buffer.enabled:
+            event_buffer.add(session_id, event_type, count, extra_data)
+            return
         AntiCheatEvent.objects.create(
-            session=session,
+            session_id=session_id,
+            event_type=event_type,
+            count=count,
+            extra_data=extra_data or {},
+        )
+
+    @staticmethod
+    async def alog_event(session_id: int, event_type: str, count: int = 1, extra_data: dict = None):
+        if event_buffer.enabled:
+            if event_buffer.shared:
+                # Cache round trips; keep them off the event loop.
+                await sync_to_async(event_buffer.add)(session_id, event_type, count, extra_data)
+            elif event_buffer.add(session_id, event_type, count, extra_data, flush=False):
+                await sync_to_async(event_buffer.flush)()
+            return
+        await AntiCheatEvent.objects.acreate(
+            session_id=session_id,
             event_type=event_type,
             count=count,
             extra_data=extra_data or {},
@@ -65,41 +252,112 @@ class ListeningService:
 
 class ScoringEngine:
     MAX_SCORE = 30
+    # When enabled, questions the candidate skipped count against them.
+    COUNT_UNANSWERED = getattr(settings, 'LISTENING_SCORING_COUNT_UNANSWERED', False)
 
     @staticmethod
-    def calculate(session: ListeningSession) -> ScoreReport:
-        answers = UserAnswer.objects.filter(session=session).select_related(
-            'question', 'selected_option'
-        )
-        total_questions = answers.count()
-        if total_questions == 0:
-            raw = 0
-            subscores = {}
+    def calculate(session: ListeningSession, answers: list = None) -> ScoreReport:
+        """Score a session; uses already-fetched answers when given, else one GROUP BY query."""
+        if answers is None:
+            by_type = ScoringEngine.tally_aggregate(session)
         else:
-            correct = sum(1 for a in answers if a.is_correct)
-            by_type = {}
-            for a in answers:
-                qt = a.question.question_type
-                if qt not in by_type:
-                    by_type[qt] = {'correct': 0, 'total': 0}
-                by_type[qt]['total'] += 1
-                if a.is_correct:
-                    by_type[qt]['correct'] += 1
-            raw = (correct / total_questions) * 100 if total_questions else 0
-            subscores = {
-                k: int((v['correct'] / v['total']) * 10) if v['total'] else 0
-                for k, v in by_type.items()
-            }
-        total_score = min(30, int((raw / 100) * 30))
-        report, _ = ScoreReport.objects.update_or_create(
-            session=session,
-            defaults={
-                'total_score': total_score,
-                'main_idea': subscores.get('main_idea', 0),
-                'detail': subscores.get('detail', 0),
-                'inference': subscores.get('inference', 0),
-                'organization': subscores.get('organization', 0),
-                'pragmatic': subscores.get('pragmatic', 0),
-            },
+            by_type = ScoringEngine.tally_answers(answers)
+        if session.mode == 'adaptive':
+            # Items come from the whole bank, so the test's form and tables do not apply.
+            return ScoringEngine.save_report(session, ScoringEngine.score(by_type))
+        if ScoringEngine.COUNT_UNANSWERED:
+            ScoringEngine.add_unanswered(session, by_type)
+        scores = ScoringEngine.score(by_type, get_conversion_tables(session.test))
+        scores['scale_conversion_id'] = session.test.scale_conversion_id
+        return ScoringEngine.save_report(session, scores)
+
+    @staticmethod
+    def tally_answers(answers: list) -> dict:
+        by_type = {}
+        for a in answers:
+            t = by_type.setdefault(a.question.question_type, {
+                'correct': 0, 'total': 0, 'weighted_correct': 0, 'weighted_total': 0,
+            })
+            t['total'] += 1
+            t['weighted_total'] += a.question.score_weight
+            if a.is_correct:
+                t['correct'] += 1
+                t['weighted_correct'] += a.question.score_weight
+        return by_type
+
+    @staticmethod
+    def tally_aggregate(session: ListeningSession) -> dict:
+        correct = Q(is_correct=True)
+        rows = (
+            UserAnswer.objects.filter(session=session)
+            .values('question__question_type')
+            .annotate(
+                total=Count('id'),
+                correct=Count('id', filter=correct),
+                weighted_total=Sum('question__score_weight'),
+                weighted_correct=Sum('question__score_weight', filter=correct),
+            )
+            .order_by()
         )
+        return {
+            row['question__question_type']: {
+                'correct': row['correct'],
+                'total': row['total'],
+                'weighted_correct': row['weighted_correct'] or 0,
+                'weighted_total': row['weighted_total'] or 0,
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def add_unanswered(session: ListeningSession, by_type: dict):
+        """Raise denominators to the test's question totals, taken from the answer-key index."""
+        totals = {}
+        for entry in get_answer_key(session.test).values():
+            t = totals.setdefault(entry.question_type, [0, 0])
+            t[0] += 1
+            t[1] += entry.score_weight
+        for question_type, (total, weighted_total) in totals.items():
+            t = by_type.setdefault(question_type, {
+                'correct': 0, 'total': 0, 'weighted_correct': 0, 'weighted_total': 0,
+            })
+            t['total'] = max(t['total'], total)
+            t['weighted_total'] = max(t['weighted_total'], weighted_total)
+
+    @staticmethod
+    def score(by_type: dict, tables: dict = None) -> dict:
+        """
+        Scaled scores. With a version's conversion tables (listening/equating.py) each score
+        is the table entry at the weighted points earned; otherwise it is linear in percent correct.
+        """
+        tables = tables or {}
+        weighted_total = sum(v['weighted_total'] for v in by_type.values())
+        weighted_correct = sum(v['weighted_correct'] for v in by_type.values())
+        if 'total' in tables:
+            total_score = ScoringEngine.lookup(tables['total'], weighted_correct)
+        else:
+            raw = (weighted_correct / weighted_total) * 100 if weighted_total else 0
+            total_score = min(ScoringEngine.MAX_SCORE, int((raw / 100) * ScoringEngine.MAX_SCORE))
+        subscores = {}
+        for k, v in by_type.items():
+            if k in tables:
+                subscores[k] = ScoringEngine.lookup(tables[k], v['weighted_correct'])
+            else:
+                subscores[k] = int((v['weighted_correct'] / v['weighted_total']) * 10) if v['weighted_total'] else 0
+        return {
+            'total_score': total_score,
+            'main_idea': subscores.get('main_idea', 0),
+            'detail': subscores.get('detail', 0),
+            'inference': subscores.get('inference', 0),
+            'organization': subscores.get('organization', 0),
+            'pragmatic': subscores.get('pragmatic', 0),
+        }
+
+    @staticmethod
+    def lookup(table: bytes, points: int) -> int:
+        return table[min(points, len(table) - 1)]
+
+    @staticmethod
+    def save_report(session: ListeningSession, scores: dict) -> ScoreReport:
+        report, _ = ScoreReport.objects.update_or_create(session=session, defaults=scores)
         return report
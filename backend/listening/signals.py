@@ -1,9 +1,132 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import ListeningItem
+from django.utils import timezone
+from .models import ListeningTest, ListeningItem, Question, ChoiceOption
+from .search import index_items, index_tests, remove_items
+from .utils import GUEST_USERNAME, reset_guest_user
+
+# Content changes are collected per thread and applied once per test: on commit of
+# the surrounding transaction, or when the outermost suspend_content_updates() exits.
+_pending = threading.local()
+
+
+def _state():
+    if not hasattr(_pending, 'tests'):
+        _pending.tests = set()
+        _pending.items = set()
+        _pending.questions = set()
+        _pending.removed_items = set()
+        _pending.suspended = 0
+    return _pending
+
+
+def refresh_tests(test_ids, item_ids=None):
+    """
+    Recount total_items and bump updated_at (invalidating cached content) in one
+    UPDATE, and rebuild the search rows of `item_ids` (every item of the tests when None).
+    """
+    if not test_ids:
+        return 0
+    if item_ids is None:
+        index_tests(test_ids)
+    else:
+        index_items(item_ids)
+    item_count = (
+        ListeningItem.objects.filter(test=OuterRef('pk'))
+        .order_by().values('test').annotate(n=Count('pk')).values('n')
+    )
+    return ListeningTest.objects.filter(pk__in=test_ids).update(
+        total_items=Coalesce(Subquery(item_count, output_field=IntegerField()), Value(0)),
+        updated_at=timezone.now(),
+    )
+
+
+def flush_content_updates():
+    state = _state()
+    tests, items, questions = state.tests, state.items, state.questions
+    state.tests, state.items, state.questions = set(), set(), set()
+    removed, state.removed_items = state.removed_items, set()
+    remove_items(removed)
+    if questions:
+        items |= set(Question.objects.filter(pk__in=questions).values_list('item_id', flat=True))
+    if items:
+        rows = list(ListeningItem.objects.filter(pk__in=items).values_list('id', 'test_id'))
+        items = {item_id for item_id, _ in rows}
+        tests |= {test_id for _, test_id in rows}
+    refresh_tests(tests, items)
+
+
+def _schedule(test_id=None, item_id=None, question_id=None, removed_item_id=None):
+    state = _state()
+    if removed_item_id is not None:
+        state.removed_items.add(removed_item_id)
+    if test_id is not None:
+        state.tests.add(test_id)
+    if item_id is not None:
+        state.items.add(item_id)
+    if question_id is not None:
+        state.questions.add(question_id)
+    if not state.suspended:
+        # Scheduled on every change so a rolled-back transaction cannot strand ids;
+        # later callbacks in the same commit find nothing left to do.
+        transaction.on_commit(flush_content_updates)
+
+
+@contextmanager
+def suspend_content_updates():
+    """
+    Skip per-row recounts during bulk imports; affected tests are recounted and
+    touched with a single UPDATE when the outermost block exits.
+    """
+    state = _state()
+    state.suspended += 1
+    try:
+        yield
+    finally:
+        state.suspended -= 1
+    if not state.suspended:
+        flush_content_updates()
+
+
+@receiver(post_save, sender=ListeningItem)
+def item_content_changed(sender, instance, **kwargs):
+    _schedule(test_id=instance.test_id, item_id=instance.pk)
+
+
+@receiver(post_delete, sender=ListeningItem)
+def item_deleted(sender, instance, **kwargs):
+    _schedule(test_id=instance.test_id, removed_item_id=instance.pk)
+
+
+@receiver(post_save, sender=ListeningItem)
+def item_audio_changed(sender, instance, raw=False, **kwargs):
+    from .audio import needs_processing, schedule_processing
+
+    if raw or not getattr(settings, 'LISTENING_AUDIO_PROCESS_ON_SAVE', False):
+        return
+    if needs_processing(instance):
+        transaction.on_commit(lambda: schedule_processing(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_content_changed(sender, instance, **kwargs):
+    _schedule(item_id=instance.item_id)
+
+
+@receiver([post_save, post_delete], sender=ChoiceOption)
+def option_content_changed(sender, instance, **kwargs):
+    _schedule(question_id=instance.question_id)
 
 
-@receiver([post_save, post_delete], sender=ListeningItem)
-def update_test_total_items(sender, instance, **kwargs):
-    instance.test.total_items = instance.test.items.count()
-    instance.test.save(update_fields=['total_items'])
+@receiver(post_delete, sender=get_user_model())
+def guest_user_deleted(sender, instance, **kwargs):
+    if instance.username == GUEST_USERNAME:
+        reset_guest_user()
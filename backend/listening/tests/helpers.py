@@ -0,0 +1,23 @@
+from listening.models import ChoiceOption, ListeningItem, ListeningTest, Question
+
+QUESTION_TYPES = ['main_idea', 'detail', 'inference', 'organization', 'pragmatic']
+
+
+def make_test(questions: int, per_item: int = 5, **fields) -> ListeningTest:
+    """An active test with `questions` four-option questions, `per_item` to an item; option A is correct."""
+    test = ListeningTest.objects.create(title=f'Test with {questions} questions', **fields)
+    for start in range(0, questions, per_item):
+        item = ListeningItem.objects.create(test=test, order=start // per_item, transcript='Transcript')
+        for n in range(start, min(start + per_item, questions)):
+            question = Question.objects.create(
+                item=item, order=n, text=f'Question {n + 1}', question_type=QUESTION_TYPES[n % len(QUESTION_TYPES)],
+            )
+            ChoiceOption.objects.bulk_create([
+                ChoiceOption(question=question, label=label, text=f'Option {label}', is_correct=label == 'A', order=i)
+                for i, label in enumerate('ABCD')
+            ])
+    return test
+
+
+def correct_option(question: Question) -> ChoiceOption:
+    return question.options.get(is_correct=True)
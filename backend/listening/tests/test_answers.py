@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from listening.models import ListeningSession, Question
+from listening.utils import GUEST_USERNAME, get_guest_user_id, reset_guest_user
+
+from .helpers import correct_option, make_test
+
+
+class GuestAnswerMixin:
+    def setUp(self):
+        # The guest is cached per process; rows from an earlier test are gone.
+        reset_guest_user()
+        self.test = make_test(5)
+        self.questions = list(Question.objects.filter(item__test=self.test).order_by('order'))
+        self.correct = {q.pk: correct_option(q).pk for q in self.questions}
+
+    def start(self):
+        response = self.client.post('/api/sessions/start/', {'test_id': self.test.pk, 'mode': 'practice'})
+        self.assertEqual(response.status_code, 201)
+        return response.json()['session']['id']
+
+    def answer(self, session_id, question):
+        return self.client.post(
+            f'/api/sessions/{session_id}/answers/',
+            {'question_id': question.pk, 'option_id': self.correct[question.pk]},
+        )
+
+
+class GuestAnswerQueryTests(GuestAnswerMixin, TestCase):
+    """The guest id is resolved once per process; ownership checks filter on it directly."""
+
+    def test_answer_needs_no_user_query(self):
+        session_id = self.start()
+        # Warms the answer-key cache.
+        self.assertEqual(self.answer(session_id, self.questions[0]).status_code, 201)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.answer(session_id, self.questions[1]).status_code, 201)
+        user_table = get_user_model()._meta.db_table
+        self.assertEqual([q['sql'] for q in queries if user_table in q['sql']], [])
+
+        with self.assertNumQueries(len(queries)):
+            response = self.answer(session_id, self.questions[2])
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json()['is_correct'])
+
+
+class GuestRowDeletedTests(GuestAnswerMixin, TransactionTestCase):
+    # The session's user foreign key is only checked on commit, so this needs real commits.
+
+    def test_guest_resolved_again(self):
+        old_id = get_guest_user_id()
+        get_user_model().objects.filter(username=GUEST_USERNAME).delete()
+
+        session_id = self.start()
+        new_id = get_guest_user_id()
+        self.assertNotEqual(new_id, old_id)
+        self.assertEqual(ListeningSession.objects.get(pk=session_id).user_id, new_id)
+        self.assertEqual(self.answer(session_id, self.questions[0]).status_code, 201)
@@ -0,0 +1,53 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, TestCase
+
+from listening import async_views
+from listening.models import ListeningSession, Question
+from listening.utils import get_guest_user_id, reset_guest_user
+
+from .helpers import correct_option, make_test
+
+
+class AsyncOwnershipTests(TestCase):
+    """Sessions started by the async views are found again by the sync ones."""
+
+    def setUp(self):
+        reset_guest_user()
+        self.test = make_test(5)
+        self.admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+
+    def async_start(self):
+        request = AsyncRequestFactory().post(
+            '/api/sessions/start/', json.dumps({'test_id': self.test.pk, 'mode': 'practice'}),
+            content_type='application/json',
+        )
+        # The same logged-in Django session the sync client sends.
+        request.COOKIES.update({name: morsel.value for name, morsel in self.client.cookies.items()})
+        request.user = self.admin
+        response = async_to_sync(async_views.SessionStartView.as_view())(request)
+        self.assertEqual(response.status_code, 201)
+        return json.loads(response.content)['session']['id']
+
+    def test_sync_endpoints_see_async_session(self):
+        session_id = self.async_start()
+        self.assertEqual(ListeningSession.objects.get(pk=session_id).user_id, get_guest_user_id())
+
+        question = Question.objects.filter(item__test=self.test).first()
+        self.assertEqual(self.client.get(f'/api/sessions/{session_id}/').status_code, 200)
+        response = self.client.post(
+            f'/api/sessions/{session_id}/answers/batch/',
+            {'answers': [{'question_id': question.pk, 'option_id': correct_option(question).pk}]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            f'/api/sessions/{session_id}/channel/', {'messages': [{'type': 'heartbeat'}]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.post(f'/api/sessions/{session_id}/finish/').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/sessions/{session_id}/score-report/').status_code, 200)
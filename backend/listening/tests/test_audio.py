@@ -0,0 +1,100 @@
+import math
+import os
+import shutil
+import tempfile
+import wave
+from array import array
+
+from django.core.files import File
+from django.test import SimpleTestCase, TestCase
+
+from listening.assembly import write_form
+from listening.audio import AudioJob
+from listening.audio_processing import process_audio
+
+from .helpers import make_test
+
+
+def write_sine(path: str, seconds: float, sample_rate: int = 8000, frequency: float = 440.0,
+               amplitude: float = 0.25):
+    samples = array('h', (
+        int(amplitude * 32767 * math.sin(2 * math.pi * frequency * n / sample_rate))
+        for n in range(int(seconds * sample_rate))
+    ))
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+
+
+class WavFallbackTests(SimpleTestCase):
+    """process_audio without ffmpeg: 16-bit WAV is normalized and segmented with the wave module."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.source = os.path.join(self.tmp_dir, 'sine.wav')
+        self.out_dir = os.path.join(self.tmp_dir, 'out')
+        write_sine(self.source, 25)
+
+    def test_sine_wave(self):
+        manifest = process_audio(self.source, self.out_dir, segment_seconds=10, buckets=100, ffmpeg='no-such-ffmpeg')
+
+        self.assertEqual(manifest['tool'], 'wave')
+        self.assertEqual(manifest['file'], 'full.wav')
+        self.assertEqual(manifest['duration'], 25.0)
+        self.assertEqual(
+            [(s['file'], s['start'], s['duration']) for s in manifest['segments']],
+            [('seg_0000.wav', 0.0, 10.0), ('seg_0001.wav', 10.0, 10.0), ('seg_0002.wav', 20.0, 5.0)],
+        )
+        for segment in manifest['segments']:
+            with wave.open(os.path.join(self.out_dir, segment['file']), 'rb') as wav:
+                self.assertEqual(wav.getnframes() / wav.getframerate(), segment['duration'])
+
+        with wave.open(os.path.join(self.out_dir, 'full.wav'), 'rb') as wav:
+            samples = array('h', wav.readframes(wav.getnframes()))
+        # Normalized towards an RMS of 0.1 of full scale, peaks below 0.89.
+        rms = (sum(s * s for s in samples) / len(samples)) ** 0.5 / 32767
+        self.assertAlmostEqual(rms, 0.1, places=2)
+        self.assertLessEqual(max(samples), 0.89 * 32767)
+
+        waveform = manifest['waveform']
+        self.assertEqual(waveform['buckets'], 100)
+        self.assertEqual(os.path.getsize(os.path.join(self.out_dir, 'peaks.bin')), 100 * 2 * 2)
+
+
+class SharedOutputsTests(TestCase):
+    """Reprocessing a bank item keeps the outputs its assembled copies still use."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = self.settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def process(self, item, seconds: int) -> dict:
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        source = os.path.join(tmp_dir, 'sine.wav')
+        write_sine(source, seconds)
+        item.refresh_from_db()
+        with open(source, 'rb') as fp:
+            item.audio.save('sine.wav', File(fp))
+        job = AudioJob(item)
+        try:
+            return job.store(process_audio(job.source, job.out_dir, 10, '64k', 100, ffmpeg='no-such-ffmpeg'))
+        finally:
+            job.cleanup()
+
+    def test_copies_keep_their_outputs(self):
+        item = make_test(5).items.get()
+        first = self.process(item, 15)
+        copy = write_form([item.pk], title='Form').items.get()
+        self.assertEqual(copy.audio_manifest, first)
+
+        self.process(item, 5)
+        storage = item.audio.storage
+        for name in [first['file'], first['waveform']['file'], *(s['file'] for s in first['segments'])]:
+            self.assertTrue(storage.exists(name), name)
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from listening.events import SharedEventBuffer, write_events
+from listening.models import AntiCheatEvent, ListeningSession
+from listening.utils import get_guest_user, reset_guest_user
+
+from .helpers import make_test
+
+
+class SharedEventBufferTests(TestCase):
+    """Two buffers on one cache stand in for two workers."""
+
+    def setUp(self):
+        reset_guest_user()
+        cache.clear()
+        self.session = ListeningSession.objects.create(user=get_guest_user(), test=make_test(5), mode='exam')
+        self.workers = [SharedEventBuffer(flush_seconds=3600, coalesce_seconds=60) for _ in range(2)]
+
+    def tearDown(self):
+        for worker in self.workers:
+            worker.flush()
+
+    def rows(self):
+        return list(
+            AntiCheatEvent.objects.filter(session=self.session)
+            .order_by('id').values_list('event_type', 'count', 'extra_data')
+        )
+
+    def test_finish_drains_events_of_every_worker(self):
+        first, second = self.workers
+        first.add(self.session.pk, 'focus_loss')
+        first.add(self.session.pk, 'focus_loss', 2)
+        second.add(self.session.pk, 'replay', extra_data={'item': 1})
+        first.add(self.session.pk, 'replay', extra_data={'item': 2})
+
+        self.assertEqual(second.flush(self.session.pk), 3)
+        self.assertEqual(self.rows(), [
+            ('focus_loss', 3, {}), ('replay', 1, {'item': 1}), ('replay', 1, {'item': 2}),
+        ])
+        # Already drained: the other worker's periodic flush writes nothing again.
+        self.assertEqual(first.flush(), 0)
+        self.assertEqual(len(self.rows()), 3)
+
+    def test_full_session_is_drained(self):
+        worker = SharedEventBuffer(max_size=3, flush_seconds=3600)
+        self.workers.append(worker)
+        for _ in range(2):
+            self.assertFalse(worker.add(self.session.pk, 'focus_loss', extra_data={'n': _}))
+        self.assertTrue(worker.add(self.session.pk, 'replay'))
+        self.assertEqual(len(self.rows()), 3)
+
+
+class WriteEventsTests(TestCase):
+    def test_bad_row_does_not_lose_the_batch(self):
+        reset_guest_user()
+        session = ListeningSession.objects.create(user=get_guest_user(), test=make_test(5), mode='exam')
+        events = [
+            AntiCheatEvent(session=session, event_type='focus_loss', count=1),
+            AntiCheatEvent(session=session, event_type='replay', count=-1),
+            AntiCheatEvent(session=session, event_type='replay', count=2),
+        ]
+        with self.assertLogs('listening.events', 'ERROR'):
+            self.assertEqual(write_events(events), 2)
+        self.assertEqual(sorted(session.events.values_list('count', flat=True)), [1, 2])
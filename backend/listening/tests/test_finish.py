@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from listening.models import ListeningSession, Question, UserAnswer
+from listening.utils import get_guest_user, reset_guest_user
+
+from .helpers import make_test
+
+
+class FinishQueryCountTests(TestCase):
+    """Finishing builds the report and detailed answers from one fetch of the answers."""
+
+    def setUp(self):
+        # The guest is cached per process; rows from an earlier test are rolled back.
+        reset_guest_user()
+
+    def start_answered_session(self, questions: int) -> ListeningSession:
+        test = make_test(questions)
+        session = ListeningSession.objects.create(user=get_guest_user(), test=test, mode='practice')
+        for n, question in enumerate(Question.objects.filter(item__test=test).prefetch_related('options')):
+            option = question.options.all()[n % 2]
+            UserAnswer.objects.create(
+                session=session, question=question, selected_option=option, is_correct=option.is_correct,
+            )
+        return session
+
+    def finish(self, session):
+        response = self.client.post(f'/api/sessions/{session.pk}/finish/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_questions(self):
+        small = self.start_answered_session(5)
+        large = self.start_answered_session(50)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.finish(small)
+        self.assertEqual(len(data['detailed_answers']), 5)
+
+        with self.assertNumQueries(len(queries)):
+            data = self.finish(large)
+        self.assertEqual(data['answered_count'], 50)
+        self.assertEqual(data['correct_count'], 25)
+        self.assertEqual(len(data['detailed_answers']), 50)
+        self.assertEqual(data['detailed_answers'][0]['correct_answer'], 'Option A')
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from listening import item_analysis
+from listening.equating import rescore
+from listening.models import ListeningSession, Question, QuestionStats, ScaleConversion, ScoreReport, UserAnswer
+from listening.services import ScoringEngine
+from listening.utils import get_guest_user, reset_guest_user
+
+from .helpers import make_test
+
+
+class IncrementalRunTests(TestCase):
+    def setUp(self):
+        reset_guest_user()
+        self.test = make_test(5, version_id='v1')
+        questions = list(Question.objects.filter(item__test=self.test).prefetch_related('options'))
+        for correct in range(1, 5):
+            session = ListeningSession.objects.create(
+                user=get_guest_user(), test=self.test, mode='exam', status='finished',
+            )
+            for n, question in enumerate(questions):
+                option = question.options.all()[0 if n < correct else 1]
+                UserAnswer.objects.create(
+                    session=session, question=question, selected_option=option, is_correct=option.is_correct,
+                )
+            ScoringEngine.calculate(session)
+        # Past the settle delay.
+        ScoreReport.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+    def stats(self):
+        return {s.question_id: (s.responses, s.p_value, s.point_biserial, s.state) for s in QuestionStats.objects.all()}
+
+    def test_rescored_test_is_recounted(self):
+        item_analysis.run(full=True)
+        before = self.stats()
+        self.test.scale_conversion = ScaleConversion.objects.create(
+            version_id='v1', tables={'total': [0, 2, 4, 12, 20, 30]},
+        )
+        self.test.save()
+        self.assertEqual(rescore('v1'), 4)
+
+        run = item_analysis.run()
+        self.assertEqual(run.sessions, 4)
+        incremental = self.stats()
+        self.assertNotEqual(incremental, before)
+        item_analysis.run(full=True)
+        self.assertEqual(incremental, self.stats())
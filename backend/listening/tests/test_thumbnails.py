@@ -0,0 +1,45 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+from PIL import Image
+
+from listening.thumbnails import DERIVED_PREFIX, get_or_create_rendition
+
+from .helpers import make_test
+
+
+class RenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.item = make_test(5).items.get()
+        image = io.BytesIO()
+        Image.new('RGB', (800, 400), 'red').save(image, 'PNG')
+        self.item.thumbnail.save('red.png', ContentFile(image.getvalue()))
+
+    def test_concurrent_render_keeps_one_file(self):
+        name = get_or_create_rendition(self.item, 320, 'webp')
+        # A second request that checked before the first one's file was stored.
+        self.item.thumbnail_renditions = {}
+        exists = FileSystemStorage.exists
+        missed = []
+
+        def exists_once_missed(storage, path):
+            if path == name and not missed:
+                missed.append(path)
+                return False
+            return exists(storage, path)
+
+        with mock.patch.object(FileSystemStorage, 'exists', autospec=True, side_effect=exists_once_missed):
+            self.assertEqual(get_or_create_rendition(self.item, 320, 'webp'), name)
+        storage = self.item.thumbnail.storage
+        self.assertEqual(storage.listdir(DERIVED_PREFIX)[1], [os.path.basename(name)])
@@ -0,0 +1,96 @@
+"""
+Resized WebP/JPEG renditions of ListeningItem.thumbnail.
+
+Renditions are generated with Pillow on first request and stored under a name
+derived from their own bytes (thumbnails/derived/<sha>.<ext>), so their URLs
+never change content and can be cached as immutable. The item keeps a map of
+what has been generated in `thumbnail_renditions`:
+
+    {"source": "<thumbnail name>", "webp": {"320": "<stored name>"}, "jpeg": {...}}
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from .models import ListeningItem
+
+THUMBNAIL_WIDTHS = getattr(settings, 'LISTENING_THUMBNAIL_WIDTHS', [160, 320, 640])
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVED_PREFIX = 'thumbnails/derived'
+
+
+def renditions_for(item) -> dict:
+    """Generated renditions of the current thumbnail (empty when the thumbnail changed)."""
+    renditions = item.thumbnail_renditions or {}
+    if not item.thumbnail or renditions.get('source') != item.thumbnail.name:
+        return {}
+    return renditions
+
+
+def render(source_fp, width: int, fmt: str) -> bytes:
+    pil_format, options = THUMBNAIL_FORMATS[fmt]
+    with Image.open(source_fp) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGB')
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, pil_format, **options)
+    return out.getvalue()
+
+
+def derived_name(data: bytes, fmt: str) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    return f'{DERIVED_PREFIX}/{digest}.{fmt}'
+
+
+def get_or_create_rendition(item, width: int, fmt: str) -> str:
+    """Stored name of the `width`/`fmt` rendition of the item's thumbnail, generating it if needed."""
+    renditions = renditions_for(item)
+    name = renditions.get(fmt, {}).get(str(width))
+    if name:
+        return name
+    storage = item.thumbnail.storage
+    with item.thumbnail.open('rb') as fp:
+        data = render(fp, width, fmt)
+    name = derived_name(data, fmt)
+    if not storage.exists(name):
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:
+            # A concurrent request stored the same bytes under `name` first; the
+            # storage put ours under an alternate name, which is not needed.
+            storage.delete(saved)
+    renditions = {
+        'source': item.thumbnail.name,
+        **{k: dict(v) for k, v in renditions.items() if k != 'source'},
+    }
+    renditions.setdefault(fmt, {})[str(width)] = name
+    ListeningItem.objects.filter(pk=item.pk).update(thumbnail_renditions=renditions)
+    item.thumbnail_renditions = renditions
+    return name
+
+
+def srcset(item) -> dict:
+    """{'webp': 'url 160w, url 320w, ...', 'jpeg': ...}; empty for items without an uploaded thumbnail."""
+    if not item.thumbnail:
+        return {}
+    renditions = renditions_for(item)
+    result = {}
+    for fmt in THUMBNAIL_FORMATS:
+        entries = []
+        for width in THUMBNAIL_WIDTHS:
+            name = renditions.get(fmt, {}).get(str(width))
+            if name:
+                url = reverse('thumbnail-derived', args=[name.rsplit('/', 1)[-1]])
+            else:
+                url = reverse('item-thumbnail', args=[item.pk, width, fmt])
+            entries.append(f'{url} {width}w')
+        result[fmt] = ', '.join(entries)
+    return result
@@ -1,13 +1,35 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the candidate hot path can be served by the native async views.
+hot = async_views if getattr(settings, 'LISTENING_ASYNC_VIEWS', False) else views
 
 urlpatterns = [
     path('tests/', views.TestsListView.as_view()),
-    path('sessions/start/', views.SessionStartView.as_view()),
+    path('sessions/start/', hot.SessionStartView.as_view()),
     path('sessions/<int:pk>/', views.SessionDetailView.as_view()),
-    path('sessions/<int:pk>/finish/', views.SessionFinishView.as_view()),
-    path('sessions/<int:pk>/answers/', views.SessionAnswersView.as_view()),
-    path('sessions/<int:pk>/events/', views.SessionEventsView.as_view()),
+    path('sessions/<int:pk>/finish/', hot.SessionFinishView.as_view()),
+    path('sessions/<int:pk>/answers/', hot.SessionAnswersView.as_view()),
+    path('sessions/<int:pk>/next-item/', views.SessionNextItemView.as_view()),
+    path('sessions/<int:pk>/answers/batch/', views.SessionAnswersBatchView.as_view()),
+    path('sessions/<int:pk>/events/', hot.SessionEventsView.as_view()),
     path('sessions/<int:pk>/score-report/', views.SessionScoreReportView.as_view()),
+    path('sessions/<int:pk>/channel/', views.SessionChannelView.as_view()),
     path('items/<int:item_id>/', views.ItemDetailView.as_view()),
+    path('items/<int:item_id>/audio/', views.ItemAudioView.as_view(), name='item-audio'),
+    path(
+        'items/<int:item_id>/audio/segments/<int:index>/',
+        views.ItemAudioSegmentView.as_view(),
+        name='item-audio-segment',
+    ),
+    path('items/<int:item_id>/waveform/', views.ItemWaveformView.as_view(), name='item-waveform'),
+    path(
+        'items/<int:item_id>/thumbnail/<int:width>/<str:fmt>/',
+        views.ItemThumbnailView.as_view(),
+        name='item-thumbnail',
+    ),
+    path('thumbnails/<str:name>/', views.ThumbnailDerivedView.as_view(), name='thumbnail-derived'),
+    path('exports/<str:dataset>/', views.ExportView.as_view()),
+    path('search/', views.ContentSearchView.as_view()),
 ]
@@ -1,11 +1,40 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 
+GUEST_USERNAME = 'guest_listening'
+
+# Resolved once per process; reset_guest_user() drops it if the row goes away.
+_guest_user = None
+
 
 def get_guest_user():
     """Return a shared guest user for unauthenticated requests in this microservice."""
+    global _guest_user
+    if _guest_user is None:
+        _guest_user = _get_or_create_guest_user()
+    return _guest_user
+
+
+def get_guest_user_id() -> int:
+    """Primary key of the guest user, for ownership filters that need no user row."""
+    return get_guest_user().pk
+
+
+async def aget_guest_user_id() -> int:
+    if _guest_user is None:
+        return (await sync_to_async(get_guest_user)()).pk
+    return _guest_user.pk
+
+
+def reset_guest_user():
+    global _guest_user
+    _guest_user = None
+
+
+def _get_or_create_guest_user():
     User = get_user_model()
     user, created = User.objects.get_or_create(
-        username='guest_listening',
+        username=GUEST_USERNAME,
         defaults={'is_active': True},
     )
     if created:
@@ -1,38 +1,73 @@
-from django.db.models import Count
+import json
+import re
 
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
-from .models import ListeningTest, ListeningSession, ListeningItem, UserAnswer
+from .models import DIFFICULTY_CHOICES, ITEM_TYPE_CHOICES, ListeningTest, ListeningSession, ListeningItem
 from .serializers import (
     ListeningTestListSerializer,
     ListeningTestDetailSerializer,
     SessionStartSerializer,
     SessionSerializer,
     SubmitAnswerSerializer,
+    SubmitAnswersBatchSerializer,
     EventSerializer,
     ScoreReportSerializer,
     ListeningItemSerializer,
-    QuestionSerializer,
+    ChannelSerializer,
+)
+from .adaptive import next_item
+from .cache import get_test_content
+from .channel import aclock_events, handle_messages
+from .clock import time_status
+from .conditional import PRIVATE_CACHE_CONTROL, conditional_response
+from .media import serve_file
+from .search import SearchUnavailable, search
+from .thumbnails import (
+    DERIVED_PREFIX,
+    THUMBNAIL_FORMATS,
+    THUMBNAIL_WIDTHS,
+    get_or_create_rendition,
 )
+from .exporter import CONTENT_TYPES, DATASETS, FORMATS, iter_chunks, parse_since, render
 from .services import ListeningService
-from .utils import get_guest_user
+from .utils import get_guest_user, get_guest_user_id, reset_guest_user
+
+
+DERIVED_NAME_RE = re.compile(r'^[0-9a-f]{32}\.(webp|jpeg)$')
 
 
 def _user(request):
     return request.user if request.user.is_authenticated else get_guest_user()
 
 
+def _user_id(request):
+    return request.user.pk if request.user.is_authenticated else get_guest_user_id()
+
+
 class TestsListView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
         tests = ListeningTest.objects.filter(is_active=True, is_archived=False)
-        serializer = ListeningTestListSerializer(tests, many=True)
-        return Response(serializer.data)
+        # Any edit, addition or removal changes this list (content edits bump updated_at).
+        version = list(tests.values_list('id', 'version_id', 'updated_at'))
+        return conditional_response(
+            request, 'tests', version,
+            lambda: ListeningTestListSerializer(tests, many=True).data,
+        )
 
 
 class SessionStartView(APIView):
@@ -41,26 +76,33 @@ class SessionStartView(APIView):
     def post(self, request):
         ser = SessionStartSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
-        session = ListeningService.start_session(
-            _user(request),
-            ser.validated_data['test_id'],
-            ser.validated_data['mode'],
-        )
-        test = session.test
-        items = list(test.items.prefetch_related('questions__options').order_by('order'))
-        first_item = items[0] if items else None
-        first_questions = list(first_item.questions.order_by('order')) if first_item else []
-        first_question = first_questions[0] if first_questions else None
+        try:
+            session = ListeningService.start_session(
+                _user(request),
+                ser.validated_data['test_id'],
+                ser.validated_data['mode'],
+            )
+        except IntegrityError:
+            if request.user.is_authenticated:
+                raise
+            # The cached guest row was deleted by another process; resolve it again.
+            reset_guest_user()
+            session = ListeningService.start_session(
+                _user(request),
+                ser.validated_data['test_id'],
+                ser.validated_data['mode'],
+            )
         hide_correct = session.mode == 'exam'
-        ctx = {'hide_correct': hide_correct}
-        item_ser = ListeningItemSerializer(first_item, context=ctx) if first_item else None
-        q_ser = QuestionSerializer(first_question, context=ctx) if first_question else None
-        all_items_ser = ListeningItemSerializer(items, many=True, context=ctx)
+        # Adaptive sessions are served one item at a time by next-item.
+        all_items = [] if session.mode == 'adaptive' else get_test_content(session.test, hide_correct)
+        first_item = all_items[0] if all_items else None
+        first_questions = first_item['questions'] if first_item else []
+        first_question = first_questions[0] if first_questions else None
         return Response({
             'session': SessionSerializer(session).data,
-            'current_item': item_ser.data if item_ser else None,
-            'current_question': q_ser.data if q_ser else None,
-            'all_items': all_items_ser.data,
+            'current_item': first_item,
+            'current_question': first_question,
+            'all_items': all_items,
         }, status=status.HTTP_201_CREATED)
 
 
@@ -68,7 +110,7 @@ class SessionDetailView(APIView):
     permission_classes = [AllowAny]
 
     def get_session(self, pk):
-        return get_object_or_404(ListeningSession, pk=pk, user=_user(self.request))
+        return get_object_or_404(ListeningSession, pk=pk, user_id=_user_id(self.request))
 
     def get(self, request, pk):
         session = self.get_session(pk)
@@ -79,7 +121,7 @@ class SessionAnswersView(APIView):
     permission_classes = [AllowAny]
 
     def get_session(self, pk):
-        return get_object_or_404(ListeningSession, pk=pk, user=_user(self.request))
+        return get_object_or_404(ListeningSession, pk=pk, user_id=_user_id(self.request))
 
     def post(self, request, pk):
         session = self.get_session(pk)
@@ -99,11 +141,51 @@ class SessionAnswersView(APIView):
         return Response(result, status=status.HTTP_201_CREATED)
 
 
+class SessionNextItemView(APIView):
+    """Adaptive sessions: the most informative unseen item at the current ability estimate."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        session = get_object_or_404(
+            ListeningSession.objects.select_related('test'), pk=pk, user_id=_user_id(request)
+        )
+        if session.mode != 'adaptive':
+            return Response(
+                {'detail': 'Only adaptive sessions choose items on the server.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if session.status != 'active':
+            return Response(
+                {'detail': 'Session is not active.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(next_item(session))
+
+
+class SessionAnswersBatchView(APIView):
+    permission_classes = [AllowAny]
+
+    def get_session(self, pk):
+        return get_object_or_404(ListeningSession, pk=pk, user_id=_user_id(self.request))
+
+    def post(self, request, pk):
+        session = self.get_session(pk)
+        if session.status != 'active':
+            return Response(
+                {'detail': 'Session is not active.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        ser = SubmitAnswersBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        results = ListeningService.submit_answers(session.id, ser.validated_data['answers'])
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+
 class SessionEventsView(APIView):
     permission_classes = [AllowAny]
 
     def get_session(self, pk):
-        return get_object_or_404(ListeningSession, pk=pk, user=_user(self.request))
+        return get_object_or_404(ListeningSession, pk=pk, user_id=_user_id(self.request))
 
     def post(self, request, pk):
         session = self.get_session(pk)
@@ -118,60 +200,291 @@ class SessionEventsView(APIView):
         return Response({'status': 'logged'}, status=status.HTTP_201_CREATED)
 
 
+class EventStreamRenderer(BaseRenderer):
+    """Lets EventSource requests (Accept: text/event-stream) through content negotiation."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode()
+
+
+class SessionChannelView(APIView):
+    """Realtime channel (see channel.py): GET streams the session clock, POST takes batched messages."""
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get_session(self, pk):
+        return get_object_or_404(
+            ListeningSession.objects.select_related('test'), pk=pk, user_id=_user_id(self.request)
+        )
+
+    def get(self, request, pk):
+        session = self.get_session(pk)
+        if session.status != 'active':
+            # A non-2xx answer also stops EventSource from reconnecting.
+            return Response({'detail': 'Session is not active.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(request._request, ASGIRequest):
+            # A stream would hold a sync worker; clients fall back to POST heartbeats.
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        response = StreamingHttpResponse(aclock_events(session), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def post(self, request, pk):
+        session = self.get_session(pk)
+        ser = ChannelSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        messages = ser.validated_data['messages']
+        if session.status != 'active' and any(m['type'] == 'answer' for m in messages):
+            return Response(
+                {'detail': 'Session is not active.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = handle_messages(session, messages)
+        return Response({'results': results, 'time': time_status(session)})
+
+
 class SessionScoreReportView(APIView):
+    """Poll target for async finishes: 202 while the report job is queued, 200 once ready."""
     permission_classes = [AllowAny]
 
     def get(self, request, pk):
-        session = get_object_or_404(ListeningSession, pk=pk, user=_user(request))
+        session = get_object_or_404(
+            ListeningSession.objects.select_related('test', 'score_report', 'report_job'),
+            pk=pk, user_id=_user_id(request),
+        )
         if not hasattr(session, 'score_report'):
+            job = getattr(session, 'report_job', None)
+            if job is not None and job.status in ('pending', 'running'):
+                return Response({'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+            if job is not None and job.status == 'failed':
+                return Response(
+                    {'status': 'failed', 'detail': 'Score report generation failed.'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
             return Response(
                 {'detail': 'Score report not available yet.'},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        return Response(ScoreReportSerializer(session.score_report).data)
+        report = session.score_report
+        return conditional_response(
+            request, f'score-report:{session.pk}',
+            (report.pk, report.created_at, report.scale_conversion_id),
+            lambda: self.report_data(session),
+            cache_control=PRIVATE_CACHE_CONTROL,
+        )
+
+    @staticmethod
+    def report_data(session) -> dict:
+        data = dict(ScoreReportSerializer(session.score_report).data)
+        data['status'] = 'ready'
+        data.update(ListeningService.report_summary(
+            session, ListeningService.session_answers(session)
+        ))
+        return data
 
 
 class SessionFinishView(APIView):
+    """Finishes a session; with ?async=1 or LISTENING_ASYNC_FINISH the report is queued (202)."""
     permission_classes = [AllowAny]
 
     def post(self, request, pk):
-        session = get_object_or_404(ListeningSession, pk=pk, user=_user(request))
+        session = get_object_or_404(
+            ListeningSession.objects.select_related('test'), pk=pk, user_id=_user_id(request)
+        )
         if session.status != 'active':
             return Response(
                 {'detail': 'Session already finished.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        report = ListeningService.finish_session(session.id)
+        if self.is_async(request.query_params):
+            ListeningService.finish_session_async(session.id)
+            return Response(
+                {'status': 'pending', 'session': session.id},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        report, answers = ListeningService.finish_session_with_answers(session.id)
         data = dict(ScoreReportSerializer(report).data)
-        answers = (
-            UserAnswer.objects.filter(session=session)
-            .select_related('question', 'selected_option')
-            .order_by('question__order')
-        )
-        total_questions = session.test.items.aggregate(
-            total=Count('questions')
-        ).get('total') or 0
-        answered_count = answers.count()
-        correct_count = sum(1 for a in answers if a.is_correct)
-        detailed = []
-        for i, ua in enumerate(answers, start=1):
-            correct_option = ua.question.options.filter(is_correct=True).first()
-            detailed.append({
-                'id': i,
-                'question_text': ua.question.text,
-                'correct_answer': correct_option.text if correct_option else '—',
-                'your_answer': ua.selected_option.text if ua.selected_option else '—',
-            })
-        data['answered_count'] = answered_count
-        data['correct_count'] = correct_count
-        data['total_questions'] = total_questions
-        data['detailed_answers'] = detailed
+        data.update(ListeningService.report_summary(session, answers))
         return Response(data)
 
+    @staticmethod
+    def is_async(params) -> bool:
+        flag = params.get('async')
+        if flag is not None:
+            return flag.lower() in ('1', 'true', 'yes')
+        return getattr(settings, 'LISTENING_ASYNC_FINISH', False)
+
 
 class ItemDetailView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, item_id):
-        item = get_object_or_404(ListeningItem, pk=item_id)
-        return Response(ListeningItemSerializer(item).data)
+        item = get_object_or_404(
+            ListeningItem.objects.select_related('test').only(
+                'test__version_id', 'test__updated_at', 'audio', 'audio_duration', 'audio_manifest',
+                'thumbnail', 'thumbnail_renditions',
+            ),
+            pk=item_id,
+        )
+        # Content edits bump the test's updated_at; audio processing and thumbnail
+        # renditions update the item row directly, so those fields are hashed too.
+        version = (
+            item.test.version_id, item.test.updated_at, item.audio.name, item.audio_duration,
+            item.audio_manifest, item.thumbnail.name, item.thumbnail_renditions,
+        )
+        return conditional_response(
+            request, f'item:{item.pk}', version,
+            lambda: ListeningItemSerializer(
+                ListeningItem.objects.prefetch_related('questions__options').get(pk=item.pk)
+            ).data,
+        )
+
+
+class ItemAudioView(APIView):
+    """Audio for an item with Range/ETag/304 support; external audio_url is redirected to."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, item_id):
+        item = get_object_or_404(
+            ListeningItem.objects.only('id', 'audio', 'audio_url', 'audio_manifest'), pk=item_id
+        )
+        if item.audio:
+            # Prefer the normalized, compact rendition once the pipeline has produced it.
+            name = item.audio_manifest.get('file') or item.audio.name
+            return serve_file(request, item.audio.storage, name)
+        if item.audio_url:
+            return HttpResponseRedirect(item.audio_url)
+        return Response({'detail': 'Item has no audio.'}, status=status.HTTP_404_NOT_FOUND)
+
+
+class ItemAudioSegmentView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, item_id, index):
+        item = get_object_or_404(ListeningItem.objects.only('id', 'audio', 'audio_manifest'), pk=item_id)
+        segments = item.audio_manifest.get('segments', [])
+        if not item.audio or index >= len(segments):
+            return Response({'detail': 'Segment not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, item.audio.storage, segments[index]['file'])
+
+
+class ItemWaveformView(APIView):
+    """Precomputed peaks: little-endian int16 (min, max) pairs, one per bucket."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, item_id):
+        item = get_object_or_404(ListeningItem.objects.only('id', 'audio', 'audio_manifest'), pk=item_id)
+        waveform = item.audio_manifest.get('waveform')
+        if not item.audio or not waveform:
+            return Response({'detail': 'Waveform not available yet.'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, item.audio.storage, waveform['file'])
+
+
+class ItemThumbnailView(APIView):
+    """A resized rendition of the item's thumbnail, generated on first request."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, item_id, width, fmt):
+        if width not in THUMBNAIL_WIDTHS or fmt not in THUMBNAIL_FORMATS:
+            return Response({'detail': 'Unknown rendition.'}, status=status.HTTP_404_NOT_FOUND)
+        item = get_object_or_404(
+            ListeningItem.objects.only('id', 'thumbnail', 'thumbnail_url', 'thumbnail_renditions'),
+            pk=item_id,
+        )
+        if not item.thumbnail:
+            if item.thumbnail_url:
+                return HttpResponseRedirect(item.thumbnail_url)
+            return Response({'detail': 'Item has no thumbnail.'}, status=status.HTTP_404_NOT_FOUND)
+        name = get_or_create_rendition(item, width, fmt)
+        # This URL serves whatever the current thumbnail is, so only cache it briefly.
+        return serve_file(request, item.thumbnail.storage, name, max_age=3600)
+
+
+class ThumbnailDerivedView(APIView):
+    """Content-addressed renditions: the name is a hash of the bytes, so they never change."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, name):
+        if not DERIVED_NAME_RE.match(name):
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        path = f'{DERIVED_PREFIX}/{name}'
+        # Renditions are written with the thumbnail field's storage (thumbnails.py).
+        storage = ListeningItem._meta.get_field('thumbnail').storage
+        if not storage.exists(path):
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, storage, path, immutable=True)
+
+
+class ExportView(APIView):
+    """Staff-only streaming export: /api/exports/<dataset>/?fmt=csv&since=...&after_id=..."""
+    authentication_classes = [SessionAuthentication, JWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            return Response({'detail': 'Unknown dataset.'}, status=status.HTTP_404_NOT_FOUND)
+        fmt = request.query_params.get('fmt', 'csv')
+        if fmt not in FORMATS:
+            return Response(
+                {'detail': f'fmt must be one of {", ".join(FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        since = None
+        if request.query_params.get('since'):
+            since = parse_since(request.query_params['since'])
+            if since is None:
+                return Response({'detail': 'Invalid since.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            after_id = int(request.query_params.get('after_id', 0))
+        except ValueError:
+            return Response({'detail': 'Invalid after_id.'}, status=status.HTTP_400_BAD_REQUEST)
+        chunks = iter_chunks(dataset, since=since, after_id=after_id)
+        response = StreamingHttpResponse(
+            render(dataset, fmt, chunks), content_type=CONTENT_TYPES[fmt]
+        )
+        extension = 'csv' if fmt == 'csv' else 'ndjson'
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{extension}"'
+        return response
+
+
+class ContentSearchView(APIView):
+    """
+    Staff-only content search: /api/search/?q=...&difficulty=&item_type=&topic_tag=&test_id=&limit=&offset=
+    Items ranked by relevance, with highlighted transcript/question/explanation/option matches.
+    """
+    authentication_classes = [SessionAuthentication, JWTAuthentication]
+    permission_classes = [IsAdminUser]
+    MAX_LIMIT = 100
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            return Response({'detail': 'q is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        for name, choices in (('difficulty', DIFFICULTY_CHOICES), ('item_type', ITEM_TYPE_CHOICES)):
+            if params.get(name) and params[name] not in dict(choices):
+                return Response(
+                    {'detail': f'{name} must be one of {", ".join(dict(choices))}.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        try:
+            limit = min(max(int(params.get('limit', 20)), 1), self.MAX_LIMIT)
+            offset = max(int(params.get('offset', 0)), 0)
+            test_id = int(params['test_id']) if params.get('test_id') else None
+        except ValueError:
+            return Response({'detail': 'Invalid limit, offset or test_id.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results = search(
+                query, limit=limit, offset=offset, difficulty=params.get('difficulty'),
+                item_type=params.get('item_type'), topic_tag=params.get('topic_tag'), test_id=test_id,
+            )
+        except SearchUnavailable as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            'query': query,
+            'results': results,
+            'next_offset': offset + limit if len(results) == limit else None,
+        })
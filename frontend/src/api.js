@@ -10,7 +10,9 @@ export async function request(path, options = {}) {
   const res = await fetch(url, { ...options, headers });
   if (!res.ok) {
     const err = await res.json().catch(() => ({}));
-    throw new Error(err.detail || err.message || `HTTP ${res.status}`);
+    const error = new Error(err.detail || err.message || `HTTP ${res.status}`);
+    error.status = res.status;
+    throw error;
   }
   if (res.status === 204) return null;
   return res.json();
@@ -33,13 +35,51 @@ export const api = {
         ...(responseTimeMs != null && { response_time_ms: responseTimeMs }),
       }),
     }),
+  submitAnswers: (sessionId, answers) =>
+    request(`/sessions/${sessionId}/answers/batch/`, {
+      method: 'POST',
+      body: JSON.stringify({
+        answers: answers.map(({ questionId, optionId, responseTimeMs }) => ({
+          question_id: questionId,
+          option_id: optionId,
+          ...(responseTimeMs != null && { response_time_ms: responseTimeMs }),
+        })),
+      }),
+    }),
   finishSession: (sessionId) =>
     request(`/sessions/${sessionId}/finish/`, { method: 'POST' }),
   getScoreReport: (sessionId) => request(`/sessions/${sessionId}/score-report/`),
+  // Async finishes answer 202 { status: 'pending' }; poll score-report until it is ready.
+  waitForScoreReport: async (sessionId, intervalMs = 1000) => {
+    for (;;) {
+      const report = await api.getScoreReport(sessionId);
+      if (report?.status !== 'pending') return report;
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
   logEvent: (sessionId, eventType, count = 1, extraData = {}) =>
     request(`/sessions/${sessionId}/events/`, {
       method: 'POST',
       body: JSON.stringify({ event_type: eventType, count, extra_data: extraData }),
     }),
   getItem: (itemId) => request(`/items/${itemId}/`),
+  // Adaptive sessions: { item, done, items_answered, ability: { theta, se } }
+  nextItem: (sessionId) => request(`/sessions/${sessionId}/next-item/`),
+  // Session channel: server-sent `time` / `finished` events, plus one POST for a batch of
+  // answer / event / heartbeat messages. Returns the EventSource; close() it when done.
+  // Under WSGI the server answers the stream with 204 and the EventSource stays CLOSED.
+  openSessionChannel: (sessionId, { onTime, onFinished } = {}) => {
+    const source = new EventSource(`${API_BASE}/sessions/${sessionId}/channel/`);
+    source.addEventListener('time', (e) => onTime?.(JSON.parse(e.data)));
+    source.addEventListener('finished', (e) => {
+      source.close();
+      onFinished?.(JSON.parse(e.data));
+    });
+    return source;
+  },
+  sendChannelMessages: (sessionId, messages) =>
+    request(`/sessions/${sessionId}/channel/`, {
+      method: 'POST',
+      body: JSON.stringify({ messages }),
+    }),
 };
@@ -32,7 +32,7 @@ export function QuestionCard({
   };
 
   const options = question?.options || [];
-  const showFeedback = mode === 'practice' && submitted && feedback;
+  const showFeedback = mode !== 'exam' && submitted && feedback;
 
   return (
     <div className="rounded-2xl bg-[var(--color-card)] shadow-md border border-[var(--color-border)] p-6">
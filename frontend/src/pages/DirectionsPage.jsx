@@ -29,7 +29,7 @@ export function DirectionsPage() {
       <header className="flex items-center justify-between px-6 py-4 border-b border-[var(--color-border)] bg-[var(--color-card)]">
         <div>
           <h1 className="text-lg font-bold text-[var(--color-text)]">
-            {mode === 'practice' ? 'Practice mode' : 'Exam Mode'}
+            {mode === 'adaptive' ? 'Adaptive practice' : mode === 'practice' ? 'Practice mode' : 'Exam Mode'}
           </h1>
           <p className="text-sm text-[var(--color-text-muted)] mt-0.5 flex items-center gap-1.5">
             <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M15.536 8.464a5 5 0 010 7.072m2.828-9.9a9 9 0 010 12.728M5.586 15H4a1 1 0 01-1-1v-4a1 1 0 011-1h1.586l4.707-4.707C10.923 3.663 12 4.109 12 5v14c0 .891-1.077 1.337-1.707.707L5.586 15z" /></svg>
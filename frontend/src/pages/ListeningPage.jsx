@@ -24,6 +24,15 @@ function formatElapsed(seconds) {
   return `${m.toString().padStart(2, '0')}:${s.toString().padStart(2, '0')}`;
 }
 
+// Timed exams count down the server's remaining time; otherwise show elapsed time
+const SessionClock = ({ elapsed, remaining }) => (
+  remaining == null ? (
+    <span className="text-sm font-mono text-[var(--color-text-muted)] tabular-nums" title="Elapsed time">{formatElapsed(elapsed)}</span>
+  ) : (
+    <span className={`text-sm font-mono tabular-nums ${remaining <= 60 ? 'text-red-600' : 'text-[var(--color-text-muted)]'}`} title="Time remaining">{formatElapsed(remaining)}</span>
+  )
+);
+
 const IconButton = ({ onClick, children, label }) => (
   <button
     type="button"
@@ -186,8 +195,12 @@ export default function ListeningPage() {
   const [lastAnalysisFeedback, setLastAnalysisFeedback] = useState(null);
   const [lastAnalysisQuestion, setLastAnalysisQuestion] = useState(null);
   const [elapsedSeconds, setElapsedSeconds] = useState(0);
+  const [remainingSeconds, setRemainingSeconds] = useState(null); // exam time limit, from the server
+  const [adaptiveDone, setAdaptiveDone] = useState(false); // adaptive mode: the server has no further item
   const answerStartRef = useRef(null);
-  const sessionStartRef = useRef(null);
+  const clockRef = useRef(null); // last server time status + local timestamp it arrived
+  const channelRef = useRef(null);
+  const pendingEventsRef = useRef([]);
 
   const isListeningActive = phase === 'player' || phase === 'questions'; // review phase does not play background
   useBackgroundNoise(
@@ -200,13 +213,39 @@ export default function ListeningPage() {
   const questionsList = (currentItem?.questions || []).map((q) => ({ ...q, itemId: currentItem?.id, item: currentItem }));
   const currentQ = questionsList[questionIndex] ?? null;
   const isLastQuestionOfStage = questionsList.length > 0 && questionIndex >= questionsList.length - 1;
-  const isLastStage = currentItemIndex >= (allItems.length - 1) && allItems.length > 0;
+  // Adaptive sessions receive one item at a time, so the loaded last item is only final once the server says so
+  const hasNextStage = currentItemIndex < allItems.length - 1;
+  const isLastStage = !hasNextStage && allItems.length > 0 && (mode !== 'adaptive' || adaptiveDone);
+  const stageLabel = mode === 'adaptive' ? `Stage ${currentItemIndex + 1}` : `Stage ${currentItemIndex + 1} of ${allItems.length}`;
   const isLastQuestion = isLastQuestionOfStage && isLastStage;
 
+  const syncClock = useCallback((time) => {
+    if (time) clockRef.current = { ...time, receivedAt: Date.now() };
+  }, []);
+
+  const showReport = useCallback((sid) => {
+    api.waitForScoreReport(sid)
+      .then((report) => {
+        setFinished(true);
+        setScoreReport(report);
+      })
+      .catch((e) => setError(e.message));
+  }, []);
+
+  // Anti-cheat events are queued and sent with the next channel message (answer, flush or heartbeat)
   const logEvent = useCallback((sid, eventType, count, extra) => {
-    api.logEvent(sid, eventType, count, extra).catch(() => {});
+    pendingEventsRef.current.push({ type: 'event', event_type: eventType, count, extra_data: extra });
   }, []);
 
+  const sendChannel = useCallback((sid, messages = []) => {
+    const batch = [...pendingEventsRef.current, ...messages];
+    pendingEventsRef.current = [];
+    return api.sendChannelMessages(sid, batch).then((res) => {
+      syncClock(res.time);
+      return res.results.slice(batch.length - messages.length);
+    });
+  }, [syncClock]);
+
   useEffect(() => {
     if (!testId) {
       setError('Missing test');
@@ -214,25 +253,61 @@ export default function ListeningPage() {
       return;
     }
     api.startSession(Number(testId), mode)
+      .then((data) => (mode === 'adaptive'
+        ? api.nextItem(data.session.id).then((next) => {
+          setAdaptiveDone(next.done);
+          return { ...data, all_items: next.item ? [next.item] : [] };
+        })
+        : data))
       .then((data) => {
         setSession(data.session);
         setAllItems(data.all_items || []);
         setCurrentItemIndex(0);
         setQuestionIndex(0);
         setPhase('player');
-        sessionStartRef.current = Date.now();
+        clockRef.current = {
+          elapsed: 0,
+          remaining: data.session.deadline ? data.session.test.time_limit_seconds : null,
+          receivedAt: Date.now(),
+        };
       })
       .catch((e) => setError(e.message))
       .finally(() => setLoading(false));
   }, [testId, mode]);
 
-  // Elapsed timer (updates every second while session active and not finished)
+  // Session channel: the server pushes elapsed/remaining time and ends timed exams itself
   useEffect(() => {
     if (!session?.id || finished) return;
-    const interval = setInterval(() => {
-      if (sessionStartRef.current) {
-        setElapsedSeconds(Math.floor((Date.now() - sessionStartRef.current) / 1000));
+    const sid = session.id;
+    channelRef.current = api.openSessionChannel(sid, {
+      onTime: syncClock,
+      onFinished: () => showReport(sid),
+    });
+    // Flush queued events; without a stream (the server only streams under ASGI, or it is down)
+    // a heartbeat fetches the server clock and learns when a timed exam has ended
+    const flush = setInterval(() => {
+      if (pendingEventsRef.current.length || channelRef.current?.readyState !== EventSource.OPEN) {
+        sendChannel(sid, [{ type: 'heartbeat' }])
+          .then(([res]) => res?.status === 'time_up' && showReport(sid))
+          .catch(() => {});
       }
+    }, 5000);
+    return () => {
+      clearInterval(flush);
+      channelRef.current?.close();
+      channelRef.current = null;
+    };
+  }, [session?.id, finished, syncClock, showReport, sendChannel]);
+
+  // Display timer: ticks locally between server time updates
+  useEffect(() => {
+    if (!session?.id || finished) return;
+    const interval = setInterval(() => {
+      const clock = clockRef.current;
+      if (!clock) return;
+      const drift = Math.floor((Date.now() - clock.receivedAt) / 1000);
+      setElapsedSeconds(clock.elapsed + drift);
+      setRemainingSeconds(clock.remaining == null ? null : Math.max(0, clock.remaining - drift));
     }, 1000);
     return () => clearInterval(interval);
   }, [session?.id, finished]);
@@ -258,8 +333,13 @@ export default function ListeningPage() {
     if (!session || !currentQ) return;
     const responseTimeMs = answerStartRef.current ? Math.round(performance.now() - answerStartRef.current) : null;
     setFeedback(null);
-    api.submitAnswer(session.id, currentQ.id, optionId, responseTimeMs)
-      .then((res) => {
+    sendChannel(session.id, [{
+      type: 'answer',
+      question_id: currentQ.id,
+      option_id: optionId,
+      ...(responseTimeMs != null && { response_time_ms: responseTimeMs }),
+    }])
+      .then(([res]) => {
         setFeedback(res);
         setLastAnalysisFeedback(res);
         setLastAnalysisQuestion(currentQ);
@@ -282,20 +362,27 @@ export default function ListeningPage() {
         // Don't auto-advance from last question of section: show "Continue to next section" so user can see it
         if (isLastQuestionOfStage) {
           // Leave phase as 'questions' and show the continue button; user clicks to advance
-          if (currentItemIndex >= allItems.length - 1) {
-            // Actually last section; no next section, keep feedback for Finish button
+          if (mode === 'adaptive' && !hasNextStage) {
+            // The next item depends on the answers so far, so it is fetched once the stage is done
+            api.nextItem(session.id)
+              .then((next) => (next.item ? setAllItems((prev) => [...prev, next.item]) : setAdaptiveDone(true)))
+              .catch((e) => setError(e.message));
           }
         } else {
           setQuestionIndex((i) => i + 1);
           setFeedback(null);
         }
       })
-      .catch((e) => setError(e.message));
+      .catch((e) => (e.status === 409 ? showReport(session.id) : setError(e.message)));
   };
 
   const handleFinish = () => {
     if (!session) return;
-    api.finishSession(session.id)
+    // Queued events must reach the server before the session is scored
+    const flushed = pendingEventsRef.current.length ? sendChannel(session.id).catch(() => {}) : Promise.resolve();
+    flushed
+      .then(() => api.finishSession(session.id))
+      .then((report) => (report?.status === 'pending' ? api.waitForScoreReport(session.id) : report))
       .then((report) => {
         setFinished(true);
         setScoreReport(report);
@@ -342,7 +429,7 @@ export default function ListeningPage() {
         <header className="flex items-center justify-between px-4 py-3 border-b border-[var(--color-border)] bg-[var(--color-card)]">
           <div className="flex items-center gap-2">
             <span className="text-lg font-bold text-[var(--color-text)]">+ Test Prep Pro</span>
-            <span className="text-sm font-mono text-[var(--color-text-muted)] tabular-nums">{formatElapsed(elapsedSeconds)}</span>
+            <SessionClock elapsed={elapsedSeconds} remaining={remainingSeconds} />
           </div>
           <div className="flex items-center gap-2">
             <ThemeToggle />
@@ -420,12 +507,12 @@ export default function ListeningPage() {
             <svg className="w-5 h-5 text-[var(--color-text)] shrink-0" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M15.536 8.464a5 5 0 010 7.072m2.828-9.9a9 9 0 010 12.728M5.586 15H4a1 1 0 01-1-1v-4a1 1 0 011-1h1.586l4.707-4.707C10.923 3.663 12 4.109 12 5v14c0 .891-1.077 1.337-1.707.707L5.586 15z" /></svg>
             <div>
               <p className="text-sm font-bold text-[var(--color-text)] leading-tight">{testTitle}</p>
-              <p className="text-xs text-[var(--color-text-muted)] leading-tight">Stage {currentItemIndex + 1} of {allItems.length} • {itemType}</p>
+              <p className="text-xs text-[var(--color-text-muted)] leading-tight">{stageLabel} • {itemType}</p>
             </div>
           </div>
           <div className="flex items-center gap-2">
             <ThemeToggle />
-            <span className="text-sm font-mono text-[var(--color-text-muted)] tabular-nums" title="Elapsed time">{formatElapsed(elapsedSeconds)}</span>
+            <SessionClock elapsed={elapsedSeconds} remaining={remainingSeconds} />
             {mode !== 'exam' && (
               <button type="button" onClick={() => setModal('review')} className="px-3 py-1.5 text-sm font-medium text-[var(--color-text)] hover:bg-[var(--color-surface)] rounded-lg">Review</button>
             )}
@@ -508,8 +595,8 @@ export default function ListeningPage() {
       <header className="flex items-center justify-between px-4 py-3 border-b border-[var(--color-border)] bg-[var(--color-card)]">
         <div className="flex items-center gap-2">
           <span className="text-lg font-bold text-[var(--color-text)]">+ Test Prep Pro</span>
-          <span className="text-sm text-[var(--color-text-muted)]">Stage {currentItemIndex + 1} of {allItems.length} • Question {questionIndex + 1} of {questionsList.length}</span>
-          <span className="text-sm font-mono text-[var(--color-text-muted)] tabular-nums" title="Elapsed time">{formatElapsed(elapsedSeconds)}</span>
+          <span className="text-sm text-[var(--color-text-muted)]">{stageLabel} • Question {questionIndex + 1} of {questionsList.length}</span>
+          <SessionClock elapsed={elapsedSeconds} remaining={remainingSeconds} />
         </div>
         <div className="flex items-center gap-1">
           <ThemeToggle />
@@ -572,12 +659,12 @@ export default function ListeningPage() {
           </div>
         )}
 
-        {mode === 'practice' && feedback && !isLastQuestionOfStage && (
+        {mode !== 'exam' && feedback && !isLastQuestionOfStage && (
           <div className="flex justify-end mt-4">
             <button type="button" onClick={goToNext} className="px-6 py-2.5 rounded-xl bg-[var(--color-accent)] text-[var(--color-text)] font-semibold border border-[var(--color-primary)]/20 hover:opacity-90">Continue →</button>
           </div>
         )}
-        {feedback && isLastQuestionOfStage && !isLastStage && (
+        {feedback && isLastQuestionOfStage && hasNextStage && (
           <div className="flex justify-end mt-4">
             <button
               type="button"
@@ -589,7 +676,7 @@ export default function ListeningPage() {
               }}
               className="px-6 py-2.5 rounded-xl bg-[var(--color-accent)] text-[var(--color-text)] font-semibold border border-[var(--color-primary)]/20 hover:opacity-90"
             >
-              {mode === 'practice' ? 'Continue to next lecture →' : 'Next section →'}
+              {mode !== 'exam' ? 'Continue to next lecture →' : 'Next section →'}
             </button>
           </div>
         )}
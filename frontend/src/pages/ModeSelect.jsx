@@ -10,10 +10,10 @@ export function ModeSelect() {
           Select Your Learning Mode
         </h1>
         <p className="text-[var(--color-text-muted)] text-center mb-10 max-w-xl mx-auto">
-          Choose how you want to prepare today. Select Exam Mode to test your readiness or Practice Mode to learn at your own pace.
+          Choose how you want to prepare today. Select Exam Mode to test your readiness, Practice Mode to learn at your own pace, or Adaptive Practice for lectures matched to your level.
         </p>
 
-        <div className="grid gap-6 sm:grid-cols-2">
+        <div className="grid gap-6 sm:grid-cols-2 lg:grid-cols-3">
           {/* Exam Mode card */}
           <div className="rounded-2xl bg-[var(--color-card)] shadow-md border border-[var(--color-border)] p-6 flex flex-col">
             <div className="flex items-start justify-between mb-4">
@@ -77,6 +77,38 @@ export function ModeSelect() {
               </ul>
             </div>
           </div>
+
+          {/* Adaptive Practice card */}
+          <div className="rounded-2xl bg-[var(--color-card)] shadow-md border border-[var(--color-border)] p-6 flex flex-col">
+            <div className="flex items-start justify-between mb-4">
+              <div className="w-12 h-12 rounded-full bg-[var(--color-practice)] flex items-center justify-center">
+                <svg className="w-6 h-6 text-[var(--color-text)]" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M13 7h8m0 0v8m0-8l-8 8-4-4-6 6" /></svg>
+              </div>
+              <span className="px-3 py-1 rounded-full text-xs font-semibold bg-[var(--color-accent)] text-[var(--color-text)] border border-[var(--color-primary)]/20">ADAPTIVE</span>
+            </div>
+            <h2 className="text-lg font-bold text-[var(--color-text)] mb-2">Adaptive Practice</h2>
+            <p className="text-[var(--color-text-muted)] text-sm mb-6 flex-1">
+              Each lecture is chosen from your answers so far, so the session homes in on your level in a few lectures.
+            </p>
+            <Link
+              to="/audio-setup?mode=adaptive"
+              className="inline-flex items-center justify-center gap-2 w-full py-3 rounded-xl border-2 border-[var(--color-practice-border)] text-[var(--color-practice-border)] font-semibold bg-white hover:bg-[var(--color-practice)]/10 transition"
+            >
+              <svg className="w-5 h-5" fill="currentColor" viewBox="0 0 24 24"><path d="M8 5v14l11-7z" /></svg>
+              Start Adaptive Practice
+            </Link>
+            <div className="mt-6 pt-4 border-t border-[var(--color-border)]">
+              <p className="text-xs font-medium text-[var(--color-text-muted)] uppercase tracking-wide mb-3">Key features</p>
+              <ul className="space-y-2 text-sm text-[var(--color-text)]">
+                {['Level-matched lectures', 'Shorter sessions', 'Instant feedback'].map((f, i) => (
+                  <li key={i} className="flex items-center gap-2">
+                    <span className="w-1.5 h-1.5 rounded-full bg-[var(--color-practice-border)]" />
+                    {f}
+                  </li>
+                ))}
+              </ul>
+            </div>
+          </div>
         </div>
       </div>
     </div>
@@ -38,7 +38,7 @@ export function TestSelect() {
       <div className="max-w-2xl mx-auto">
         <PageHeader
           title="Select a test"
-          subtitle={`${mode === 'practice' ? 'Practice' : 'Exam'} mode`}
+          subtitle={`${mode === 'adaptive' ? 'Adaptive practice' : mode === 'practice' ? 'Practice' : 'Exam'} mode`}
           showBack
           backTo="/"
         />